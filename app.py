@@ -1,10 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
-import joblib
-import pandas as pd
-import shap
-import matplotlib.pyplot as plt
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 import warnings
@@ -12,202 +8,50 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 
 warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
 
+# Only light modules at import time: pandas, numpy, joblib/sklearn, scipy and shap
+# are imported by prewarm() on a background thread once the window is up
+from schema import categorical_features, numerical_features, label_mapping
+import instrumentation
+
+
+MODEL_NAME = 'random_forest'
+# Optional on-disk tier of the prediction/SHAP cache, kept across restarts
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")
+
+
+def prewarm(model_name):
+    """Heavy imports, model load and SHAP explainer, off the Tk main thread.
+
+    Returns the pipeline; the compiled scorer, the explainer and the one-hot
+    feature groups end up in their caches (compiled_scorer.get_compiled,
+    explain.get_explainer, shap_groups.groups_for).
+    """
+    import numpy
+    import pandas
+    from model_registry import get_registry
+    from compiled_scorer import get_compiled
+    from explain import get_explainer
+    from shap_budget import NATIVE_SHAP, can_explain
+    from shap_groups import groups_for
+
+    pipeline = get_registry().get(model_name)
+    groups_for(pipeline.named_steps['preprocessing'])
+    get_compiled(pipeline)
+    model = pipeline.named_steps['model']
+    # CatBoost and LightGBM explain themselves; without an explainer the SHAP step reports it per prediction
+    if can_explain(model) and type(model).__name__ not in NATIVE_SHAP:
+        get_explainer(model)
+    return pipeline
+
 
-# Categorical features
-categorical_features = {
-    'Application_mode': [
-        "1 - 1st phase - general contingent",
-        "2 - Ordinance No. 612/93",
-        "5 - 1st phase - special contingent (Azores Island)",
-        "7 - Holders of other higher courses",
-        "10 - Ordinance No. 854-B/99",
-        "15 - International student (bachelor)",
-        "16 - 1st phase - special contingent (Madeira Island)",
-        "17 - 2nd phase - general contingent",
-        "18 - 3rd phase - general contingent",
-        "26 - Ordinance No. 533-A/99, item b2) (Different Plan)",
-        "27 - Ordinance No. 533-A/99, item b3 (Other Institution)",
-        "39 - Over 23 years old",
-        "42 - Transfer",
-        "43 - Change of course",
-        "44 - Technological specialization diploma holders",
-        "51 - Change of institution/course",
-        "53 - Short cycle diploma holders",
-        "57 - Change of institution/course (International)"
-    ],
-    'Course': [
-        "33 - Biofuel Production Technologies",
-        "171 - Animation and Multimedia Design",
-        "8014 - Social Service (evening attendance)",
-        "9003 - Agronomy",
-        "9070 - Communication Design",
-        "9085 - Veterinary Nursing",
-        "9119 - Informatics Engineering",
-        "9130 - Equinculture",
-        "9147 - Management",
-        "9238 - Social Service",
-        "9254 - Tourism",
-        "9500 - Nursing",
-        "9556 - Oral Hygiene",
-        "9670 - Advertising and Marketing Management",
-        "9773 - Journalism and Communication",
-        "9853 - Basic Education",
-        "9991 - Management (evening attendance)"
-    ],
-    'Previous_qualification': [
-        "1 - Secondary education",
-        "2 - Higher education - bachelor's degree",
-        "3 - Higher education - degree",
-        "4 - Higher education - master's",
-        "5 - Higher education - doctorate",
-        "6 - Frequency of higher education",
-        "9 - 12th year of schooling - not completed",
-        "10 - 11th year of schooling - not completed",
-        "12 - Other - 11th year of schooling",
-        "14 - 10th year of schooling",
-        "15 - 10th year of schooling - not completed",
-        "19 - Basic education 3rd cycle (9th/10th/11th year) or equiv.",
-        "38 - Basic education 2nd cycle (6th/7th/8th year) or equiv.",
-        "39 - Technological specialization course",
-        "40 - Higher education - degree (1st cycle)",
-        "42 - Professional higher technical course",
-        "43 - Higher education - master (2nd cycle)"
-    ],
-    'Mother_qualification': [
-        "1 - Secondary Education - 12th Year of Schooling or Eq.",
-        "2 - Higher Education - Bachelor's Degree",
-        "3 - Higher Education - Degree",
-        "4 - Higher Education - Master's",
-        "5 - Higher Education - Doctorate",
-        "6 - Frequency of Higher Education",
-        "9 - 12th Year of Schooling - Not Completed",
-        "10 - 11th Year of Schooling - Not Completed",
-        "11 - 7th Year (Old)",
-        "12 - Other - 11th Year of Schooling",
-        "14 - 10th Year of Schooling",
-        "18 - General commerce course",
-        "19 - Basic Education 3rd Cycle (9th/10th/11th Year) or Equiv.",
-        "22 - Technical-professional course",
-        "26 - 7th year of schooling",
-        "27 - 2nd cycle of the general high school course",
-        "29 - 9th Year of Schooling - Not Completed",
-        "30 - 8th year of schooling",
-        "34 - Unknown",
-        "35 - Can't read or write",
-        "36 - Can read without having a 4th year of schooling",
-        "37 - Basic education 1st cycle (4th/5th year) or equiv.",
-        "38 - Basic Education 2nd Cycle (6th/7th/8th Year) or Equiv.",
-        "39 - Technological specialization course",
-        "40 - Higher education - degree (1st cycle)",
-        "41 - Specialized higher studies course",
-        "42 - Professional higher technical course",
-        "43 - Higher Education - Master (2nd cycle)",
-        "44 - Higher Education - Doctorate (3rd cycle)"
-    ],
-    'Father_qualification': [
-        "1 - Secondary Education - 12th Year of Schooling or Eq.",
-        "2 - Higher Education - Bachelor's Degree",
-        "3 - Higher Education - Degree",
-        "4 - Higher Education - Master's",
-        "5 - Higher Education - Doctorate",
-        "6 - Frequency of Higher Education",
-        "9 - 12th Year of Schooling - Not Completed",
-        "10 - 11th Year of Schooling - Not Completed",
-        "11 - 7th Year (Old)",
-        "12 - Other - 11th Year of Schooling",
-        "13 - 2nd year complementary high school course",
-        "14 - 10th Year of Schooling",
-        "18 - General commerce course",
-        "19 - Basic Education 3rd Cycle (9th/10th/11th Year) or Equiv.",
-        "20 - Complementary High School Course",
-        "22 - Technical-professional course",
-        "25 - Complementary High School Course - not concluded",
-        "26 - 7th year of schooling",
-        "27 - 2nd cycle of the general high school course",
-        "29 - 9th Year of Schooling - Not Completed",
-        "30 - 8th year of schooling",
-        "31 - General Course of Administration and Commerce",
-        "33 - Supplementary Accounting and Administration",
-        "34 - Unknown",
-        "35 - Can't read or write",
-        "36 - Can read without having a 4th year of schooling",
-        "37 - Basic education 1st cycle (4th/5th year) or equiv.",
-        "38 - Basic Education 2nd Cycle (6th/7th/8th Year) or Equiv.",
-        "39 - Technological specialization course",
-        "40 - Higher education - degree (1st cycle)",
-        "41 - Specialized higher studies course",
-        "42 - Professional higher technical course",
-        "43 - Higher Education - Master (2nd cycle)",
-        "44 - Higher Education - Doctorate (3rd cycle)"
-    ],
-    'Mother_occupation': [
-        "0 - Student", "1 - Legislative/Executive/Directors",
-        "2 - Intellectual/Scientific Activities", "3 - Intermediate Level Technicians",
-        "4 - Administrative staff", "5 - Services/Sellers/Security",
-        "6 - Farmers and Agriculture workers", "7 - Industry/Construction/Craftsmen",
-        "8 - Machine Operators", "9 - Unskilled Workers", "10 - Armed Forces",
-        "90 - Other Situation", "99 - (blank)", "122 - Health professionals", "123 - Teachers",
-        "125 - ICT Specialists", "131 - Engineering/Science Technicians",
-        "132 - Health Technicians", "134 - Legal/Social/Sports/Cultural Technicians",
-        "141 - Office/Data Processing", "143 - Financial/Registry Operators",
-        "144 - Other Admin Staff", "151 - Personal Service Workers", "152 - Sellers",
-        "153 - Personal Care Workers", "171 - Skilled Construction Workers",
-        "173 - Artisans/Precision Workers", "175 - Food/Wood/Textile Craftsmen",
-        "191 - Cleaning Workers", "192 - Unskilled Agriculture/Fishery",
-        "193 - Unskilled Construction/Transport", "194 - Meal Prep Assistants"
-    ],
-    'Father_occupation': [
-        "0 - Student", "1 - Legislative/Executive/Directors",
-        "2 - Intellectual/Scientific Activities", "3 - Intermediate Level Technicians",
-        "4 - Administrative staff", "5 - Services/Sellers/Security",
-        "6 - Farmers and Agriculture workers", "7 - Industry/Construction/Craftsmen",
-        "8 - Machine Operators", "9 - Unskilled Workers", "10 - Armed Forces",
-        "90 - Other Situation", "99 - (blank)", "101 - Armed Forces Officers",
-        "102 - Armed Forces Sergeants", "103 - Armed Forces personnel",
-        "112 - Admin/Commercial Directors", "114 - Services Directors",
-        "121 - Engineering/Math/Science Specialists", "122 - Health professionals",
-        "123 - Teachers", "124 - Finance/Admin Specialists",
-        "131 - Science/Engineering Technicians", "132 - Health Technicians",
-        "134 - Legal/Social/Cultural Technicians", "135 - ICT Technicians",
-        "141 - Office/Data Processing", "143 - Financial/Registry Operators",
-        "144 - Other Admin Staff", "151 - Personal Service Workers", "152 - Sellers",
-        "153 - Personal Care Workers", "154 - Protection/Security Staff",
-        "161 - Market-Oriented Farmers", "163 - Subsistence Farmers/Fishers",
-        "171 - Skilled Construction Workers", "172 - Metal/Mechanical Workers",
-        "174 - Electric/Electronic Workers", "175 - Food/Wood/Textile Craftsmen",
-        "181 - Plant/Machine Operators", "182 - Assembly Workers",
-        "183 - Vehicle Drivers", "192 - Unskilled Agriculture Workers",
-        "193 - Unskilled Construction/Transport", "194 - Meal Prep Assistants",
-        "195 - Street Vendors"
-    ],
-    'Application_order': ['0','1', '2', '3', '4', '5', '6', '7', '8', '9'],
-
-    'Daytime/evening_attendance': ['1 - Daytime', '0 - Evening'],
-    'Displaced': ['1 - Yes', '0 - No'],
-    'Debtor': ['1 - Yes', '0 - No'],
-    'Tuition_fees_up_to_date': ['1 - Yes', '0 - No'],
-    'Gender': ['1 - Male', '0 - Female'],
-    'Scholarship_holder': ['1 - Yes', '0 - No']
-}
-
-# Numerical features
-numerical_features = [
-    'Previous_qualification_grade', 'Admission_grade', 'Age',
-    'Curricular_units_1st_sem_credited', 'Curricular_units_1st_sem_enrolled',
-    'Curricular_units_1st_sem_evaluations', 'Curricular_units_1st_sem_approved',
-    'Curricular_units_1st_sem_grade', 'Curricular_units_1st_sem_without_evaluations',
-    'Curricular_units_2nd_sem_credited', 'Curricular_units_2nd_sem_enrolled',
-    'Curricular_units_2nd_sem_evaluations', 'Curricular_units_2nd_sem_approved',
-    'Curricular_units_2nd_sem_grade', 'Curricular_units_2nd_sem_without_evaluations',
-    'Unemployment_rate', 'GDP'
-]
-
-label_mapping = {0: "Dropout", 1: "Enrolled", 2: "Graduate"}
 
 class StudentFormApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Student Dropout Predictor")
+        self.prewarm_future = None
+        # a Predict click waiting for the prewarm; further clicks do not queue more
+        self.predict_pending = False
 
         # --- Frame with scrollbar ---
         container = tk.Frame(root)
@@ -292,6 +136,9 @@ class StudentFormApp:
 
         tk.Button(button_frame, text="Predict", command=self.on_predict).pack(side="left", padx=20)
         tk.Button(button_frame, text="Reset", command=self.on_reset).pack(side="left", padx=20)
+        # Explain with source features (e.g. Course) instead of one-hot columns (oh__Course_9500)
+        self.group_features = tk.BooleanVar(value=True)
+        tk.Checkbutton(button_frame, text="Group one-hot features", variable=self.group_features).pack(side="left", padx=20)
         row += 1
 
         # Result label
@@ -302,22 +149,47 @@ class StudentFormApp:
         self.shap_label = tk.Label(self.scrollable_frame, text="", font=("Courier", 10))
         self.shap_label.grid(row=row, column=0, columnspan=4, pady=10)
 
-    
+        # start loading once the window has been drawn
+        self.root.after_idle(self.start_prewarm)
 
-    def on_predict(self):
-        model_name = 'random_forest'
-        model_path = f"models/best_model_{model_name}.joblib"
+    def start_prewarm(self):
+        if self.prewarm_future is not None:
+            return
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prewarm")
+        self.prewarm_future = executor.submit(prewarm, MODEL_NAME)
+        executor.shutdown(wait=False)
 
-        if not os.path.exists(model_path):
-            self.result_label.config(text=f"Model file not found: {model_path}", fg="red")
+    def on_predict(self):
+        # Still loading: check again shortly instead of blocking the window
+        if self.prewarm_future is None or not self.prewarm_future.done():
+            self.result_label.config(text="Loading model...", fg="gray")
+            if not self.predict_pending:
+                self.predict_pending = True
+                self.root.after(100, self.predict_when_ready)
             return
 
+        model_name = MODEL_NAME
+
         try:
-            pipeline = joblib.load(model_path)
+            # the registry call is a cache hit after the prewarm and reloads a changed file
+            self.prewarm_future.result()
+            from model_registry import get_registry
+            pipeline = get_registry().get(model_name)
+            if instrumentation.is_enabled():
+                instrumentation.instrument(pipeline, label=model_name)
+        except FileNotFoundError as e:
+            self.result_label.config(text=str(e), fg="red")
+            return
         except Exception as e:
             self.result_label.config(text=f"Failed to load model: {e}", fg="red")
             return
 
+        # already imported by the prewarm
+        import numpy as np
+        import pandas as pd
+        from explain import run_async
+        from result_cache import get_result_cache
+
         input_data = {}
 
         # Handle categorical features
@@ -345,7 +217,13 @@ class StudentFormApp:
         df = pd.DataFrame(input_data)
 
         try:
-            prediction = pipeline.predict(df)[0]
+            # Re-opened forms and repeated lookups of the same student come from the cache;
+            # otherwise one transform feeds predict and predict_proba: the NumPy-only compiled
+            # scorer, or the pipeline steps when they are instrumented
+            cache = get_result_cache(disk_dir=RESULT_CACHE_DIR, compiled=not instrumentation.is_enabled())
+            scored = cache.predict(model_name, df)
+
+            prediction = scored["prediction"][0]
             if isinstance(prediction, np.ndarray):
                 prediction = prediction.item()
 
@@ -357,17 +235,27 @@ class StudentFormApp:
             color = {"Dropout": "red", "Enrolled": "orange", "Graduate": "green"}.get(result, "black")
             self.result_label.config(text=f"Predicted outcome: {result}", fg=color)
 
-            explanation_text = self.explain_prediction(pipeline, df)
-            prob_array = pipeline.predict_proba(df)[0] 
+            prob_array = scored["proba"][0]
             class_labels = ["Dropout", "Enrolled", "Graduate"]
             probs = dict(zip(class_labels, prob_array))
 
-            self.show_prediction_details(model_name=model_name, probs=probs, shap_explanation=explanation_text)
-            
+            timings = instrumentation.stats(model_name) if instrumentation.is_enabled() else None
+            shap_text = self.show_prediction_details(model_name=model_name, probs=probs,
+                                                     shap_explanation="Computing SHAP explanation...",
+                                                     timings=timings, cached=scored["cached"] == len(df))
+
+            # SHAP runs on a background thread (or is a cache hit), the window is filled in when it is done
+            future = run_async(lambda: cache.predict(model_name, df, with_shap=True)["shap_values"])
+            self.root.after(50, self.poll_explanation, future, pipeline, prediction, shap_text)
 
         except Exception as e:
             self.result_label.config(text=f"Prediction error: {e}", fg="red")
 
+    def predict_when_ready(self):
+        # the form is read when the model is ready, so the last values entered are predicted
+        self.predict_pending = False
+        self.on_predict()
+
     def on_reset(self):
         for feature, widget in self.inputs.items():
             if isinstance(widget, tk.Entry):
@@ -377,41 +265,48 @@ class StudentFormApp:
         self.result_label.config(text="")
 
 
-    def explain_prediction(self, pipeline, X_input):
-       
-        model = pipeline.named_steps['model']
-        preprocessor = pipeline.named_steps['preprocessing']
-        feature_engineer = pipeline.named_steps.get('feature_transformer', None)
-        
-        X_feat = feature_engineer.transform(X_input)
-        X_proc = preprocessor.transform(X_feat)
+    def poll_explanation(self, future, pipeline, prediction, shap_text):
+        if not future.done():
+            self.root.after(50, self.poll_explanation, future, pipeline, prediction, shap_text)
+            return
 
-        if hasattr(X_proc, "toarray"):
-                X_proc = X_proc.toarray()
+        # The details window may have been closed in the meantime
+        if not shap_text.winfo_exists():
+            return
 
+        try:
+            explanation = self.explain_prediction(pipeline, future.result(), prediction)
+        except Exception as e:
+            explanation = f"SHAP explanation unavailable: {e}"
+
+        shap_text.configure(state="normal")
+        shap_text.delete("1.0", tk.END)
+        shap_text.insert("1.0", explanation)
+        shap_text.configure(state="disabled")
+
+
+    def explain_prediction(self, pipeline, shap_vals, prediction):
+        from explain import top_features
+        from shap_groups import groups_for
+
+        model = pipeline.named_steps['model']
+        preprocessor = pipeline.named_steps['preprocessing']
         feature_names = preprocessor.get_feature_names_out()
 
-        explainer = shap.TreeExplainer(model)
-        shap_values = explainer.shap_values(X_proc)
-        
-        # SElect predicted class
-        predicted_class = model.predict(X_proc)[0]
-        shap_instance = shap_values[0]                    
-        shap_feature_values = shap_instance[:, predicted_class]  
+        groups = groups_for(preprocessor) if self.group_features.get() else None
 
-        # Create a dictionary of feature names and their SHAP values
-        shap_dict = dict(zip(feature_names, shap_feature_values))
-        top_features = sorted(shap_dict.items(), key=lambda x: abs(x[1]), reverse=True)[:5]
+        # Top 5 features for the predicted class
+        top = top_features(shap_vals, feature_names, model, [prediction], k=5, groups=groups)[0]
 
         explanation = "Top 5 influential features:\n"
-        for name, val in top_features:
-            val = float(np.ravel(val)[0]) if isinstance(val, np.ndarray) else float(val)
+        for name, val in top:
+            val = float(val)
             direction = "↑" if val > 0 else "↓"
             explanation += f"{name}: {direction} impact ({val:.3f})\n"
 
         return explanation
     
-    def show_prediction_details(self, model_name, probs, shap_explanation):
+    def show_prediction_details(self, model_name, probs, shap_explanation, timings=None, cached=False):
 
         win = tk.Toplevel(self.root)
         win.title(f"Prediction Details — {model_name}")
@@ -424,6 +319,19 @@ class StudentFormApp:
         for label, prob in probs.items():
             tk.Label(prob_frame, text=f"{label}: {prob:.2%}", anchor="w", font=("Courier", 10)).pack(fill="x", padx=10)
 
+        # Pipeline step timings (only with PIPELINE_INSTRUMENTATION=1)
+        if timings:
+            win.geometry("450x550")
+            timing_frame = tk.LabelFrame(win, text="Pipeline Step Timings", font=("Helvetica", 11, "bold"))
+            timing_frame.pack(padx=10, pady=10, fill="both")
+            if cached:
+                # a result cache hit runs no pipeline step: the counters below are from earlier predictions
+                tk.Label(timing_frame, text="Served from the result cache, no step ran. Earlier predictions:",
+                         anchor="w", font=("Courier", 9, "italic")).pack(fill="x", padx=10)
+            for entry in timings:
+                text = f"{entry['step']}.{entry['method']}: {entry['last_ms']:.1f} ms (avg {entry['mean_ms']:.1f} ms, {entry['calls']} calls)"
+                tk.Label(timing_frame, text=text, anchor="w", font=("Courier", 9)).pack(fill="x", padx=10)
+
         # SHAP explanation
         shap_frame = tk.LabelFrame(win, text="Top SHAP Features", font=("Helvetica", 11, "bold"))
         shap_frame.pack(padx=10, pady=10, fill="both", expand=True)
@@ -433,10 +341,14 @@ class StudentFormApp:
         shap_text.configure(state="disabled")
         shap_text.pack(padx=10, pady=5, fill="both", expand=True)
 
+        return shap_text
+
 
 
 # Run the app
 if __name__ == "__main__":
+    if instrumentation.enabled_from_env():
+        instrumentation.enable()
     root = tk.Tk()
     root.geometry("800x900")
     app = StudentFormApp(root)
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
+
+from batch_scoring import score_csv
+from drift import DEFAULT_REFERENCE_PATH, DriftMonitor, load_reference
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Score a CSV of students (data.csv or data_cleaned.csv layout) with a saved pipeline.")
+    parser.add_argument("input", help="input CSV (semicolon raw layout or comma cleaned layout)")
+    parser.add_argument("output", help="output CSV with predictions and class probabilities")
+    parser.add_argument("--model", default="catboost",
+                        help="model name, loaded from <models-dir>/best_model_<model>.joblib")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--chunksize", type=int, default=10_000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes")
+    parser.add_argument("--cache-dir", default=None,
+                        help="read the input through the typed binary dataset cache in this directory "
+                             "(loads the whole file; default: stream the CSV)")
+    parser.add_argument("--drift-report", default=None,
+                        help="also compare the input against the data_cleaned.csv profile and write the report here")
+    parser.add_argument("--drift-reference", default=DEFAULT_REFERENCE_PATH)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry(args.models_dir)
+    if args.model not in registry.available():
+        sys.exit(f"Model file not found: {registry.path(args.model)}")
+
+    monitor = DriftMonitor(load_reference(args.drift_reference)) if args.drift_report else None
+
+    start = time.perf_counter()
+    n_rows = score_csv(args.input, args.output, args.model, models_dir=args.models_dir,
+                       chunksize=args.chunksize, workers=args.workers, cache_dir=args.cache_dir, monitor=monitor)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_rows} rows with {args.model} in {elapsed:.2f}s -> {args.output}")
+
+    if monitor is not None:
+        monitor.snapshot().to_csv(args.drift_report)
+        print(f"Drift: {monitor.summary()} -> {args.drift_report}")
@@ -0,0 +1,54 @@
+# Parity and latency of the compiled NumPy scorer against pipeline.predict_proba.
+#
+#   python benchmarks/bench_compiled.py --rows 200
+
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+from compiled_scorer import compile_pipeline
+from model_registry import get_registry
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data_cleaned.csv')
+
+
+def per_row_ms(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) * 1000 / len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="*", default=None, help="model names, default: all in models/")
+    parser.add_argument("--rows", type=int, default=200, help="single-row requests to time")
+    args = parser.parse_args()
+
+    registry = get_registry()
+    df = pd.read_csv(DATA_PATH).drop(columns=["Target"])
+    sample = df.sample(args.rows, random_state=42)
+
+    print(f"{'model':20}{'max |dp|':>12}{'pipeline ms/row':>18}{'compiled ms/row':>18}{'batch-16 ms':>14}")
+    for name in args.models or registry.available():
+        pipeline = registry.get(name)
+        scorer = compile_pipeline(pipeline)
+
+        diff = np.abs(pipeline.predict_proba(df) - scorer.predict_proba(df)).max()
+
+        frames = [sample.iloc[[i]] for i in range(len(sample))]
+        arrays = [scorer.as_array(f) for f in frames]
+        before = per_row_ms(pipeline.predict_proba, frames)
+        after = per_row_ms(scorer.predict_proba, arrays)
+        batch = per_row_ms(scorer.predict_proba, [scorer.as_array(sample.iloc[:16])] * 20)
+
+        print(f"{name:20}{diff:12.2e}{before:18.3f}{after:18.3f}{batch:14.3f}")
@@ -0,0 +1,88 @@
+# Per-prediction latency of predict + predict_proba + SHAP top-5, before and after
+# caching the TreeExplainer and reusing the transformed matrix.
+#
+#   python benchmarks/bench_explain.py --model lightgbm --rows 200
+
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+import shap
+
+from explain import predict_explain, top_features
+from model_registry import get_registry
+from shap_budget import NATIVE_SHAP, can_explain, exact_shap
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data_cleaned.csv')
+
+
+# What StudentFormApp.on_predict/explain_prediction did per click
+def legacy_single(pipeline, df):
+    model = pipeline.named_steps['model']
+    preprocessor = pipeline.named_steps['preprocessing']
+    feature_engineer = pipeline.named_steps['feature_transformer']
+
+    pipeline.predict(df)
+    X_proc = preprocessor.transform(feature_engineer.transform(df))
+    if hasattr(X_proc, "toarray"):
+        X_proc = X_proc.toarray()
+    if type(model).__name__ in NATIVE_SHAP:
+        values = exact_shap(model, X_proc)     # the library's own TreeSHAP, no explainer to build
+    else:
+        values = shap.TreeExplainer(model).shap_values(X_proc)
+    model.predict(X_proc)
+    pipeline.predict_proba(df)
+    return values
+
+
+def cached_single(pipeline, df, feature_names):
+    model = pipeline.named_steps['model']
+    result = predict_explain(pipeline, df)
+    return top_features(result["shap_values"], feature_names, model, result["prediction"], k=5)
+
+
+def timeit(fn, rows):
+    times = []
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        fn(rows.iloc[[i]])
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="lightgbm")
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args()
+
+    pipeline = get_registry().get(args.model)
+    if not can_explain(pipeline.named_steps['model']):
+        sys.exit(f"No SHAP explainer for model {args.model}")
+    feature_names = pipeline.named_steps['preprocessing'].get_feature_names_out()
+    df = pd.read_csv(DATA_PATH).drop(columns=["Target"])
+    rows = df.sample(args.rows, random_state=42)
+
+    # warm-up: build the cached explainer once
+    cached_single(pipeline, rows.iloc[[0]], feature_names)
+
+    before = timeit(lambda r: legacy_single(pipeline, r), rows)
+    after = timeit(lambda r: cached_single(pipeline, r, feature_names), rows)
+
+    start = time.perf_counter()
+    cached_single(pipeline, rows, feature_names)
+    batch = (time.perf_counter() - start) * 1000
+
+    print(f"model: {args.model}, rows: {args.rows}")
+    print(f"{'':24}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, t in [("before (per click)", before), ("after (per click)", after)]:
+        print(f"{name:24}{np.percentile(t, 50):10.2f}{np.percentile(t, 99):10.2f}{t.mean():10.2f}")
+    print(f"{'after (one batch call)':24}{'':20}{batch / args.rows:10.2f}")
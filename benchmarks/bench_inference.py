@@ -0,0 +1,202 @@
+# Serving cost of every saved model: load, predict, predict_proba and SHAP,
+# per pipeline stage and batch size, with peak memory. Results go to
+# results/inference_benchmark.csv, next to the quality metrics, and a
+# latency/F1 summary is printed.
+#
+#   python benchmarks/bench_inference.py
+#   python benchmarks/bench_inference.py --models lightgbm xgboost --batch-sizes 1 100 --no-shap
+#
+# Every model runs in its own process, so load times and peak RSS are not
+# affected by the models measured before it and a crashing SHAP backend only
+# loses that model's SHAP rows.
+
+import argparse
+import glob
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore")
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from inference import transform_for_model
+from model_registry import DEFAULT_MODELS_DIR, MODEL_PREFIX
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_PATH = os.path.join(ROOT_DIR, 'data', 'data_cleaned.csv')
+RESULTS_PATH = os.path.join(ROOT_DIR, 'results', 'model_comparison_results_SMOTE.csv')
+OUTPUT_PATH = os.path.join(ROOT_DIR, 'results', 'inference_benchmark.csv')
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 0]    # 0: the full dataset
+
+
+def load_rows():
+    df = pd.read_csv(DATA_PATH).drop(columns=["Target"])
+    # a fixed shuffle so that every batch size draws from the same rows
+    return df.sample(frac=1, random_state=42).reset_index(drop=True)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(fn, repeats):
+    """(median ms over repeats, traced peak MB of one extra run, result)"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    # memory in a separate run: tracemalloc slows down the timed ones
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(times)) * 1000, peak / 2**20, result
+
+
+def row(model, operation, stage, batch_size, time_ms, peak_mb, **extra):
+    return {"model": model, "operation": operation, "stage": stage, "batch_size": batch_size,
+            "time_ms": time_ms,
+            "per_row_ms": time_ms / batch_size if batch_size else np.nan,
+            "rows_per_s": batch_size / time_ms * 1000 if batch_size and time_ms else np.nan,
+            "peak_mem_mb": peak_mb, **extra}
+
+
+def bench_predict(name, models_dir, batch_sizes, repeats):
+    path = os.path.join(models_dir, f"{MODEL_PREFIX}{name}.joblib")
+    rows = []
+
+    # cold: the first load also imports the model's libraries; warm: the file alone
+    start = time.perf_counter()
+    pipeline = joblib.load(path)
+    cold = (time.perf_counter() - start) * 1000
+    file_mb = os.path.getsize(path) / 2**20
+    t, peak, pipeline = measure(lambda: joblib.load(path), repeats)
+    rows.append(row(name, "load", "cold", 0, cold, np.nan, file_mb=file_mb))
+    rows.append(row(name, "load", "warm", 0, t, peak, file_mb=file_mb))
+
+    steps = pipeline.named_steps
+    feature_transformer, preprocessor, model = steps["feature_transformer"], steps["preprocessing"], steps["model"]
+    data = load_rows()
+
+    for size in batch_sizes:
+        X = data.iloc[:size or len(data)]
+        n = len(X)
+
+        t, peak, X_fe = measure(lambda: feature_transformer.transform(X), repeats)
+        rows.append(row(name, "transform", "feature_transformer", n, t, peak))
+        t, peak, X_proc = measure(lambda: preprocessor.transform(X_fe), repeats)
+        rows.append(row(name, "transform", "preprocessing", n, t, peak))
+
+        for operation in ("predict", "predict_proba"):
+            t, peak, _ = measure(lambda: getattr(model, operation)(X_proc), repeats)
+            rows.append(row(name, operation, "model", n, t, peak))
+            t, peak, _ = measure(lambda: getattr(pipeline, operation)(X), repeats)
+            rows.append(row(name, operation, "total", n, t, peak))
+
+    for r in rows:
+        r["rss_peak_mb"] = peak_rss_mb()
+    return rows
+
+
+def bench_shap(name, models_dir, batch_sizes, repeats, max_rows):
+    # the SHAP path the GUI and the service use: native TreeSHAP for CatBoost/LightGBM,
+    # the cached shap.TreeExplainer otherwise, sparse input densified in blocks
+    from shap_budget import can_explain, exact_shap
+
+    pipeline = joblib.load(os.path.join(models_dir, f"{MODEL_PREFIX}{name}.joblib"))
+    model = pipeline.named_steps["model"]
+    data = load_rows()
+    if not can_explain(model):
+        return [row(name, "shap", "unsupported", 0, np.nan, np.nan, rss_peak_mb=peak_rss_mb())]
+
+    # first call: builds and caches the explainer, if the model needs one
+    X_first = transform_for_model(pipeline, data.iloc[:1])
+    t, peak, _ = measure(lambda: exact_shap(model, X_first), 1)
+    rows = [row(name, "shap", "first_call", 1, t, peak)]
+
+    for size in batch_sizes:
+        X = data.iloc[:size or len(data)]
+        if max_rows and len(X) > max_rows:
+            continue
+        X_proc = transform_for_model(pipeline, X)
+        t, peak, _ = measure(lambda: exact_shap(model, X_proc), repeats)
+        rows.append(row(name, "shap", "model", len(X), t, peak))
+
+    for r in rows:
+        r["rss_peak_mb"] = peak_rss_mb()
+    return rows
+
+
+def run_isolated(fn, *args):
+    # a fresh process per call: clean load times and RSS, survives native crashes
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            print(f"  {fn.__name__}({args[0]}): worker process crashed")
+        except Exception as e:
+            print(f"  {fn.__name__}({args[0]}): {type(e).__name__}: {e}")
+    return []
+
+
+def summarize(df):
+    """Latency next to macro F1: per-row predict_proba cost for single rows and the largest batch."""
+    proba = df[(df.operation == "predict_proba") & (df.stage == "total")]
+    summary = pd.DataFrame({
+        "load_ms": df[(df.operation == "load") & (df.stage == "warm")].set_index("model")["time_ms"],
+        "single_row_ms": proba[proba.batch_size == proba.batch_size.min()].set_index("model")["time_ms"],
+        "batch_per_row_ms": proba[proba.batch_size == proba.batch_size.max()].set_index("model")["per_row_ms"],
+        "rss_peak_mb": df.groupby("model")["rss_peak_mb"].max(),
+    })
+    shap_rows = df[(df.operation == "shap") & (df.stage == "model") & (df.batch_size == 1)]
+    if len(shap_rows):
+        summary["shap_single_row_ms"] = shap_rows.set_index("model")["time_ms"]
+    if os.path.exists(RESULTS_PATH):
+        quality = pd.read_csv(RESULTS_PATH, index_col=0)
+        summary.insert(0, "f1_macro", quality["f1_macro"])
+    return summary.sort_values("single_row_ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="*", default=None, help="model names, default: all in models/")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--batch-sizes", nargs="*", type=int, default=DEFAULT_BATCH_SIZES,
+                        help="rows per call, 0 for the full dataset")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-shap", action="store_true")
+    parser.add_argument("--shap-max-rows", type=int, default=None, help="skip SHAP for larger batches")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    names = args.models or sorted(
+        os.path.basename(p)[len(MODEL_PREFIX):-len(".joblib")]
+        for p in glob.glob(os.path.join(args.models_dir, f"{MODEL_PREFIX}*.joblib")))
+
+    results = []
+    for name in names:
+        print(f"{name}...")
+        results += run_isolated(bench_predict, name, args.models_dir, args.batch_sizes, args.repeats)
+        if not args.no_shap:
+            results += run_isolated(bench_shap, name, args.models_dir, args.batch_sizes, args.repeats,
+                                    args.shap_max_rows)
+
+    df = pd.DataFrame(results)
+    df.to_csv(args.output, index=False)
+    print(f"\nSaved {len(df)} measurements to {args.output}\n")
+    with pd.option_context("display.float_format", "{:.3f}".format, "display.width", 160,
+                           "display.max_columns", None):
+        print(summarize(df))
@@ -0,0 +1,71 @@
+# Fidelity and latency of budgeted SHAP against the exact values stored in shap_output/.
+#
+#   python benchmarks/bench_shap_budget.py --tag cb --model catboost --budgets 500 1000 5000 15000
+
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+
+from model_registry import get_registry
+from shap_budget import budgeted_shap, costs_ms, exact_shap, fidelity
+from shap_store import open_store
+
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'results', 'shap_budget.csv')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fidelity and latency of budgeted SHAP against shap_output/ values.")
+    parser.add_argument("--tag", default="cb", help="shap_output/ artifacts with the exact values (e.g. cb)")
+    parser.add_argument("--model", default="catboost", help="saved model the artifacts were computed with")
+    parser.add_argument("--budgets", nargs="+", type=float, default=[500, 1000, 2000, 5000, 15000],
+                        help="latency budgets in ms for the whole stored set")
+    parser.add_argument("--with-exact", action="store_true", help="also time exact SHAP on every stored row (slow)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    return parser.parse_args()
+
+
+def check_reference(model, X, reference, rows=8):
+    """The stored values must be this model's: recompute a few rows exactly."""
+    diff = np.abs(exact_shap(model, X[:rows]) - reference[:rows]).max()
+    if diff > 1e-6:
+        sys.exit(f"shap_output values do not match the saved model (max diff {diff:.3g})")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = open_store(args.tag)
+    if not store.meta["has_data"]:
+        sys.exit(f"shap_output/{args.tag} has no model input data to explain")
+    X = np.asarray(store.data)
+    reference = np.stack([np.asarray(store.values(c)) for c in store.classes], axis=-1)
+    model = get_registry().get(args.model).steps[-1][1]
+    check_reference(model, X, reference)
+    costs_ms(model, X)      # one-time cost probe, kept out of the timings
+
+    runs = [{"mode": "approximate"}] + [{"budget_ms": b} for b in args.budgets]
+    if args.with_exact:
+        runs.append({"mode": "exact"})
+
+    rows = []
+    for kwargs in runs:
+        start = time.perf_counter()
+        values, info = budgeted_shap(model, X, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        rows.append({"budget_ms": kwargs.get("budget_ms", np.nan), "mode": info["mode"],
+                     "exact_rows": info["exact_rows"], "rows": len(X), "elapsed_ms": elapsed,
+                     "per_row_ms": elapsed / len(X), **fidelity(values, reference)})
+        print(rows[-1])
+
+    report = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.4g}".format):
+        print(report)
+    report.to_csv(args.output, index=False)
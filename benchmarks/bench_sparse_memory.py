@@ -0,0 +1,156 @@
+# Memory of the sparse (CSR) preprocessing output against densifying it, on data_cleaned.csv
+# replicated 100x: transform, predict_proba, SHAP and SMOTE.
+#
+#   python benchmarks/bench_sparse_memory.py --factor 100 --models xgboost lightgbm decision_tree catboost
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore")
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+
+from data_loader import DATA_CLEANED_PATH, load_dataset
+from explain import get_explainer
+from inference import transform_for_model
+from model_registry import get_registry
+from shap_budget import _stack, exact_shap
+from training import build_pipeline, prepare_features
+
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), '..', 'results', 'sparse_memory.csv')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Memory of sparse vs densified preprocessing output.")
+    parser.add_argument("--factor", type=int, default=100, help="times data_cleaned.csv is replicated")
+    parser.add_argument("--models", nargs="+", default=["xgboost", "lightgbm", "decision_tree", "catboost"],
+                        help="models scored on the replicated rows")
+    parser.add_argument("--shap-model", default="xgboost", help="TreeExplainer-supported model for the SHAP step")
+    parser.add_argument("--shap-rows", type=int, default=20_000, help="rows explained by the SHAP step")
+    parser.add_argument("--smote-factor", type=int, default=10,
+                        help="replication of the SMOTE input (kNN on every row is quadratic)")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    return parser.parse_args()
+
+
+def nbytes(X):
+    if hasattr(X, "indptr"):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def _status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+def _reset_peak_rss():
+    # Linux: "5" resets VmHWM to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(fn):
+    """(result, peak MB of Python/NumPy allocations during fn, peak RSS growth MB, seconds).
+
+    tracemalloc sees NumPy/SciPy buffers but not the native allocations of
+    XGBoost/LightGBM/CatBoost; the RSS high-water mark sees both (Linux only,
+    NaN elsewhere) but not memory the allocator reuses.
+    """
+    gc.collect()
+    rss = _reset_peak_rss() and _status_kb("VmRSS")
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_peak = (_status_kb("VmHWM") - rss) / 1024 if rss else np.nan
+    return result, peak / 2**20, rss_peak, elapsed
+
+
+def row(stage, layout, input_mb, measured, **extra):
+    _, peak_mb, rss_mb, seconds = measured
+    entry = {"stage": stage, "layout": layout, "input_mb": input_mb, "peak_mb": peak_mb,
+             "rss_growth_mb": rss_mb, "seconds": seconds, **extra}
+    print(entry)
+    return entry
+
+
+# What exact_shap did before the blockwise path: one dense copy of every row
+def legacy_shap(model, X_proc):
+    return _stack(get_explainer(model).shap_values(X_proc.toarray()))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry()
+    X, y = prepare_features(load_dataset(DATA_CLEANED_PATH))
+    X_big = pd.concat([X] * args.factor, ignore_index=True)
+    y_big = np.tile(np.asarray(y), args.factor)
+    print(f"{len(X_big)} rows ({args.factor}x data_cleaned.csv)")
+
+    pipeline = registry.get(args.models[0])
+    rows = []
+
+    # --- preprocessing output ---
+    measured = measure(lambda: transform_for_model(pipeline, X_big))
+    X_sparse = measured[0]
+    density = X_sparse.nnz / np.prod(X_sparse.shape)
+    rows.append(row("transform", "sparse", 0.0, measured, output_mb=nbytes(X_sparse) / 2**20, density=density))
+    measured = measure(lambda: transform_for_model(pipeline, X_big).toarray())
+    X_dense = measured[0]
+    rows.append(row("transform", "dense", 0.0, measured, output_mb=nbytes(X_dense) / 2**20, density=density))
+
+    # --- scoring: the matrix handed to predict_proba and what predict_proba allocates on top ---
+    for name in args.models:
+        model = registry.get(name).steps[-1][1]
+        if type(model).__name__ == "LGBMClassifier":
+            model.set_params(verbose=-1)
+        for layout, X_in in (("sparse", X_sparse), ("dense", X_dense)):
+            rows.append(row(f"predict_proba {name}", layout, nbytes(X_in) / 2**20,
+                            measure(lambda: model.predict_proba(X_in))))
+
+    # --- SHAP on the first shap_rows rows ---
+    model = registry.get(args.shap_model).steps[-1][1]
+    X_shap = X_sparse[:args.shap_rows]
+    get_explainer(model)
+    measured = measure(lambda: exact_shap(model, X_shap))
+    blockwise = measured[0]
+    rows.append(row(f"shap {args.shap_model}", "sparse, dense blocks", nbytes(X_shap) / 2**20, measured))
+    measured = measure(lambda: legacy_shap(model, X_shap))
+    rows.append(row(f"shap {args.shap_model}", "densified whole", nbytes(X_shap) / 2**20, measured,
+                    max_abs_diff=float(np.abs(blockwise - measured[0]).max())))
+    del blockwise, measured
+
+    # --- SMOTE: plain (brute-force kNN on sparse input) and as in the training pipeline ---
+    n_smote = len(X) * args.smote_factor
+    X_smote, y_smote = X_sparse[:n_smote], y_big[:n_smote]
+    runs = [("sparse, brute-force kNN", SMOTE(random_state=42), X_smote),
+            ("sparse, dense class index", build_pipeline(None).named_steps["smote"], X_smote),
+            ("dense", SMOTE(random_state=42), X_smote.toarray())]
+    for layout, smote, X_in in runs:
+        measured = measure(lambda: smote.fit_resample(X_in, y_smote))
+        rows.append(row(f"smote {args.smote_factor}x", layout, nbytes(X_in) / 2**20, measured,
+                        output_mb=nbytes(measured[0][0]) / 2**20))
+
+    report = pd.DataFrame(rows)
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.4g}".format):
+        print(report)
+    report.to_csv(args.output, index=False)
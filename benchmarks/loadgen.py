@@ -0,0 +1,63 @@
+# Load generator for serve.py: concurrent single-student requests, reports latency and throughput.
+#
+#   python serve.py --model lightgbm &
+#   python benchmarks/loadgen.py --concurrency 32 --requests 2000
+
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+import numpy as np
+import pandas as pd
+
+from schema import categorical_features, numerical_features
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'data_cleaned.csv')
+
+
+def load_records():
+    df = pd.read_csv(DATA_PATH)
+    columns = list(categorical_features) + numerical_features
+    return df[columns].to_dict(orient="records")
+
+
+def send(url, payload):
+    body = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000/predict")
+    parser.add_argument("--model", default=None, help="model name, defaults to the server's default")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--explain", action="store_true", help="ask for top-k SHAP features")
+    args = parser.parse_args()
+
+    records = load_records()
+    payloads = []
+    for i in range(args.requests):
+        payload = {"student": records[i % len(records)], "explain": args.explain}
+        if args.model:
+            payload["model"] = args.model
+        payloads.append(payload)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = np.array(list(pool.map(lambda p: send(args.url, p), payloads))) * 1000
+    elapsed = time.perf_counter() - start
+
+    print(f"requests: {args.requests}, concurrency: {args.concurrency}, explain: {args.explain}")
+    print(f"p50: {np.percentile(latencies, 50):.2f} ms, p99: {np.percentile(latencies, 99):.2f} ms")
+    print(f"throughput: {args.requests / elapsed:.1f} req/s")
@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import pandas as pd
+
+from comparison import compare_models
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from training import load_training_data
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare every pair of saved models on the test split: repeated-fold tests and bootstrap CIs.")
+    parser.add_argument("--models", nargs="*", default=None, help="model names, default: every model in models/")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--n-splits", type=int, default=10)
+    parser.add_argument("--n-repeats", type=int, default=3)
+    parser.add_argument("--n-boot", type=int, default=2000, help="bootstrap resamples of the test split")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=None, help="bootstrap processes, default: one per CPU")
+    parser.add_argument("--output", default=os.path.join(ROOT_DIR, "results", "model_comparison.csv"))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry(args.models_dir)
+    names = args.models or registry.available()
+    missing = [n for n in names if n not in registry.available()]
+    if missing:
+        sys.exit(f"Model file not found: {', '.join(registry.path(n) for n in missing)}")
+    if len(names) < 2:
+        sys.exit("Need at least two models to compare")
+
+    _, X_test, _, y_test = load_training_data()
+    pipelines = {name: registry.get(name) for name in names}
+
+    start = time.perf_counter()
+    summary, pairs = compare_models(pipelines, X_test, y_test, n_splits=args.n_splits, n_repeats=args.n_repeats,
+                                    n_boot=args.n_boot, alpha=args.alpha, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.4g}".format):
+        print(summary)
+        print(pairs.sort_values("wilcoxon_p_holm").to_string(index=False))
+    print(f"{len(names)} models, {len(pairs)} pairs, {args.n_splits * args.n_repeats} folds, "
+          f"{args.n_boot} bootstrap resamples in {elapsed:.2f} s")
+
+    pairs.to_csv(args.output, index=False)
+    summary.to_csv(os.path.splitext(args.output)[0] + "_summary.csv")
@@ -0,0 +1,49 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+import pandas as pd
+
+from data_loader import DATA_CLEANED_PATH, iter_dataset_chunks, load_dataset
+from drift import DEFAULT_REFERENCE_PATH, DriftMonitor, build_reference, load_reference, save_reference
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Compare a CSV of students with the data_cleaned.csv reference profile (PSI, KS, unseen codes).")
+    parser.add_argument("input", nargs="?", help="CSV to check (data.csv or data_cleaned.csv layout)")
+    parser.add_argument("--reference", default=DEFAULT_REFERENCE_PATH)
+    parser.add_argument("--build-reference", action="store_true",
+                        help="rebuild the reference profile from --reference-data first")
+    parser.add_argument("--reference-data", default=DATA_CLEANED_PATH)
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--output", default=None, help="write the per-feature report here")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.build_reference:
+        save_reference(build_reference(load_dataset(args.reference_data)), args.reference)
+        print(f"Reference profile of {args.reference_data} -> {args.reference}")
+    if args.input is None:
+        sys.exit(0 if args.build_reference else "Nothing to check: give an input CSV")
+
+    monitor = DriftMonitor(load_reference(args.reference))
+    start = time.perf_counter()
+    for chunk in iter_dataset_chunks(args.input, chunksize=args.chunksize):
+        monitor.update(chunk)
+    elapsed = time.perf_counter() - start
+
+    report = monitor.snapshot()
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.max_rows", None,
+                           "display.float_format", "{:.4g}".format):
+        print(report.drop(columns=["rows", "missing"]))
+    print(f"{monitor.summary()} in {elapsed:.2f}s")
+    if args.output:
+        report.to_csv(args.output)
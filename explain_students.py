@@ -0,0 +1,51 @@
+import argparse
+import os
+import sys
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from data_loader import DATA_CLEANED_PATH, load_dataset
+from inference import transform_for_model
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from shap_budget import budgeted_shap
+from shap_store import DEFAULT_SHAP_DIR, write_store
+from training import prepare_features
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Explain every student with a saved model within a time window and write a SHAP store.")
+    parser.add_argument("--model", default="catboost")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--data", default=DATA_CLEANED_PATH)
+    parser.add_argument("--budget-s", type=float, default=None, help="time window in seconds, default: exact SHAP")
+    parser.add_argument("--max-exact-rows", type=int, default=None, help="rows explained with exact SHAP at most")
+    parser.add_argument("--output-dir", default=None, help="store directory, default: shap_output/<model>_all")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry(args.models_dir)
+    if args.model not in registry.available():
+        sys.exit(f"Model file not found: {registry.path(args.model)}")
+    pipeline = registry.get(args.model)
+    model = pipeline.steps[-1][1]
+
+    X, _ = prepare_features(load_dataset(args.data))
+    # kept sparse: SHAP densifies small blocks, the store writes data.npy block by block
+    X_proc = transform_for_model(pipeline, X)
+
+    budget_ms = args.budget_s * 1000 if args.budget_s is not None else None
+    mode = "auto" if budget_ms is not None or args.max_exact_rows is not None else "exact"
+    values, info = budgeted_shap(model, X_proc, budget_ms=budget_ms, max_rows=args.max_exact_rows, mode=mode)
+    print(f"{info['rows']} students, mode {info['mode']}, {info['exact_rows']} exact rows, "
+          f"{info['elapsed_ms'] / 1000:.1f}s (cost probe {info['probe_ms'] / 1000:.1f}s)")
+
+    path = args.output_dir or os.path.join(DEFAULT_SHAP_DIR, f"{args.model}_all")
+    write_store(path, values, pipeline.named_steps["preprocessing"].get_feature_names_out(), data=X_proc,
+                row_ids=X.index.to_numpy(), classes=model.classes_)
+    print(f"Saved SHAP store to {path}")
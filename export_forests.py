@@ -0,0 +1,107 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_CLEANED_PATH, load_dataset
+from flat_forest import DEFAULT_FLAT_DIR, FlatForest, can_export, export_pipeline, load_flat_pipeline
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from training import prepare_features
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export the saved tree models as flat memory-mapped arrays and check prediction parity.")
+    parser.add_argument("--models", nargs="*", default=None, help="model names, default: every tree model in models/")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--output-dir", default=DEFAULT_FLAT_DIR)
+    parser.add_argument("--data", default=DATA_CLEANED_PATH, help="rows the parity check scores")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="max |predict_proba difference| accepted")
+    parser.add_argument("--repeats", type=int, default=5, help="timed loads per format")
+    parser.add_argument("--report", default=os.path.join(ROOT_DIR, "results", "flat_forest.csv"))
+    return parser.parse_args()
+
+
+def median_s(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def dir_bytes(path, exclude=()):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path) if f not in exclude)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry(args.models_dir)
+    names = args.models or registry.available()
+    missing = [n for n in names if n not in registry.available()]
+    if missing:
+        sys.exit(f"Model file not found: {', '.join(registry.path(n) for n in missing)}")
+
+    X, _ = prepare_features(load_dataset(args.data))
+
+    report, failed = {}, []
+    for name in names:
+        pipeline = registry.get(name)
+        if not can_export(pipeline.steps[-1][1]):
+            print(f"{name}: {type(pipeline.steps[-1][1]).__name__} is not a tree model, skipped")
+            continue
+
+        path = os.path.join(args.output_dir, name)
+        flat = export_pipeline(pipeline, path)
+
+        start = time.perf_counter()
+        expected = pipeline.predict_proba(X)
+        pipeline_s = time.perf_counter() - start
+        start = time.perf_counter()
+        proba = flat.predict_proba(X)
+        flat_s = time.perf_counter() - start
+
+        max_diff = float(np.abs(proba - expected).max())
+        agreement = float((np.ravel(pipeline.predict(X)) == flat.predict(X)).mean())
+        if max_diff > args.tolerance or agreement < 1.0:
+            failed.append(name)
+
+        model_file = registry.path(name)
+        report[name] = {
+            "layout": flat.forest.meta["layout"],
+            "trees": flat.forest.meta["n_trees"],
+            "max_depth": flat.forest.meta["max_depth"],
+            "leaves": flat.forest.meta["n_leaves"],
+            "joblib_kb": os.path.getsize(model_file) / 1024,
+            "flat_kb": dir_bytes(path, exclude=("preprocessing.joblib",)) / 1024,
+            "preprocessing_kb": os.path.getsize(os.path.join(path, "preprocessing.joblib")) / 1024,
+            "joblib_load_ms": median_s(lambda: joblib.load(model_file), args.repeats) * 1000,
+            "flat_load_ms": median_s(lambda: FlatForest(path), args.repeats) * 1000,
+            "flat_pipeline_load_ms": median_s(lambda: load_flat_pipeline(path), args.repeats) * 1000,
+            "pipeline_predict_ms": pipeline_s * 1000,
+            "flat_predict_ms": flat_s * 1000,
+            "max_proba_diff": max_diff,
+            "prediction_agreement": agreement,
+        }
+        print(f"{name}: exported to {path}, max |proba diff| {max_diff:.2e}, agreement {agreement:.2%}")
+
+    report = pd.DataFrame(report).T
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.4g}".format):
+        print(report)
+    report.to_csv(args.report)
+
+    if failed:
+        sys.exit(f"Parity check failed for: {', '.join(failed)}")
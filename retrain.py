@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import joblib
+import pandas as pd
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from data_loader import load_dataset
+from incremental import compare_with_full_retrain, replay_sample, update_pipeline
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from training import load_training_data, prepare_features
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SIMULATION_REPORT_PATH = os.path.join(ROOT_DIR, "results", "incremental_retraining.csv")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Update saved models with a new student cohort instead of re-running the grid search.")
+    parser.add_argument("--models", nargs="*", default=None, help="model names, default: all in models/")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--new-data", help="CSV of the new cohort with a Target column (data.csv or data_cleaned.csv layout)")
+    parser.add_argument("--output-dir", default=None,
+                        help="where updated models are saved (required with --new-data)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="allow --output-dir to be --models-dir, replacing the saved models")
+    parser.add_argument("--replay-size", type=int, default=1000, help="previous training rows replayed with the new ones")
+    parser.add_argument("--extra", type=int, default=None, help="trees/boosting rounds to add, default: 25%% of the model")
+    parser.add_argument("--force-refit", action="store_true", help="refit preprocessing and model even without drift")
+    parser.add_argument("--simulate", type=float, default=None, metavar="FRACTION",
+                        help="no new data: hold out FRACTION of the training split as the new cohort and "
+                             "compare the update with a full retrain")
+    parser.add_argument("--report", default=None,
+                        help="report CSV, default: retrain_report.csv in --output-dir with --new-data, "
+                             "results/incremental_retraining.csv with --simulate")
+    return parser.parse_args()
+
+
+def simulate(names, registry, fraction, replay_size, extra):
+    X_train, X_test, y_train, y_test = load_training_data()
+    X_old, X_new, y_old, y_new = train_test_split(X_train, y_train, test_size=fraction, random_state=42,
+                                                  stratify=y_train)
+    report = {}
+    for name in names:
+        report[name] = compare_with_full_retrain(registry.get(name), X_old, y_old, X_new, y_new, X_test, y_test,
+                                                 replay_size=replay_size, extra=extra)
+        print(f"{name}: {report[name]['mode']}, {report[name]['incremental_s']:.1f}s vs {report[name]['full_s']:.1f}s")
+    return pd.DataFrame(report).T
+
+
+def update(names, registry, new_data, output_dir, replay_size, extra, force_refit):
+    X_train, X_test, y_train, y_test = load_training_data()
+    X_new, y_new = prepare_features(load_dataset(new_data, cache_dir=None))
+    X_replay, y_replay = replay_sample(X_train, y_train, replay_size)
+
+    report = {}
+    for name in names:
+        pipeline = registry.get(name)
+        start = time.perf_counter()
+        updated, info = update_pipeline(pipeline, X_new, y_new, X_replay, y_replay, extra=extra,
+                                        force_refit=force_refit, X_old=X_train, y_old=y_train)
+        elapsed = time.perf_counter() - start
+
+        joblib.dump(updated, os.path.join(output_dir, f"best_model_{name}.joblib"))
+        report[name] = {
+            "mode": info["mode"],
+            "f1_before": f1_score(y_test, pipeline.predict(X_test), average="macro"),
+            "f1_after": f1_score(y_test, updated.predict(X_test), average="macro"),
+            "update_s": elapsed,
+            "drift_refit": info["drift"]["refit"],
+        }
+        print(f"{name}: {info['mode']} in {elapsed:.1f}s")
+    return pd.DataFrame(report).T
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if (args.new_data is None) == (args.simulate is None):
+        sys.exit("Pass either --new-data or --simulate")
+
+    registry = get_registry(args.models_dir)
+    names = args.models or registry.available()
+    missing = [n for n in names if n not in registry.available()]
+    if missing:
+        sys.exit(f"Model file not found: {', '.join(registry.path(n) for n in missing)}")
+
+    if args.simulate is not None:
+        report_path = args.report or SIMULATION_REPORT_PATH
+        report = simulate(names, registry, args.simulate, args.replay_size, args.extra)
+    else:
+        if args.output_dir is None:
+            sys.exit("Pass --output-dir: updated models are not written over the saved ones by default")
+        if os.path.abspath(args.output_dir) == os.path.abspath(args.models_dir) and not args.overwrite:
+            sys.exit(f"--output-dir is --models-dir: pass --overwrite to replace the models in {args.models_dir}")
+        os.makedirs(args.output_dir, exist_ok=True)
+        # next to the models it describes, not over the committed simulation results
+        report_path = args.report or os.path.join(args.output_dir, "retrain_report.csv")
+        report = update(names, registry, args.new_data, args.output_dir,
+                        args.replay_size, args.extra, args.force_refit)
+
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(report)
+    report.to_csv(report_path)
+    print(f"Report saved to {report_path}")
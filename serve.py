@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning, module="sklearn")
+
+import pandas as pd
+
+from drift import DEFAULT_REFERENCE_PATH, DriftMonitor, load_reference
+from micro_batching import MicroBatcher
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from result_cache import get_result_cache
+from schema import encode_student, label_mapping
+from shap_budget import can_explain
+from whatif import sweep
+
+
+# POST /predict
+#   {"students": [{...}, ...], "model": "catboost", "explain": false, "top_k": 5}
+#   a single {"student": {...}} is accepted too; records use the same fields as the GUI form
+# POST /whatif
+#   {"student": {...}, "changes": {"Debtor": [0]}, "deltas": {"Curricular_units_2nd_sem_approved": [1, 2]},
+#    "model": "catboost", "target": "Dropout", "top_k": 20, "explain": 0}
+#   every combination of the changes, ranked by how much it lowers the target class probability
+# GET /drift
+#   scored traffic since startup (or the last POST /drift/reset) against the data_cleaned.csv profile
+# GET /health, GET /stats
+
+
+class ScoringService:
+    def __init__(self, models_dir=DEFAULT_MODELS_DIR, default_model="catboost",
+                 max_batch_size=64, max_wait_ms=5.0, cache_size=0, cache_dir=None,
+                 drift_reference=DEFAULT_REFERENCE_PATH, compiled=False):
+        self.registry = get_registry(models_dir)
+        # input drift of /predict traffic; drift_reference=None turns it off
+        self.drift = DriftMonitor(load_reference(drift_reference)) if drift_reference else None
+        # repeated students skip the model; cache_size=0 turns the cache off
+        self.cache = get_result_cache(models_dir, max_entries=cache_size, disk_dir=cache_dir,
+                                      compiled=compiled) if cache_size else None
+        # NumPy-only preprocessing (compiled_scorer) instead of the pipeline's pandas steps
+        self.compiled = compiled
+        self.default_model = default_model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def batcher(self, model_name):
+        if model_name not in self.registry.available():
+            raise FileNotFoundError(f"Model file not found: {self.registry.path(model_name)}")
+        with self._lock:
+            if model_name not in self._batchers:
+                self._batchers[model_name] = MicroBatcher(
+                    lambda: self.registry.get(model_name),
+                    max_batch_size=self.max_batch_size,
+                    max_wait_ms=self.max_wait_ms,
+                    cache=self.cache, model_name=model_name, compiled=self.compiled)
+            return self._batchers[model_name]
+
+    def predict(self, payload):
+        records = payload.get("students")
+        if records is None:
+            records = [payload["student"]] if "student" in payload else []
+        if not records:
+            raise ValueError("No students in request")
+
+        model_name = payload.get("model", self.default_model)
+        explain = bool(payload.get("explain", False))
+        top_k = int(payload.get("top_k", 5))
+
+        batcher = self.batcher(model_name)
+        if explain and not can_explain(self.registry.get(model_name).steps[-1][1]):
+            raise ValueError(f"No SHAP explainer for model {model_name}, request it without explain")
+
+        encoded = [encode_student(r) for r in records]
+        if self.drift is not None:
+            self.drift.update_records(encoded)
+        df = pd.DataFrame(encoded)
+        result = batcher.submit(df, explain=explain, top_k=top_k).result()
+
+        labels = [label_mapping.get(c, str(c)) for c in result["classes"]]
+        predictions = []
+        for i, (pred, proba) in enumerate(zip(result["prediction"], result["proba"])):
+            entry = {
+                "prediction": label_mapping.get(pred, str(pred)),
+                "probabilities": {label: float(p) for label, p in zip(labels, proba)},
+            }
+            if explain:
+                entry["top_features"] = [{"feature": str(name), "shap": float(val)}
+                                         for name, val in result["top_features"][i]]
+            predictions.append(entry)
+
+        return {"model": model_name, "predictions": predictions}
+
+    def whatif(self, payload):
+        if "student" not in payload:
+            raise ValueError("No student in request")
+        model_name = payload.get("model", self.default_model)
+        if model_name not in self.registry.available():
+            raise FileNotFoundError(f"Model file not found: {self.registry.path(model_name)}")
+
+        # one batched predict_proba over all scenarios, outside the micro-batcher
+        table = sweep(self.registry.get(model_name), payload["student"],
+                      changes=payload.get("changes"), deltas=payload.get("deltas"),
+                      target=payload.get("target", "Dropout"), top_k=int(payload.get("top_k", 20)),
+                      explain=int(payload.get("explain", 0)))
+        return {"model": model_name, "target": table.attrs["target"], "baseline": table.attrs["baseline"],
+                "n_scenarios": table.attrs["n_scenarios"], "scenarios": table.to_dict(orient="records")}
+
+    def drift_report(self, payload=None):
+        if self.drift is None:
+            raise FileNotFoundError("Drift monitoring is off")
+        report = self.drift.snapshot()
+        # to_json writes NaN as null
+        return {"summary": self.drift.summary(), "features": json.loads(report.to_json(orient="index"))}
+
+    def reset_drift(self, payload=None):
+        if self.drift is None:
+            raise FileNotFoundError("Drift monitoring is off")
+        self.drift.reset()
+        return {"status": "ok"}
+
+    def stats(self):
+        with self._lock:
+            batchers = {name: b.stats() for name, b in self._batchers.items()}
+        stats = {"batchers": batchers, "registry": self.registry.stats()}
+        if self.cache is not None:
+            stats["result_cache"] = self.cache.stats()
+        return stats
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": self.service.registry.available()})
+        elif self.path == "/stats":
+            self._send_json(200, self.service.stats())
+        elif self.path == "/drift":
+            try:
+                self._send_json(200, self.service.drift_report())
+            except FileNotFoundError as e:
+                self._send_json(404, {"error": str(e)})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        handlers = {"/predict": self.service.predict, "/whatif": self.service.whatif,
+                    "/drift/reset": self.service.reset_drift}
+        if self.path not in handlers:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            self._send_json(200, handlers[self.path](payload))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"Prediction error: {e}"})
+
+    # keep the console quiet under load
+    def log_message(self, format, *args):
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 256
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON scoring service with micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default="catboost", help="default model when a request does not name one")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="max rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="max time a request waits for a batch to fill")
+    parser.add_argument("--cache-size", type=int, default=4096, help="students kept in the result cache, 0 disables it")
+    parser.add_argument("--cache-dir", default=None, help="also keep cached results on disk, across restarts")
+    parser.add_argument("--drift-reference", default=DEFAULT_REFERENCE_PATH,
+                        help="reference profile for GET /drift (built from data_cleaned.csv if missing)")
+    parser.add_argument("--no-drift", action="store_true", help="do not monitor input drift")
+    parser.add_argument("--compiled", action="store_true",
+                        help="preprocess with the NumPy-only compiled scorer instead of the pandas pipeline steps")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    ScoringHandler.service = ScoringService(args.models_dir, args.model,
+                                            max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+                                            cache_size=args.cache_size, cache_dir=args.cache_dir,
+                                            drift_reference=None if args.no_drift else args.drift_reference,
+                                            compiled=args.compiled)
+    server = ScoringServer((args.host, args.port), ScoringHandler)
+    print(f"Serving on http://{args.host}:{args.port} (default model: {args.model})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,31 @@
+import os
+import sys
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import pandas as pd
+import pytest
+
+from data_loader import DATA_CLEANED_PATH, load_dataset
+from model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="session")
+def data_cleaned():
+    """data_cleaned.csv as the notebooks read it (plain read_csv, no schema)."""
+    return pd.read_csv(DATA_CLEANED_PATH)
+
+
+@pytest.fixture(scope="session")
+def dataset():
+    """data_cleaned.csv through the typed loader, without touching the on-disk cache."""
+    return load_dataset(DATA_CLEANED_PATH, cache_dir=None)
+
+
+@pytest.fixture(scope="session")
+def registry():
+    """The saved models in models/, loaded once for the whole run."""
+    return ModelRegistry()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+
+from cascade import CascadePredictor, tune_thresholds
+from inference import preprocessing_key
+from training import load_training_data
+
+
+@pytest.fixture(scope="module")
+def split():
+    return load_training_data(cache_dir=None)
+
+
+@pytest.fixture(scope="module")
+def refit_stage(registry, split):
+    # as after retrain.py refits one stage: its preprocessing is fitted on other rows
+    X_train, _, y_train, _ = split
+    return clone(registry.get("decision_tree")).fit(X_train.iloc[:1500], y_train.iloc[:1500])
+
+
+def test_thresholds_tuned_on_each_stage_preprocessing(registry, split, refit_stage):
+    _, X_test, _, y_test = split
+    stages = [refit_stage, registry.get("xgboost")]
+    assert preprocessing_key(stages[0]) != preprocessing_key(stages[1])
+
+    thresholds, info = tune_thresholds(stages, X_test, y_test, target_f1=1.0, n_candidates=5)
+    expected = [f1_score(y_test, np.ravel(p.predict(X_test)), average="macro") for p in stages]
+    assert info["stage_f1"] == pytest.approx(expected)
+
+    cascade = CascadePredictor(stages, thresholds)
+    assert not cascade.shared_preprocessing
+    assert f1_score(y_test, cascade.predict(X_test), average="macro") == pytest.approx(info["f1"])
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from sklearn.metrics import f1_score
+
+from comparison import encode_labels, fold_rows, macro_f1_many
+
+
+@pytest.fixture(scope="module")
+def labels():
+    rng = np.random.default_rng(0)
+    y = rng.choice(["Dropout", "Enrolled", "Graduate"], size=600, p=[0.3, 0.2, 0.5])
+    # one model close to y, one noisy, one that never predicts "Enrolled"
+    predictions = {
+        "good": np.where(rng.random(600) < 0.85, y, rng.choice(["Dropout", "Enrolled", "Graduate"], size=600)),
+        "noisy": rng.choice(["Dropout", "Enrolled", "Graduate"], size=600),
+        "no_enrolled": np.where(y == "Enrolled", "Graduate", y),
+    }
+    return y, predictions
+
+
+def expected_scores(y, predictions, rows):
+    return np.array([[f1_score(y[r], p[r], average="macro") for r in rows] for p in predictions.values()])
+
+
+def test_encode_labels(labels):
+    y, predictions = labels
+    y_codes, pred_codes, classes = encode_labels(y, predictions)
+    assert list(classes) == ["Dropout", "Enrolled", "Graduate"]
+    assert (classes[y_codes] == y).all()
+    for codes, p in zip(pred_codes, predictions.values()):
+        assert (classes[codes] == p).all()
+
+
+def test_bootstrap_rows_match_f1_score(labels):
+    y, predictions = labels
+    y_codes, pred_codes, classes = encode_labels(y, predictions)
+    rows = np.random.default_rng(1).integers(0, len(y), size=(25, len(y)))
+    assert_allclose(macro_f1_many(y_codes, pred_codes, rows, len(classes)),
+                    expected_scores(y, predictions, rows), rtol=0, atol=1e-12)
+
+
+def test_fold_rows_match_f1_score(labels):
+    y, predictions = labels
+    y_codes, pred_codes, classes = encode_labels(y, predictions)
+    rows = fold_rows(y, n_splits=7, n_repeats=2)      # folds of different sizes
+    assert len({len(r) for r in rows}) > 1
+    assert_allclose(macro_f1_many(y_codes, pred_codes, rows, len(classes)),
+                    expected_scores(y, predictions, rows), rtol=0, atol=1e-12)
+
+
+def test_subsets_missing_a_class(labels):
+    # classes absent from both y and the predictions of a subset are left out, as in sklearn
+    y, predictions = labels
+    y_codes, pred_codes, classes = encode_labels(y, predictions)
+    not_enrolled = np.flatnonzero((y != "Enrolled") & (predictions["good"] != "Enrolled")
+                                  & (predictions["noisy"] != "Enrolled"))
+    rows = [not_enrolled[:50], not_enrolled[50:200], np.flatnonzero(y == "Graduate")[:30]]
+    assert_allclose(macro_f1_many(y_codes, pred_codes, rows, len(classes)),
+                    expected_scores(y, predictions, rows), rtol=0, atol=1e-12)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from imblearn.pipeline import Pipeline as ImbPipeline
+from numpy.testing import assert_allclose, assert_array_equal
+
+from compiled_scorer import compile_pipeline, get_compiled, model_input
+from inference import transform_for_model
+from model_registry import ModelRegistry
+from result_cache import ResultCache
+
+MODEL_NAMES = ModelRegistry().available()
+
+
+@pytest.fixture(scope="module")
+def X(data_cleaned):
+    return data_cleaned.drop(columns=["Target"])
+
+
+def dense(matrix):
+    return matrix.toarray() if hasattr(matrix, "toarray") else np.asarray(matrix)
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+def test_transform_matches_preprocessing(registry, X, name):
+    pipeline = registry.get(name)
+    expected = pipeline.named_steps["preprocessing"].transform(pipeline.named_steps["feature_transformer"].transform(X))
+    assert_allclose(compile_pipeline(pipeline).transform(X), dense(expected), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("name", MODEL_NAMES)
+def test_predict_proba_matches_pipeline(registry, X, name):
+    pipeline = registry.get(name)
+    scorer = compile_pipeline(pipeline)
+    assert_allclose(scorer.predict_proba(X), pipeline.predict_proba(X), rtol=0, atol=1e-12)
+    assert_array_equal(scorer.predict(X), np.ravel(pipeline.predict(X)))
+    assert_array_equal(scorer.classes_, pipeline.classes_)
+
+
+def test_array_and_record_inputs(registry, X):
+    pipeline = registry.get(MODEL_NAMES[0])
+    scorer = compile_pipeline(pipeline)
+    rows = X.head(16)
+    expected = pipeline.predict_proba(rows)
+    assert_allclose(scorer.predict_proba(scorer.as_array(rows)), expected, rtol=0, atol=1e-12)
+    assert_allclose(scorer.predict_proba(rows.to_dict(orient="records")), expected, rtol=0, atol=1e-12)
+
+
+def test_unseen_category_is_ignored(registry, X):
+    # handle_unknown="ignore": an unseen code gets no one-hot column, in both paths
+    pipeline = registry.get(MODEL_NAMES[0])
+    rows = X.head(4).copy()
+    rows["Course"] = -1
+    assert_allclose(compile_pipeline(pipeline).predict_proba(rows), pipeline.predict_proba(rows), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("codes", [
+    [3.0, 19.0, 1.0, 2.5],                    # float column: FeatTransformer counts 0 ("3.0" is no digit string)
+    ["3", "abc", None, "-1"],                 # object column of strings
+    [3, -1, 0, 37],                           # integer column, negative codes count 0
+])
+def test_qualification_codes_as_feat_transformer(registry, X, codes):
+    pipeline = registry.get(MODEL_NAMES[0])
+    scorer = compile_pipeline(pipeline)
+    rows = X.head(4).copy()
+    rows["Mother_qualification"] = pd.Series(codes, index=rows.index)
+    expected = pipeline.predict_proba(rows)
+    assert_allclose(scorer.predict_proba(rows), expected, rtol=0, atol=1e-12)
+    assert_allclose(scorer.predict_proba(rows.to_dict(orient="records")), expected, rtol=0, atol=1e-12)
+
+
+def test_model_input_switch(registry, X):
+    pipeline = registry.get(MODEL_NAMES[0])
+    rows = X.head(32)
+    assert get_compiled(pipeline) is get_compiled(pipeline)
+    assert_allclose(dense(model_input(pipeline, rows)), dense(transform_for_model(pipeline, rows)), rtol=0, atol=1e-12)
+    # a pipeline that does not compile falls back to its own steps
+    steps_only = ImbPipeline(pipeline.steps[1:])
+    assert get_compiled(steps_only) is None
+    engineered = pipeline.named_steps["feature_transformer"].transform(rows)
+    assert_allclose(dense(model_input(steps_only, engineered)),
+                    dense(transform_for_model(pipeline, rows)), rtol=0, atol=1e-12)
+
+
+def test_result_cache_through_the_compiled_scorer(X):
+    rows = X.head(32)
+    plain = ResultCache(ModelRegistry()).predict(MODEL_NAMES[0], rows, with_shap=True)
+    compiled = ResultCache(ModelRegistry(), compiled=True).predict(MODEL_NAMES[0], rows, with_shap=True)
+    assert_array_equal(compiled["prediction"], plain["prediction"])
+    assert_allclose(compiled["proba"], plain["proba"], rtol=0, atol=1e-12)
+    assert_allclose(compiled["shap_values"], plain["shap_values"], rtol=0, atol=1e-9)
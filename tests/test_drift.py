@@ -0,0 +1,67 @@
+import pytest
+from numpy.testing import assert_allclose
+
+from drift import CATEGORICAL, MIN_ROWS, NUMERIC, DriftMonitor, build_reference
+
+
+@pytest.fixture(scope="module")
+def reference(dataset):
+    return build_reference(dataset)
+
+
+def test_reference_data_does_not_drift(dataset, reference):
+    monitor = DriftMonitor(reference)
+    monitor.update(dataset)
+    report = monitor.snapshot()
+
+    assert_allclose(report["psi"], 0.0, atol=1e-9)
+    assert_allclose(report["ks"], 0.0, atol=1e-9)
+    numeric = report.loc[NUMERIC]
+    assert_allclose(numeric["mean"], numeric["ref_mean"])
+    assert_allclose(numeric["std"], numeric["ref_std"])
+    assert (report["status"] == "ok").all()
+    assert monitor.summary()["drifted"] == [] and monitor.summary()["warnings"] == []
+
+
+def test_chunks_and_records_match_one_update(dataset, reference):
+    whole = DriftMonitor(reference)
+    whole.update(dataset)
+
+    chunked = DriftMonitor(reference)
+    for start in range(0, len(dataset), 700):
+        chunked.update(dataset.iloc[start:start + 700])
+
+    records = DriftMonitor(reference)
+    records.update_records(dataset.head(300).to_dict(orient="records"))
+    records.update(dataset.iloc[300:])
+
+    expected = whole.snapshot()
+    for monitor in (chunked, records):
+        report = monitor.snapshot()
+        assert_allclose(report["psi"], expected["psi"], atol=1e-12)
+        assert_allclose(report.loc[NUMERIC, ["mean", "std"]], expected.loc[NUMERIC, ["mean", "std"]])
+
+
+def test_shifted_feature_and_unseen_code(dataset, reference):
+    X = dataset.copy()
+    X["Age"] = X["Age"] + 2 * reference["numeric"]["Age"]["std"]
+    X["Course"] = X["Course"].astype(float)
+    X.loc[X.index[:100], "Course"] = 9999
+    monitor = DriftMonitor(reference)
+    monitor.update(X)
+    report = monitor.snapshot()
+
+    assert report.loc["Age", "status"] == "drift"
+    assert report.loc["Course", "status"] == "unknown codes"
+    assert report.loc["Course", "new_codes"] == "9999 (100)"
+    assert monitor.summary()["unknown_row_rate"] == pytest.approx(100 / len(X))
+    untouched = [c for c in NUMERIC + CATEGORICAL if c not in ("Age", "Course")]
+    assert (report.loc[untouched, "status"] == "ok").all()
+
+
+def test_too_few_rows(dataset, reference):
+    monitor = DriftMonitor(reference)
+    monitor.update(dataset.head(MIN_ROWS - 1))
+    assert (monitor.snapshot()["status"] == "too few rows").all()
+    monitor.reset()
+    assert monitor.rows == 0
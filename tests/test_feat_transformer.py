@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from FeatTransformer import FeatTransformer
+
+
+# FeatTransformer.transform before vectorization (row-wise background score, np.where divisions)
+def baseline_transform(X):
+    X = X.copy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X["weighted_avg_grade"] = np.where(
+            (X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_approved"]) > 0,
+            (X["Curricular_units_1st_sem_grade"] * X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_grade"] * X["Curricular_units_2nd_sem_approved"]) /
+            (X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_approved"]),
+            0.0
+        )
+
+        X["pass_rate_1st"] = np.where(
+            X["Curricular_units_1st_sem_enrolled"] > 0,
+            X["Curricular_units_1st_sem_approved"]
+            / X["Curricular_units_1st_sem_enrolled"],
+            0.0
+        )
+
+        X["pass_rate_2nd"] = np.where(
+            X["Curricular_units_2nd_sem_enrolled"] > 0,
+            X["Curricular_units_2nd_sem_approved"]
+            / X["Curricular_units_2nd_sem_enrolled"],
+            0.0
+        )
+
+    X["approved_delta"] = (
+        X["Curricular_units_2nd_sem_approved"]
+        - X["Curricular_units_1st_sem_approved"]
+    )
+
+    X["total_enrolled"] = (
+        X["Curricular_units_1st_sem_enrolled"]
+        + X["Curricular_units_2nd_sem_enrolled"]
+    )
+
+    X['age_bin'] = pd.cut(X['Age'], bins=[0, 20, 25, 100], labels=['young', 'medium', 'adult'])
+
+    def background_score(row):
+        score = 0
+        if str(row['Mother_qualification']).isdigit():
+            score += int(row['Mother_qualification'])
+        if str(row['Father_qualification']).isdigit():
+            score += int(row['Father_qualification'])
+        return score
+
+    X['parent_background_score'] = X.apply(background_score, axis=1)
+
+    X.drop(columns=[
+        'Mother_qualification',
+        'Father_qualification'
+    ], inplace=True)
+
+    return X
+
+
+def assert_same_as_baseline(X):
+    expected = baseline_transform(X)
+    assert_frame_equal(FeatTransformer().transform(X), expected)
+    assert_frame_equal(FeatTransformer(copy=False).transform(X.copy()), expected)
+
+
+def test_parity_on_data_cleaned(data_cleaned):
+    assert_same_as_baseline(data_cleaned.drop(columns=["Target"]))
+
+
+def test_parity_on_typed_dataset(dataset):
+    # categorical qualification codes and narrow integer types from data_loader
+    assert_same_as_baseline(dataset.drop(columns=["Target"]))
+
+
+@pytest.fixture
+def edge_rows(data_cleaned):
+    X = data_cleaned.drop(columns=["Target"]).head(6).reset_index(drop=True)
+    # nothing enrolled or approved in one or both semesters
+    X.loc[0, ["Curricular_units_1st_sem_enrolled", "Curricular_units_1st_sem_approved",
+              "Curricular_units_1st_sem_grade"]] = 0
+    X.loc[1, ["Curricular_units_2nd_sem_enrolled", "Curricular_units_2nd_sem_approved",
+              "Curricular_units_2nd_sem_grade"]] = 0
+    X.loc[2, ["Curricular_units_1st_sem_enrolled", "Curricular_units_1st_sem_approved",
+              "Curricular_units_2nd_sem_enrolled", "Curricular_units_2nd_sem_approved"]] = 0
+    return X
+
+
+def test_zero_enrolled_and_approved(edge_rows):
+    assert_same_as_baseline(edge_rows)
+    Xt = FeatTransformer().transform(edge_rows)
+    assert Xt.loc[2, ["weighted_avg_grade", "pass_rate_1st", "pass_rate_2nd"]].eq(0.0).all()
+
+
+def test_non_digit_qualifications(edge_rows):
+    X = edge_rows.astype({"Mother_qualification": object, "Father_qualification": object})
+    X["Mother_qualification"] = ["12", "abc", None, "-1", 3.5, 7]
+    X["Father_qualification"] = [np.nan, "1", "", " 2", "19", "x9"]
+    assert_same_as_baseline(X)
+    assert FeatTransformer().transform(X)["parent_background_score"].tolist() == [12, 1, 0, 0, 19, 7]
+
+
+def test_negative_integer_qualifications(edge_rows):
+    X = edge_rows.copy()
+    X["Mother_qualification"] = [-3, 0, 1, 2, 3, 4]
+    assert_same_as_baseline(X)
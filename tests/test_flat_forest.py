@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+from scipy import sparse
+
+from flat_forest import can_export, export_model, export_pipeline, load_flat_pipeline
+from model_registry import ModelRegistry
+
+_registry = ModelRegistry()
+EXPORTABLE = [name for name in _registry.available() if can_export(_registry.get(name).steps[-1][1])]
+
+
+@pytest.fixture(scope="module")
+def X(data_cleaned):
+    return data_cleaned.drop(columns=["Target"])
+
+
+def split_thresholds(forest):
+    a = forest.arrays
+    if forest.meta["layout"] == "oblivious":
+        return a["split_feature"].ravel(), a["split_threshold"].ravel()
+    internal = slice(0, forest.meta["n_internal"])
+    return a["feature"][internal], a["threshold"][internal]
+
+
+@pytest.mark.parametrize("name", EXPORTABLE)
+def test_flat_pipeline_matches_pipeline(registry, X, tmp_path, name):
+    pipeline = registry.get(name)
+    export_pipeline(pipeline, str(tmp_path))
+    flat = load_flat_pipeline(str(tmp_path))
+    assert_allclose(flat.predict_proba(X), pipeline.predict_proba(X), rtol=0, atol=1e-6)
+    assert_array_equal(flat.predict(X), np.ravel(pipeline.predict(X)))
+
+
+@pytest.mark.parametrize("name", EXPORTABLE)
+def test_inputs_at_split_thresholds(registry, X, tmp_path, name):
+    # inputs on a threshold and one float32/float64 step either side of it
+    # must take the same branch as in the library
+    pipeline = registry.get(name)
+    model = pipeline.steps[-1][1]
+    forest = export_model(model, str(tmp_path))
+    base = pipeline[:-2].transform(X.head(1))
+    base = base.toarray() if sparse.issparse(base) else np.asarray(base, dtype=np.float64)
+
+    features, thresholds = split_thresholds(forest)
+    picked = np.random.default_rng(0).choice(len(features), size=min(300, len(features)), replace=False)
+    rows = []
+    for feature, threshold in zip(features[picked], thresholds[picked].astype(np.float64)):
+        t32 = np.float32(threshold)
+        for value in (threshold, np.nextafter(threshold, -np.inf), np.nextafter(threshold, np.inf),
+                      np.nextafter(t32, np.float32(-np.inf)), np.nextafter(t32, np.float32(np.inf))):
+            row = base[0].copy()
+            row[feature] = value
+            rows.append(row)
+    probe = sparse.csr_matrix(np.array(rows))
+
+    assert_array_equal(forest.predict(probe), np.ravel(model.predict(probe)))
+    assert_allclose(forest.predict_proba(probe), model.predict_proba(probe), rtol=0, atol=1e-6)
@@ -0,0 +1,65 @@
+import copy
+import pickle
+
+import joblib
+import pytest
+from numpy.testing import assert_allclose
+
+import instrumentation
+from model_registry import ModelRegistry
+
+INSTRUMENTED_ATTRIBUTES = set(instrumentation.METHODS) | {"__getstate__"}
+
+
+@pytest.fixture
+def pipeline():
+    # a private copy: the registry's pipelines are shared by the other tests
+    return ModelRegistry().get("xgboost")
+
+
+@pytest.fixture
+def timing():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def leftovers(pipeline):
+    return {(name, attr) for name, step in pipeline.steps if step is not None and step != "passthrough"
+            for attr in INSTRUMENTED_ATTRIBUTES & set(vars(step))}
+
+
+def test_instrument_records_steps(pipeline, data_cleaned, timing):
+    X = data_cleaned.drop(columns=["Target"]).head(10)
+    instrumentation.instrument(pipeline, label="xgb")
+    pipeline.predict_proba(X)
+    steps = {(e["step"], e["method"]) for e in instrumentation.stats("xgb")}
+    assert {("feature_transformer", "transform"), ("preprocessing", "transform"),
+            ("model", "predict_proba")} <= steps
+
+
+@pytest.mark.parametrize("roundtrip", [
+    lambda p, path: pickle.loads(pickle.dumps(p)),
+    lambda p, path: (joblib.dump(p, path), joblib.load(path))[1],
+    lambda p, path: copy.deepcopy(p),
+])
+def test_instrumented_pipeline_saves_as_a_plain_one(pipeline, data_cleaned, tmp_path, timing, roundtrip):
+    X = data_cleaned.drop(columns=["Target"]).head(10)
+    instrumentation.instrument(pipeline, label="xgb")
+    assert leftovers(pipeline)
+
+    loaded = roundtrip(pipeline, tmp_path / "pipeline.joblib")
+    assert leftovers(loaded) == set()
+    assert leftovers(pipeline)                       # the original stays instrumented
+    instrumentation.reset()
+    assert_allclose(loaded.predict_proba(X), pipeline.predict_proba(X))
+    # only the original's calls were recorded
+    assert {e["calls"] for e in instrumentation.stats("xgb")} == {1}
+
+
+def test_uninstrument(pipeline):
+    instrumentation.instrument(pipeline)
+    instrumentation.uninstrument(pipeline)
+    assert leftovers(pipeline) == set()
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+
+from model_registry import DEFAULT_MODELS_DIR, MODEL_PREFIX, ModelRegistry
+from result_cache import ResultCache
+
+
+def install(models_dir, source, name="model"):
+    """Copy models/best_model_<source>.joblib in as model `name`, with a new mtime."""
+    path = os.path.join(models_dir, f"{MODEL_PREFIX}{name}.joblib")
+    previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    shutil.copyfile(os.path.join(DEFAULT_MODELS_DIR, f"{MODEL_PREFIX}{source}.joblib"), path)
+    # a later mtime even on a coarse-grained filesystem clock
+    mtime = max(os.stat(path).st_mtime_ns, previous + 1_000_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    path = tmp_path / "models"
+    path.mkdir()
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def X(data_cleaned):
+    return data_cleaned.drop(columns=["Target"]).head(20)
+
+
+def test_replaced_model_file_invalidates_entries(models_dir, tmp_path, X, registry):
+    install(models_dir, "decision_tree")
+    disk_dir = str(tmp_path / "cache")
+    cache = ResultCache(ModelRegistry(models_dir), disk_dir=disk_dir)
+
+    first = cache.predict("model", X)
+    assert first["cached"] == 0
+    assert cache.predict("model", X)["cached"] == len(X)
+    old_versions = os.listdir(os.path.join(disk_dir, "model"))
+
+    install(models_dir, "svm")
+    replaced = cache.predict("model", X)
+    assert replaced["cached"] == 0
+    assert cache.stats()["invalidations"] == 1
+    expected = registry.get("svm")
+    assert_allclose(replaced["proba"], expected.predict_proba(X))
+    assert_array_equal(replaced["prediction"], np.ravel(expected.predict(X)))
+    # the old version's entries are gone from disk as well
+    versions = os.listdir(os.path.join(disk_dir, "model"))
+    assert len(versions) == 1 and versions[0] not in old_versions
+
+    assert cache.predict("model", X)["cached"] == len(X)
+
+
+def test_disk_entries_survive_a_restart(models_dir, tmp_path, X):
+    install(models_dir, "decision_tree")
+    disk_dir = str(tmp_path / "cache")
+    first = ResultCache(ModelRegistry(models_dir), disk_dir=disk_dir).predict("model", X)
+
+    restarted = ResultCache(ModelRegistry(models_dir), disk_dir=disk_dir)
+    again = restarted.predict("model", X)
+    assert again["cached"] == len(X)
+    assert restarted.stats()["disk_hits"] == len(X)
+    assert_allclose(again["proba"], first["proba"])
+
+    install(models_dir, "decision_tree")    # same content, new mtime: still a new version
+    assert ResultCache(ModelRegistry(models_dir), disk_dir=disk_dir).predict("model", X)["cached"] == 0
+
+
+def test_entries_do_not_keep_the_batch_alive(models_dir, X):
+    install(models_dir, "decision_tree")
+    cache = ResultCache(ModelRegistry(models_dir), max_entries=5)
+    cache.predict("model", X, with_shap=True)
+    assert cache.stats()["entries"] == 5
+    for entry in cache._entries.values():
+        assert entry[1].base is None
+        assert entry[2].base is None
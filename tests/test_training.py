@@ -0,0 +1,16 @@
+from sklearn.base import clone
+from sklearn.tree import DecisionTreeClassifier
+
+from training import FoldCache, build_pipeline, prepare_features
+
+
+def test_fold_cache_memory_tier_survives_clone(dataset, tmp_path):
+    X, y = prepare_features(dataset.head(600))
+    pipeline = build_pipeline(DecisionTreeClassifier(max_depth=3, random_state=42),
+                              memory=FoldCache(str(tmp_path)))
+    # the search fits clones, whose FoldCache is a copy: the second fit must come from memory,
+    # the very same fitted steps rather than a copy read back from disk
+    first = clone(pipeline).fit(X, y)
+    second = clone(pipeline).set_params(model__max_depth=4).fit(X, y)
+    assert second.named_steps["preprocessing"] is first.named_steps["preprocessing"]
+    assert second.named_steps["model"].max_depth == 4
@@ -0,0 +1,54 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import pandas as pd
+
+from training import get_estimators_and_grids, train_models
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Tune all models (HalvingGridSearchCV, SMOTE pipelines) and save the best ones.")
+    parser.add_argument("--models", nargs="*", default=None,
+                        help=f"models to tune, default: all of {list(get_estimators_and_grids()[0])}")
+    parser.add_argument("--cores", type=int, default=os.cpu_count(), help="global core budget")
+    parser.add_argument("--parallel-models", type=int, default=None,
+                        help="searches run at the same time, each gets cores // parallel-models jobs")
+    parser.add_argument("--cache-dir", default=os.path.join(ROOT_DIR, ".cache", "training"),
+                        help="joblib cache of fitted per-fold preprocessing + SMOTE")
+    parser.add_argument("--no-cache", action="store_true", help="refit preprocessing for every candidate")
+    parser.add_argument("--models-dir", default=os.path.join(ROOT_DIR, "models"))
+    parser.add_argument("--results", default=os.path.join(ROOT_DIR, "results", "model_comparison_results_SMOTE.csv"))
+    parser.add_argument("--timings", default=os.path.join(ROOT_DIR, "results", "training_wall_times.csv"))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    start = time.perf_counter()
+    results_df, wall_times = train_models(
+        names=args.models,
+        cores=args.cores,
+        parallel_models=args.parallel_models,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        models_dir=args.models_dir)
+    total = time.perf_counter() - start
+
+    print(results_df)
+    results_df.to_csv(args.results)
+
+    timings = pd.DataFrame({"wall_time_s": wall_times})
+    timings.loc["total"] = total
+    print(timings)
+    timings.to_csv(args.timings)
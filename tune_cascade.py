@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+from cascade import CascadePredictor, tune_thresholds
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from training import load_training_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Tune a cheap-first cascade (e.g. decision tree -> catboost) for a target macro F1.")
+    parser.add_argument("--stages", nargs="+", default=["decision_tree", "catboost"],
+                        help="model names, cheapest first")
+    parser.add_argument("--models-dir", default=DEFAULT_MODELS_DIR)
+    parser.add_argument("--target-f1", type=float, default=None,
+                        help="macro F1 to reach on the validation rows, default: last stage's F1 - 0.005")
+    parser.add_argument("--repeats", type=int, default=20, help="timed runs for the throughput comparison")
+    parser.add_argument("--output", default=os.path.join(DEFAULT_MODELS_DIR, "cascade.json"))
+    return parser.parse_args()
+
+
+def rows_per_s(predict_proba, X, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_proba(X)
+        times.append(time.perf_counter() - start)
+    return len(X) / np.median(times)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    registry = get_registry(args.models_dir)
+    missing = [n for n in args.stages if n not in registry.available()]
+    if missing:
+        sys.exit(f"Model file not found: {', '.join(registry.path(n) for n in missing)}")
+    stages = [registry.get(name) for name in args.stages]
+
+    # the saved models were fitted on the training split: tune on one half of the
+    # held-out test split and report on the other half
+    _, X_test, _, y_test = load_training_data()
+    X_val, X_eval, y_val, y_eval = train_test_split(X_test, y_test, test_size=0.5, random_state=42, stratify=y_test)
+
+    target = args.target_f1
+    if target is None:
+        target = f1_score(y_val, stages[-1].predict(X_val), average="macro") - 0.005
+    thresholds, info = tune_thresholds(stages, X_val, y_val, target)
+    print(f"validation: target F1 {target:.4f}, reached {info['f1']:.4f} (met: {info['target_met']}), "
+          f"thresholds {np.round(thresholds, 4).tolist()}")
+
+    cascade = CascadePredictor(stages, thresholds, names=args.stages)
+    cascade_f1 = f1_score(y_eval, cascade.predict(X_eval), average="macro")
+    escalated = cascade.escalation_rates()
+
+    # throughput on the full dataset-sized batch: cascade vs the last stage alone
+    X_bench = pd.concat([X_val, X_eval] * 2)
+    cascade_rps = rows_per_s(cascade.predict_proba, X_bench, args.repeats)
+    last_rps = rows_per_s(stages[-1].predict_proba, X_bench, args.repeats)
+
+    report = pd.DataFrame({
+        "macro_f1": [f1_score(y_eval, p.predict(X_eval), average="macro") for p in stages] + [cascade_f1],
+        "rows_per_s": [rows_per_s(p.predict_proba, X_bench, args.repeats) for p in stages[:-1]] + [last_rps, cascade_rps],
+    }, index=args.stages + ["cascade"])
+    with pd.option_context("display.float_format", "{:.4f}".format):
+        print(report)
+    for name, rate in escalated.items():
+        print(f"escalated to {name}: {rate:.1%}")
+    print(f"throughput gain vs {args.stages[-1]} alone: {cascade_rps / last_rps:.2f}x "
+          f"(shared preprocessing: {cascade.shared_preprocessing})")
+
+    with open(args.output, "w") as f:
+        json.dump(dict(cascade.to_config(), target_f1=target, validation_f1=info["f1"]), f, indent=2)
+    print(f"Saved cascade config to {args.output}")
@@ -5,10 +5,17 @@ import numpy as np
 
 
 class FeatTransformer(BaseEstimator, TransformerMixin):
-    def __init__(self, drop_originals: bool = True):
-        
+    def __init__(self, drop_originals: bool = True, copy: bool = True):
+
         self.drop_originals = drop_originals
-    
+        # copy=False adds the engineered columns to X in place (no full copy of the input)
+        self.copy = copy
+
+    # pipelines saved before `copy` existed are unpickled without it
+    def __setstate__(self, state):
+        state.setdefault("copy", True)
+        super().__setstate__(state)
+
     # questa funzione fa sì che sklearn NON converta in ndarray
     def _more_tags(self):
         return {"preserves_dataframe": True}
@@ -17,61 +24,85 @@ class FeatTransformer(BaseEstimator, TransformerMixin):
         return self
 
 
+    @staticmethod
+    def _numeric(X, col):
+        values = X[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        return values.to_numpy()
+
+    # Qualification code as used by the background score: non-negative integers
+    # (or digit-only strings) count with their value, anything else counts as 0
+    @staticmethod
+    def _qualification_code(values):
+        if pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            codes = values.to_numpy()
+            return np.where(codes >= 0, codes, 0).astype(np.int64)
+
+        as_str = values.astype(str)
+        is_digit = as_str.str.isdigit().fillna(False).to_numpy(dtype=bool)
+        codes = np.zeros(len(values), dtype=np.int64)
+        if is_digit.any():
+            codes[is_digit] = as_str[is_digit].astype(np.int64).to_numpy()
+        return codes
+
+
     def transform(self, X, y=None):
-        X = X.copy()
+        approved_1st = self._numeric(X, "Curricular_units_1st_sem_approved")
+        approved_2nd = self._numeric(X, "Curricular_units_2nd_sem_approved")
+        enrolled_1st = self._numeric(X, "Curricular_units_1st_sem_enrolled")
+        enrolled_2nd = self._numeric(X, "Curricular_units_2nd_sem_enrolled")
+        grade_1st = self._numeric(X, "Curricular_units_1st_sem_grade")
+        grade_2nd = self._numeric(X, "Curricular_units_2nd_sem_grade")
+
+        features = {}
 
         # Average grade across semesters
-        X["weighted_avg_grade"] = np.where(
-            (X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_approved"]) > 0,
-            (X["Curricular_units_1st_sem_grade"] * X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_grade"] * X["Curricular_units_2nd_sem_approved"]) /
-            (X["Curricular_units_1st_sem_approved"] + X["Curricular_units_2nd_sem_approved"]),
-            0.0 
+        approved_total = approved_1st + approved_2nd
+        features["weighted_avg_grade"] = np.divide(
+            grade_1st * approved_1st + grade_2nd * approved_2nd,
+            approved_total,
+            out=np.zeros(len(X), dtype=np.float64),
+            where=approved_total > 0
         )
 
         # Pass rate per semester (avoid division by zero)
-        X["pass_rate_1st"] = np.where(
-            X["Curricular_units_1st_sem_enrolled"] > 0,
-            X["Curricular_units_1st_sem_approved"]
-            / X["Curricular_units_1st_sem_enrolled"],
-            0.0
-        )
-        
-        X["pass_rate_2nd"] = np.where(
-            X["Curricular_units_2nd_sem_enrolled"] > 0,
-            X["Curricular_units_2nd_sem_approved"]
-            / X["Curricular_units_2nd_sem_enrolled"],
-            0.0
+        features["pass_rate_1st"] = np.divide(
+            approved_1st, enrolled_1st,
+            out=np.zeros(len(X), dtype=np.float64),
+            where=enrolled_1st > 0
         )
 
-        X["approved_delta"] = (
-            X["Curricular_units_2nd_sem_approved"]
-            - X["Curricular_units_1st_sem_approved"]
+        features["pass_rate_2nd"] = np.divide(
+            approved_2nd, enrolled_2nd,
+            out=np.zeros(len(X), dtype=np.float64),
+            where=enrolled_2nd > 0
         )
 
-        X["total_enrolled"] = (
-            X["Curricular_units_1st_sem_enrolled"]
-            + X["Curricular_units_2nd_sem_enrolled"]
-        )
-        
-        # Age bins
-        X['age_bin'] = pd.cut(X['Age'], bins=[0, 20, 25, 100], labels=['young', 'medium', 'adult'])
+        features["approved_delta"] = approved_2nd - approved_1st
 
-        # Parental background score 
-        def background_score(row):
-            score = 0
-            if str(row['Mother_qualification']).isdigit():
-                score += int(row['Mother_qualification'])
-            if str(row['Father_qualification']).isdigit():
-                score += int(row['Father_qualification'])
-            return score
+        features["total_enrolled"] = enrolled_1st + enrolled_2nd
+
+        # Age bins
+        features["age_bin"] = pd.cut(X["Age"], bins=[0, 20, 25, 100], labels=["young", "medium", "adult"])
 
-        X['parent_background_score'] = X.apply(background_score, axis=1)
+        # Parental background score
+        features["parent_background_score"] = (
+            self._qualification_code(X["Mother_qualification"])
+            + self._qualification_code(X["Father_qualification"])
+        )
 
         # Drop original columns now represented by engineered feature
-        X.drop(columns=[
-            'Mother_qualification',
-            'Father_qualification'
-        ], inplace=True)
+        originals = ["Mother_qualification", "Father_qualification"]
+
+        if not self.copy:
+            X.drop(columns=originals, inplace=True)
+            for name, values in features.items():
+                X[name] = values
+            return X
+
+        return pd.concat(
+            [X.drop(columns=originals), pd.DataFrame(features, index=X.index)],
+            axis=1
+        )
 
-        return X
-    
@@ -0,0 +1,74 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_loader import iter_dataset_chunks
+from inference import predict_with_proba
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from schema import label_mapping
+
+
+# Predictions and class probabilities for one chunk, indexed like the input rows
+def score_frame(pipeline, df):
+    prediction, proba = predict_with_proba(pipeline, df)
+    labels = [label_mapping.get(c, str(c)) for c in pipeline.classes_]
+
+    out = pd.DataFrame(proba, index=df.index, columns=[f"proba_{label}" for label in labels])
+    out.insert(0, "prediction", [label_mapping.get(p, str(p)) for p in prediction])
+    out.index.name = "row"
+    return out
+
+
+# --- worker process state: each worker loads the pipeline once through its own registry ---
+_worker_pipeline = None
+
+def _init_worker(model_name, models_dir):
+    global _worker_pipeline
+    _worker_pipeline = get_registry(models_dir).get(model_name)
+
+def _score_in_worker(chunk):
+    return score_frame(_worker_pipeline, chunk)
+
+
+def score_csv(input_path, output_path, model_name, models_dir=DEFAULT_MODELS_DIR, chunksize=10_000, workers=1,
+              cache_dir=None, monitor=None):
+    """Stream input_path through the pipeline in chunks and append results to output_path.
+
+    At most 2 * workers chunks are held in memory at any time; results are
+    written in input order. With cache_dir the input is read once through the
+    typed dataset cache instead (whole file in memory, no CSV parsing on
+    later runs). With a drift.DriftMonitor, every chunk is also added to it
+    (in this process, while the workers score). Returns the number of scored rows.
+    """
+    n_rows = 0
+    header = True
+
+    def write(result):
+        nonlocal n_rows, header
+        result.to_csv(output_path, mode="w" if header else "a", header=header)
+        header = False
+        n_rows += len(result)
+
+    chunks = iter_dataset_chunks(input_path, chunksize=chunksize, cache_dir=cache_dir)
+
+    if workers <= 1:
+        pipeline = get_registry(models_dir).get(model_name)
+        for chunk in chunks:
+            if monitor is not None:
+                monitor.update(chunk)
+            write(score_frame(pipeline, chunk))
+        return n_rows
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_name, models_dir)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_in_worker, chunk))
+            if monitor is not None:
+                monitor.update(chunk)
+            if len(pending) >= 2 * workers:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    return n_rows
@@ -0,0 +1,143 @@
+import itertools
+import json
+import time
+
+import numpy as np
+from sklearn.metrics import f1_score
+
+from inference import preprocessing_key, transform_for_model
+from model_registry import get_registry
+
+
+def margin(proba):
+    """Gap between the two most likely classes of each row: small = uncertain."""
+    top2 = np.partition(proba, -2, axis=1)[:, -2:]
+    return top2[:, 1] - top2[:, 0]
+
+
+class CascadePredictor:
+    """Scores every row with the first (cheap) pipeline and escalates uncertain rows.
+
+    Rows whose predict_proba margin at stage i is below thresholds[i] are
+    rescored by stage i + 1; the last stage scores whatever reaches it.
+    When all stages share the same fitted feature_transformer/preprocessing
+    (true for the saved best models), the rows are transformed once and only
+    the models run per stage.
+    """
+
+    def __init__(self, stages, thresholds, names=None):
+        if len(thresholds) != len(stages) - 1:
+            raise ValueError(f"Need {len(stages) - 1} thresholds for {len(stages)} stages, got {len(thresholds)}")
+        classes = [list(p.classes_) for p in stages]
+        if any(c != classes[0] for c in classes):
+            raise ValueError(f"Stages predict different classes: {classes}")
+
+        self.stages = list(stages)
+        self.thresholds = list(thresholds)
+        self.names = list(names) if names is not None else [f"stage_{i}" for i in range(len(stages))]
+        self.classes_ = np.asarray(stages[0].classes_)
+        self.shared_preprocessing = len({preprocessing_key(p) for p in stages}) == 1
+        self.rows_scored = np.zeros(len(stages), dtype=np.int64)
+
+    def predict_proba(self, X):
+        if self.shared_preprocessing:
+            X_in = transform_for_model(self.stages[0], X)
+            score = lambda i, rows: self.stages[i].steps[-1][1].predict_proba(X_in[rows])
+        else:
+            score = lambda i, rows: self.stages[i].predict_proba(X.iloc[rows])
+
+        rows = np.arange(len(X))
+        proba = None
+        for i in range(len(self.stages)):
+            stage_proba = score(i, rows)
+            self.rows_scored[i] += len(rows)
+            if proba is None:
+                proba = stage_proba
+            else:
+                proba[rows] = stage_proba
+            if i == len(self.stages) - 1:
+                break
+            rows = rows[margin(stage_proba) < self.thresholds[i]]
+            if not len(rows):
+                break
+        return proba
+
+    def predict(self, X):
+        # argmax of the combined probabilities (for SVC this can differ from its own predict)
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def escalation_rates(self):
+        """Share of scored rows that reached each stage after the first."""
+        total = self.rows_scored[0]
+        return {name: (self.rows_scored[i] / total if total else 0.0) for i, name in enumerate(self.names) if i}
+
+    def to_config(self):
+        return {"stages": self.names, "thresholds": [float(t) for t in self.thresholds]}
+
+
+def load_cascade(path, registry=None):
+    """Cascade from a JSON config ({"stages": [model names], "thresholds": [...]}) and the model registry."""
+    with open(path) as f:
+        config = json.load(f)
+    registry = registry or get_registry()
+    return CascadePredictor([registry.get(name) for name in config["stages"]], config["thresholds"],
+                            names=config["stages"])
+
+
+def _per_row_ms(pipeline, X_in):
+    start = time.perf_counter()
+    pipeline.steps[-1][1].predict_proba(X_in)
+    return (time.perf_counter() - start) * 1000 / max(X_in.shape[0], 1)
+
+
+def tune_thresholds(stages, X_val, y_val, target_f1, n_candidates=41):
+    """Thresholds that reach target_f1 (macro) on the validation rows at the lowest model cost.
+
+    Every stage scores all validation rows once; each threshold combination is
+    then evaluated on the cached probabilities. The cost of a combination is
+    the measured per-row predict_proba time of each model times the share of
+    rows reaching it. If no combination reaches the target, the one with the
+    best F1 is returned. Returns (thresholds, info).
+    """
+    # each stage scores its own preprocessing's output (a refit stage no longer shares it),
+    # transformed once per distinct preprocessing
+    transformed = {}
+    X_in = []
+    for pipeline in stages:
+        key = preprocessing_key(pipeline)
+        if key not in transformed:
+            transformed[key] = transform_for_model(pipeline, X_val)
+        X_in.append(transformed[key])
+    probas = [p.steps[-1][1].predict_proba(X) for p, X in zip(stages, X_in)]
+    margins = [margin(p) for p in probas]
+    costs = np.array([_per_row_ms(p, X) for p, X in zip(stages, X_in)])
+    y_val = np.asarray(y_val)
+    classes = np.asarray(stages[0].classes_)
+
+    # candidate thresholds: quantiles of each stage's margins, plus "never" (0) and "always" (> 1)
+    candidates = [np.unique(np.concatenate([[0.0], np.quantile(m, np.linspace(0, 1, n_candidates)), [1.01]]))
+                  for m in margins[:-1]]
+
+    best, best_any = None, None
+    for thresholds in itertools.product(*candidates):
+        reach = np.ones(len(y_val), dtype=bool)
+        final = probas[0].copy()
+        shares = [1.0]
+        for i, t in enumerate(thresholds):
+            reach &= margins[i] < t
+            final[reach] = probas[i + 1][reach]
+            shares.append(reach.mean())
+        f1 = f1_score(y_val, classes[np.argmax(final, axis=1)], average="macro")
+        cost = float(np.dot(shares, costs))
+        entry = {"thresholds": list(thresholds), "f1": f1, "cost_ms_per_row": cost, "shares": shares}
+
+        if best_any is None or f1 > best_any["f1"]:
+            best_any = entry
+        if f1 >= target_f1 and (best is None or cost < best["cost_ms_per_row"]):
+            best = entry
+
+    chosen = best or best_any
+    info = dict(chosen, target_f1=target_f1, target_met=best is not None,
+                stage_f1=[f1_score(y_val, classes[np.argmax(p, axis=1)], average="macro") for p in probas],
+                stage_cost_ms_per_row=costs.tolist())
+    return [float(t) for t in chosen["thresholds"]], info
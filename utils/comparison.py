@@ -0,0 +1,170 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from inference import preprocessing_key, transform_for_model
+
+
+# --- predict once ---
+def predict_all(pipelines, X):
+    """{name: predictions on X}, one predict per model; shared preprocessing is run once."""
+    transformed = {}
+    predictions = {}
+    for name, pipeline in pipelines.items():
+        key = preprocessing_key(pipeline)
+        if key not in transformed:
+            transformed[key] = transform_for_model(pipeline, X)
+        predictions[name] = np.ravel(pipeline.steps[-1][1].predict(transformed[key]))
+    return predictions
+
+
+def encode_labels(y, predictions):
+    """Class codes 0..K-1 for y and every prediction array, plus the class list."""
+    classes = np.unique(np.concatenate([np.asarray(y)] + [np.asarray(p) for p in predictions.values()]))
+    y_codes = np.searchsorted(classes, np.asarray(y))
+    pred_codes = np.stack([np.searchsorted(classes, np.asarray(p)) for p in predictions.values()])
+    return y_codes, pred_codes, classes
+
+
+# --- vectorized macro F1 over many row subsets ---
+def macro_f1_many(y_codes, pred_codes, rows, n_classes):
+    """Macro F1 of every model on every row subset.
+
+    y_codes (n,), pred_codes (n_models, n); rows is an (n_subsets, size) index
+    array or a list of index arrays of different sizes. One bincount builds
+    all confusion matrices; classes absent from both y and the predictions of
+    a subset are left out of its average, as in sklearn. Returns (n_models, n_subsets).
+    """
+    if isinstance(rows, np.ndarray) and rows.ndim == 2:
+        subset = np.repeat(np.arange(len(rows)), rows.shape[1])
+        flat = rows.ravel()
+    else:
+        subset = np.concatenate([np.full(len(r), i) for i, r in enumerate(rows)])
+        flat = np.concatenate(rows)
+    n_subsets = len(rows)
+    K = n_classes
+
+    cell = subset * K * K + y_codes[flat] * K                       # (n_selected,)
+    scores = np.empty((len(pred_codes), n_subsets))
+    for m, pred in enumerate(pred_codes):
+        confusion = np.bincount(cell + pred[flat], minlength=n_subsets * K * K).reshape(n_subsets, K, K)
+        tp = np.diagonal(confusion, axis1=1, axis2=2)
+        support, predicted = confusion.sum(axis=2), confusion.sum(axis=1)
+        denom = support + predicted
+        f1 = np.divide(2 * tp, denom, out=np.zeros(tp.shape), where=denom > 0)
+        present = denom > 0
+        scores[m] = f1.sum(axis=1) / np.maximum(present.sum(axis=1), 1)
+    return scores
+
+
+def fold_rows(y, n_splits=10, n_repeats=3, random_state=42):
+    """Test indices of each RepeatedStratifiedKFold split, as in the notebook comparison."""
+    cv = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+    return [test for _, test in cv.split(np.zeros(len(y)), y)]
+
+
+# --- bootstrap on a process pool ---
+_worker_data = None
+
+def _init_worker(y_codes, pred_codes, n_classes):
+    global _worker_data
+    _worker_data = (y_codes, pred_codes, n_classes)
+
+def _bootstrap_chunk(seed, n_boot):
+    y_codes, pred_codes, n_classes = _worker_data
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(y_codes), size=(n_boot, len(y_codes)))
+    return macro_f1_many(y_codes, pred_codes, rows, n_classes)
+
+
+def bootstrap_scores(y_codes, pred_codes, n_classes, n_boot=2000, workers=None, chunk=250, random_state=42):
+    """(n_models, n_boot) macro F1 on bootstrap resamples; every model sees the same resamples (paired).
+
+    Chunks of `chunk` resamples run on `workers` processes, each seeded from
+    one SeedSequence, so the result does not depend on the number of workers.
+    """
+    sizes = [min(chunk, n_boot - start) for start in range(0, n_boot, chunk)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    workers = workers or os.cpu_count() or 1
+
+    if workers <= 1:
+        _init_worker(y_codes, pred_codes, n_classes)
+        return np.concatenate([_bootstrap_chunk(seed, size) for seed, size in zip(seeds, sizes)], axis=1)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(sizes)), initializer=_init_worker,
+                             initargs=(y_codes, pred_codes, n_classes)) as pool:
+        return np.concatenate(list(pool.map(_bootstrap_chunk, seeds, sizes)), axis=1)
+
+
+# --- statistics ---
+def _holm(p_values):
+    p = np.asarray(p_values, dtype=float)
+    order = np.argsort(np.where(np.isnan(p), np.inf, p))
+    adjusted = np.full_like(p, np.nan)
+    running = 0.0
+    valid = order[~np.isnan(p[order])]
+    for rank, i in enumerate(valid):
+        running = max(running, min(1.0, (len(valid) - rank) * p[i]))
+        adjusted[i] = running
+    return adjusted
+
+
+def _safe_test(test, diff):
+    # Shapiro needs 3+ values with some spread, Wilcoxon at least one non-zero difference
+    try:
+        return float(test(diff).pvalue)
+    except ValueError:
+        return np.nan
+
+
+def compare_models(pipelines, X, y, n_splits=10, n_repeats=3, n_boot=2000, alpha=0.05, workers=None,
+                   random_state=42):
+    """Per-model scores and all pairwise comparisons from one predict per model.
+
+    Returns (summary, pairs): summary has the mean/std macro F1 over the
+    repeated folds and the bootstrap percentile CI per model; pairs has, for
+    every pair (a, b), the mean fold difference a - b, Shapiro-Wilk and
+    Wilcoxon p-values on the fold differences (Wilcoxon Holm-adjusted over
+    all pairs) and the paired bootstrap CI of the difference.
+    """
+    predictions = predict_all(pipelines, X)
+    names = list(predictions)
+    y_codes, pred_codes, classes = encode_labels(y, predictions)
+
+    folds = macro_f1_many(y_codes, pred_codes, fold_rows(y, n_splits, n_repeats, random_state), len(classes))
+    boot = bootstrap_scores(y_codes, pred_codes, len(classes), n_boot=n_boot, workers=workers,
+                            random_state=random_state)
+    full = macro_f1_many(y_codes, pred_codes, np.arange(len(y_codes))[np.newaxis], len(classes))[:, 0]
+    low, high = 100 * alpha / 2, 100 * (1 - alpha / 2)
+
+    summary = pd.DataFrame({
+        "f1_macro": full,
+        "fold_mean": folds.mean(axis=1),
+        "fold_std": folds.std(axis=1, ddof=1),
+        "ci_low": np.percentile(boot, low, axis=1),
+        "ci_high": np.percentile(boot, high, axis=1),
+    }, index=pd.Index(names, name="model")).sort_values("f1_macro", ascending=False)
+
+    rows = []
+    for a, b in itertools.combinations(range(len(names)), 2):
+        diff = folds[a] - folds[b]
+        boot_diff = boot[a] - boot[b]
+        ci = np.percentile(boot_diff, [low, high])
+        rows.append({
+            "model_a": names[a], "model_b": names[b],
+            "mean_diff": diff.mean(),
+            "shapiro_p": _safe_test(stats.shapiro, diff),
+            "wilcoxon_p": _safe_test(stats.wilcoxon, diff),
+            "boot_diff_low": ci[0], "boot_diff_high": ci[1],
+            "boot_p_a_better": float((boot_diff > 0).mean()),
+        })
+    pairs = pd.DataFrame(rows)
+    if len(pairs):
+        pairs["wilcoxon_p_holm"] = _holm(pairs["wilcoxon_p"])
+        pairs["significant"] = (pairs["wilcoxon_p_holm"] < alpha) & ((pairs["boot_diff_low"] > 0) | (pairs["boot_diff_high"] < 0))
+    return summary, pairs
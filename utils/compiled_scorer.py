@@ -0,0 +1,229 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+from FeatTransformer import FeatTransformer
+from inference import transform_for_model
+
+
+# Raw columns FeatTransformer reads to build the engineered features
+ENGINEERED_INPUTS = [
+    "Curricular_units_1st_sem_approved", "Curricular_units_2nd_sem_approved",
+    "Curricular_units_1st_sem_enrolled", "Curricular_units_2nd_sem_enrolled",
+    "Curricular_units_1st_sem_grade", "Curricular_units_2nd_sem_grade",
+    "Age", "Mother_qualification", "Father_qualification"
+]
+
+# Raw columns only read as FeatTransformer's qualification codes (parent_background_score)
+QUALIFICATION_COLUMNS = ("Mother_qualification", "Father_qualification")
+
+AGE_BINS = np.array([0, 20, 25, 100])
+AGE_LABELS = np.array(["young", "medium", "adult"], dtype=object)
+
+
+class CompiledScorer:
+    """NumPy-only replacement for the feature_transformer + preprocessing steps.
+
+    Built by compile_pipeline() from a fitted pipeline: the FeatTransformer
+    arithmetic, the StandardScaler means/scales and the OneHotEncoder
+    category -> column maps are precomputed into arrays, so scoring a row
+    only needs a float array in `input_columns` order and the fitted model.
+    """
+
+    def __init__(self, input_columns, num_sources, mean, scale, bin_sources,
+                 onehot, n_features, slices, model, sparse_output=False):
+        self.input_columns = input_columns
+        self.num_sources = num_sources        # per scaled column: input column name or engineered feature
+        self.mean = mean
+        self.scale = scale
+        self.bin_sources = bin_sources
+        self.onehot = onehot                  # [(source, sorted categories, output column per category or -1)]
+        self.n_features = n_features
+        self.slices = slices                  # output slices of num / bin / oh blocks
+        self.model = model
+        # the fitted ColumnTransformer emits CSR; models such as XGBoost treat absent entries as missing
+        self.sparse_output = sparse_output
+        self._position = {c: i for i, c in enumerate(input_columns)}
+        self._value_columns = [c for c in input_columns if c not in QUALIFICATION_COLUMNS]
+        self._value_positions = [self._position[c] for c in self._value_columns]
+        self._lookups = {source: {c: i for i, c in enumerate(categories)}
+                         for source, categories, _ in onehot if categories.dtype == object}
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def _column(self, X, name):
+        return X[:, self._position[name]]
+
+    # Same arithmetic as FeatTransformer.transform, on float columns
+    def _engineered(self, X):
+        col = lambda name: self._column(X, name)
+        n = len(X)
+        approved_1st, approved_2nd = col("Curricular_units_1st_sem_approved"), col("Curricular_units_2nd_sem_approved")
+        enrolled_1st, enrolled_2nd = col("Curricular_units_1st_sem_enrolled"), col("Curricular_units_2nd_sem_enrolled")
+        grade_1st, grade_2nd = col("Curricular_units_1st_sem_grade"), col("Curricular_units_2nd_sem_grade")
+
+        approved_total = approved_1st + approved_2nd
+        features = {
+            "weighted_avg_grade": np.divide(grade_1st * approved_1st + grade_2nd * approved_2nd, approved_total,
+                                            out=np.zeros(n), where=approved_total > 0),
+            "pass_rate_1st": np.divide(approved_1st, enrolled_1st, out=np.zeros(n), where=enrolled_1st > 0),
+            "pass_rate_2nd": np.divide(approved_2nd, enrolled_2nd, out=np.zeros(n), where=enrolled_2nd > 0),
+            "approved_delta": approved_2nd - approved_1st,
+            "total_enrolled": enrolled_1st + enrolled_2nd,
+        }
+
+        # pd.cut(bins=[0, 20, 25, 100]): right-closed bins, out of range -> NaN (unknown category)
+        age = col("Age")
+        bin_idx = np.searchsorted(AGE_BINS, age, side="left") - 1
+        in_range = (age > AGE_BINS[0]) & (age <= AGE_BINS[-1])
+        features["age_bin"] = np.where(in_range, AGE_LABELS[np.clip(bin_idx, 0, len(AGE_LABELS) - 1)], None)
+
+        # the qualification columns already hold the codes as_array took from FeatTransformer
+        features["parent_background_score"] = col("Mother_qualification") + col("Father_qualification")
+        return features
+
+    def _source(self, X, engineered, name):
+        return engineered[name] if name in engineered else self._column(X, name)
+
+    def transform(self, X):
+        X = self.as_array(X)
+        engineered = self._engineered(X)
+        out = np.zeros((len(X), self.n_features))
+
+        num = np.column_stack([self._source(X, engineered, s) for s in self.num_sources])
+        out[:, self.slices["num"]] = (num - self.mean) / self.scale
+
+        if self.bin_sources:
+            out[:, self.slices["bin"]] = np.column_stack([self._source(X, engineered, s) for s in self.bin_sources])
+
+        rows = np.arange(len(X))
+        for source, categories, columns in self.onehot:
+            values = self._source(X, engineered, source)
+            if source in self._lookups:
+                lookup = self._lookups[source]
+                idx = np.array([lookup.get(v, -1) for v in values], dtype=np.intp)
+            else:
+                idx = np.searchsorted(categories, values)
+                idx[(idx >= len(categories)) | (categories[np.minimum(idx, len(categories) - 1)] != values)] = -1
+            target = np.where(idx >= 0, columns[idx], -1)
+            hit = target >= 0
+            out[rows[hit], target[hit]] = 1.0
+        return out
+
+    # Accepts a 2-D array in input_columns order, a DataFrame, or a list of dict records.
+    # Qualification columns become FeatTransformer's codes, with its dtype rules (a float
+    # column counts 0, as "3.0" is not a digit string); a 2-D array already holds the codes.
+    def as_array(self, X):
+        if isinstance(X, np.ndarray):
+            return np.atleast_2d(X).astype(np.float64, copy=False)
+        out = np.empty((len(X), len(self.input_columns)))
+        if isinstance(X, list):
+            out[:, self._value_positions] = [[float(r[c]) for c in self._value_columns] for r in X]
+            column = lambda c: pd.Series([r[c] for r in X])     # as pd.DataFrame(records) would hold it
+        else:
+            out[:, self._value_positions] = X[self._value_columns].to_numpy(dtype=np.float64)
+            column = lambda c: X[c]
+        for c in QUALIFICATION_COLUMNS:
+            out[:, self._position[c]] = FeatTransformer._qualification_code(column(c))
+        return out
+
+    # what transform_for_model gives the model, dense or CSR as the fitted ColumnTransformer
+    def model_input(self, X):
+        X_proc = self.transform(X)
+        return sparse.csr_matrix(X_proc) if self.sparse_output else X_proc
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(self.model_input(X))
+
+    def predict(self, X):
+        return np.ravel(self.model.predict(self.model_input(X)))
+
+
+def compile_pipeline(pipeline):
+    steps = dict(pipeline.steps)
+    preprocessor = steps["preprocessing"]
+    model = pipeline.steps[-1][1]
+    if not isinstance(steps.get("feature_transformer"), FeatTransformer):
+        raise ValueError("Only pipelines with a FeatTransformer step can be compiled")
+
+    engineered = {"weighted_avg_grade", "pass_rate_1st", "pass_rate_2nd", "approved_delta",
+                  "total_enrolled", "age_bin", "parent_background_score"}
+    input_columns = list(ENGINEERED_INPUTS)
+
+    num_sources, mean, scale, bin_sources, onehot = [], None, None, [], []
+    slices = {}
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder":
+            continue
+        input_columns += [c for c in columns if c not in engineered and c not in input_columns]
+        out = preprocessor.output_indices_[name]
+
+        if isinstance(transformer, StandardScaler) and "num" not in slices:
+            num_sources = list(columns)
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+            scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+            slices["num"] = out
+        elif (transformer == "passthrough" or (isinstance(transformer, FunctionTransformer) and transformer.func is None)) \
+                and "bin" not in slices:
+            bin_sources = list(columns)
+            slices["bin"] = out
+        elif isinstance(transformer, OneHotEncoder) and "oh" not in slices:
+            # output column of every category, -1 for the dropped one
+            start = out.start
+            drop_idx = transformer.drop_idx_ if transformer.drop_idx_ is not None else [None] * len(columns)
+            for source, categories, drop in zip(columns, transformer.categories_, drop_idx):
+                keep = np.ones(len(categories), dtype=bool)
+                if drop is not None:
+                    keep[drop] = False
+                positions = np.full(len(categories), -1)
+                positions[keep] = start + np.arange(keep.sum())
+                start += keep.sum()
+                onehot.append((source, categories, positions))
+            slices["oh"] = out
+        else:
+            raise ValueError(f"Cannot compile preprocessing step {name!r} ({type(transformer).__name__})")
+
+    n_features = max(s.stop for s in preprocessor.output_indices_.values())
+    return CompiledScorer(input_columns, num_sources, mean, scale, bin_sources, onehot,
+                          n_features, slices, model, sparse_output=preprocessor.sparse_output_)
+
+
+# --- compiled scorers of the most recently used pipelines ---
+# Like explain.get_explainer: evicted by count, each entry keeps its pipeline so the id() stays its own.
+COMPILED_CACHE_SIZE = 8
+
+_compiled = OrderedDict()    # id(pipeline) -> (pipeline, scorer or None when it does not compile)
+_compiled_lock = threading.Lock()
+
+def get_compiled(pipeline):
+    key = id(pipeline)
+    with _compiled_lock:
+        entry = _compiled.get(key)
+        if entry is not None:
+            _compiled.move_to_end(key)
+            return entry[1]
+    try:
+        scorer = compile_pipeline(pipeline)
+    except ValueError:
+        scorer = None
+    with _compiled_lock:
+        _, scorer = _compiled.setdefault(key, (pipeline, scorer))
+        _compiled.move_to_end(key)
+        while len(_compiled) > COMPILED_CACHE_SIZE:
+            _compiled.popitem(last=False)
+        return scorer
+
+
+# The model input for the rows of X (a DataFrame): with compiled=True through the pipeline's
+# compiled scorer, when it compiles, instead of the pandas feature_transformer/preprocessing steps
+def model_input(pipeline, X, compiled=True):
+    scorer = get_compiled(pipeline) if compiled else None
+    if scorer is None:
+        return transform_for_model(pipeline, X)
+    return scorer.model_input(X)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Column renames applied by the EDA notebook when cleaning data/data.csv
+RAW_COLUMN_RENAMES = {
+    "Nacionality": "Nationality",
+    "Mother's qualification": "Mother_qualification",
+    "Father's qualification": "Father_qualification",
+    "Mother's occupation": "Mother_occupation",
+    "Father's occupation": "Father_occupation",
+    "Daytime/evening attendance": "Daytime/evening_attendance",
+    "Age at enrollment": "Age"
+}
+
+
+def clean_column_names(columns):
+    # raw headers carry stray whitespace (e.g. "Daytime/evening attendance\t")
+    columns = [RAW_COLUMN_RENAMES.get(c.strip(), c.strip()) for c in columns]
+    return [c.replace(" ", "_").replace("(", "").replace(")", "") for c in columns]
+
+
+def detect_separator(path):
+    # data.csv is semicolon-delimited, data_cleaned.csv is comma-delimited
+    with open(path, encoding="utf-8-sig") as f:
+        header = f.readline()
+    return ";" if header.count(";") > header.count(",") else ","
+
+
+def iter_csv_chunks(path, chunksize=10_000):
+    sep = detect_separator(path)
+    reader = pd.read_csv(path, sep=sep, chunksize=chunksize, encoding="utf-8-sig")
+    for chunk in reader:
+        chunk.columns = clean_column_names(chunk.columns)
+        yield chunk
+
+
+# --- typed dataset loader with a binary cache ---
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_CLEANED_PATH = os.path.join(ROOT_DIR, "data", "data_cleaned.csv")
+DEFAULT_CACHE_DIR = os.path.join(ROOT_DIR, ".cache", "datasets")
+CACHE_VERSION = 1
+
+# Codes that are labels rather than quantities (main.ipynb casts these to category)
+CATEGORY_COLUMNS = ["Marital_status", "Application_mode", "Course", "Previous_qualification",
+                    "Mother_qualification", "Father_qualification", "Mother_occupation",
+                    "Father_occupation", "Target"]
+
+
+def apply_schema(df, float_dtype=np.float64):
+    """Clean column names, cast label codes to category and narrow the numeric columns.
+
+    Integer columns get the smallest integer type that holds their values, so
+    results are unchanged. Float columns stay float64 unless float_dtype says
+    otherwise: float32 halves their memory but can move predictions of models
+    trained on float64 inputs (e.g. XGBoost, 4 of 4424 rows on data_cleaned).
+    """
+    df = df.copy()
+    df.columns = clean_column_names(df.columns)
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(float_dtype)
+    return df
+
+
+def file_hash(path, chunk_bytes=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(path, cache_dir, float_dtype):
+    # files with the same name in different directories get their own cache
+    stem = os.path.splitext(os.path.basename(path))[0]
+    source = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}-{source}-{np.dtype(float_dtype).name}")
+
+
+def _read_cache(cache_path, source, mmap):
+    meta_path = os.path.join(cache_path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get("version") != CACHE_VERSION or meta.get("source") != os.path.abspath(source):
+        return None
+
+    # mtime/size first; the source is only re-hashed when they changed
+    stat = os.stat(source)
+    if (stat.st_mtime_ns, stat.st_size) != (meta["mtime_ns"], meta["size"]) and file_hash(source) != meta["sha256"]:
+        return None
+
+    columns = {}
+    for i, col in enumerate(meta["columns"]):
+        values = np.load(os.path.join(cache_path, f"{i}.npy"), mmap_mode="r" if mmap else None)
+        categories = meta["categories"].get(col)
+        if categories is not None:
+            values = pd.Categorical.from_codes(values, categories=categories)
+        columns[col] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def _write_cache(df, cache_path, source):
+    os.makedirs(cache_path, exist_ok=True)
+    categories = {}
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories[col] = values.cat.categories.tolist()
+            values = values.cat.codes
+        np.save(os.path.join(cache_path, f"{i}.npy"), values.to_numpy())
+
+    stat = os.stat(source)
+    meta = {"version": CACHE_VERSION, "source": os.path.abspath(source), "sha256": file_hash(source),
+            "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "columns": list(df.columns), "categories": categories}
+    # meta.json last: a cache without it is ignored
+    with open(os.path.join(cache_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+
+def load_dataset(path=DATA_CLEANED_PATH, cache_dir=DEFAULT_CACHE_DIR, float_dtype=np.float64, mmap=False):
+    """Typed DataFrame of data.csv or data_cleaned.csv, parsed once and then read from a .npy cache.
+
+    The cache (one .npy per column, category codes + labels in meta.json) is
+    rebuilt when the source file's content hash changes. cache_dir=None
+    always parses the CSV. mmap=True maps the cached columns read-only.
+    """
+    cache_path = _cache_path(path, cache_dir, float_dtype) if cache_dir else None
+    if cache_path:
+        df = _read_cache(cache_path, path, mmap)
+        if df is not None:
+            return df
+
+    df = apply_schema(pd.read_csv(path, sep=detect_separator(path), encoding="utf-8-sig"), float_dtype)
+    if cache_path:
+        _write_cache(df, cache_path, path)
+    return df
+
+
+def iter_dataset_chunks(path, chunksize=10_000, cache_dir=None):
+    """Chunks of path: streamed from the CSV, or sliced from the typed cached dataset when cache_dir is set."""
+    if cache_dir is None:
+        yield from iter_csv_chunks(path, chunksize=chunksize)
+        return
+    df = load_dataset(path, cache_dir=cache_dir)
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
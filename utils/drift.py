@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_CLEANED_PATH, ROOT_DIR, load_dataset
+from preprocessing import cat_cols
+from schema import categorical_features, numerical_features
+
+
+DEFAULT_REFERENCE_PATH = os.path.join(ROOT_DIR, "models", "drift_reference.json")
+
+CATEGORICAL = list(categorical_features)
+NUMERIC = list(numerical_features)
+# Categorical inputs one-hot encoded with handle_unknown="ignore": an unseen code becomes all zeros
+ONE_HOT = [c for c in CATEGORICAL if c in cat_cols]
+
+# Quantile bins per numeric feature in the reference profile
+N_BINS = 10
+# Floor for empty bins, so PSI stays finite
+EPS = 1e-4
+# Population stability index: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 drift
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+# Below this many rows PSI mostly measures sampling noise: no warn/drift status yet
+MIN_ROWS = 500
+# Distinct unseen codes remembered per feature
+MAX_NEW_CODES = 50
+
+
+# --- reference profile ---
+def build_reference(df, n_bins=N_BINS):
+    """Profile of the model inputs in df: quantile bins and moments per numeric feature,
+    category frequencies per categorical feature."""
+    profile = {"rows": len(df), "numeric": {}, "categorical": {}}
+    for col in NUMERIC:
+        x = df[col].to_numpy(dtype=np.float64)
+        x = x[~np.isnan(x)]
+        # interior edges; bin i holds edges[i-1] <= x < edges[i]
+        edges = np.unique(np.quantile(x, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, x, side="right"), minlength=len(edges) + 1)
+        profile["numeric"][col] = {"edges": edges.tolist(), "proportions": (counts / len(x)).tolist(),
+                                   "mean": float(x.mean()), "std": float(x.std())}
+    for col in CATEGORICAL:
+        codes, counts = np.unique(df[col].to_numpy(dtype=np.float64), return_counts=True)
+        profile["categorical"][col] = {"codes": codes.tolist(), "proportions": (counts / counts.sum()).tolist()}
+    return profile
+
+
+def save_reference(profile, path=DEFAULT_REFERENCE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=1)
+
+
+def load_reference(path=DEFAULT_REFERENCE_PATH, data_path=DATA_CLEANED_PATH):
+    """The saved profile, built from data_cleaned.csv (and saved) when there is none."""
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    profile = build_reference(load_dataset(data_path))
+    save_reference(profile, path)
+    return profile
+
+
+def psi(expected, actual, eps=EPS):
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), eps)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), eps)
+    return float(((actual - expected) * np.log(actual / expected)).sum())
+
+
+def binned_ks(expected, actual):
+    """Largest gap between the two cumulative distributions at the bin edges."""
+    return float(np.abs(np.cumsum(expected) - np.cumsum(actual)).max())
+
+
+# --- streaming statistics ---
+class DriftMonitor:
+    """Running statistics of scored rows, compared against a reference profile.
+
+    update() costs the same per row however much traffic has been seen: counts
+    per reference bin and category, a running mean/variance per numeric
+    feature (merged per batch, Chan et al.), and counts of unseen category
+    codes. Each batch is one vectorized pass over a (rows x features) array.
+    snapshot() scores the traffic since the last reset with PSI and a binned
+    KS distance per feature.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+        num, cat = reference["numeric"], reference["categorical"]
+
+        # a value's bin is the number of edges <= it
+        self._edges = [np.asarray(num[c]["edges"], dtype=np.float64) for c in NUMERIC]
+        self._bin_offsets = np.cumsum([0] + [len(num[c]["edges"]) + 1 for c in NUMERIC])
+
+        # one lookup table over all categorical features: code -> position in code_counts, -1 if unseen
+        self._code_offsets = np.cumsum([0] + [len(cat[c]["codes"]) for c in CATEGORICAL])
+        self._max_code = np.array([max(max(cat[c]["codes"]), 0) for c in CATEGORICAL], dtype=np.int64)
+        self._lut_offsets = np.cumsum(np.append(0, self._max_code[:-1] + 1))
+        self._lut = np.full(int(self._lut_offsets[-1] + self._max_code[-1] + 1), -1, dtype=np.int64)
+        for j, col in enumerate(CATEGORICAL):
+            codes = np.asarray(cat[col]["codes"])
+            valid = (codes >= 0) & (codes == np.floor(codes))
+            self._lut[self._lut_offsets[j] + codes[valid].astype(np.int64)] = \
+                self._code_offsets[j] + np.flatnonzero(valid)
+        self._one_hot = np.array([c in ONE_HOT for c in CATEGORICAL])
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rows = 0
+            self.rows_with_unknown = 0
+            self.bin_counts = np.zeros(self._bin_offsets[-1], dtype=np.int64)
+            self.code_counts = np.zeros(self._code_offsets[-1], dtype=np.int64)
+            self.unknown_counts = np.zeros(len(CATEGORICAL), dtype=np.int64)
+            self.new_codes = {col: {} for col in CATEGORICAL}
+            self.n = np.zeros(len(NUMERIC), dtype=np.int64)
+            self.mean = np.zeros(len(NUMERIC))
+            self.m2 = np.zeros(len(NUMERIC))
+
+    def update(self, X):
+        """Add the rows of a frame with the model input columns (schema.encode_student fields,
+        data_cleaned.csv or data.csv chunks)."""
+        self.update_array(X[NUMERIC].to_numpy(dtype=np.float64), X[CATEGORICAL].to_numpy(dtype=np.float64))
+
+    def update_records(self, records):
+        """Add encoded student dicts (schema.encode_student), without building a frame."""
+        self.update_array(np.array([[r[c] for c in NUMERIC] for r in records], dtype=np.float64).reshape(-1, len(NUMERIC)),
+                          np.array([[r[c] for c in CATEGORICAL] for r in records], dtype=np.float64).reshape(-1, len(CATEGORICAL)))
+
+    def update_array(self, num, cat):
+        """num: (n_rows, len(NUMERIC)), cat: (n_rows, len(CATEGORICAL)) float arrays, NaN for missing."""
+        n_rows = len(num)
+        if not n_rows:
+            return
+
+        # numeric: bin counts and batch moments, NaN (missing) left out of both
+        present = ~np.isnan(num)
+        columns = np.ascontiguousarray(num.T)
+        bins = np.empty(columns.shape, dtype=np.int64)
+        for j, edges in enumerate(self._edges):
+            bins[j] = np.searchsorted(edges, columns[j], side="right")
+        bins += self._bin_offsets[:-1, np.newaxis]
+        if present.all():
+            bin_counts = np.bincount(bins.ravel(), minlength=len(self.bin_counts))
+            n_b = np.full(len(NUMERIC), n_rows)
+            mean_b = columns.mean(axis=1)
+            m2_b = ((columns - mean_b[:, np.newaxis]) ** 2).sum(axis=1)
+        else:
+            bin_counts = np.bincount(bins[present.T], minlength=len(self.bin_counts))
+            n_b = present.sum(axis=0)
+            filled = np.where(present, num, 0.0)
+            mean_b = filled.sum(axis=0) / np.maximum(n_b, 1)
+            m2_b = (np.where(present, num - mean_b, 0.0) ** 2).sum(axis=0)
+
+        # categorical: index of each code among the reference codes, unknown when there is none
+        valid = (cat >= 0) & (cat <= self._max_code) & (cat == np.floor(cat))      # False for NaN
+        index = self._lut[np.where(valid, cat, 0).astype(np.int64) + self._lut_offsets]
+        known = valid & (index >= 0)
+        code_counts = np.bincount(index[known], minlength=len(self.code_counts))
+        unknown = ~known
+        unknown_counts = unknown.sum(axis=0)
+        rows_with_unknown = int(unknown[:, self._one_hot].any(axis=1).sum())
+
+        with self._lock:
+            self.rows += n_rows
+            self.rows_with_unknown += rows_with_unknown
+            self.bin_counts += bin_counts
+            self.code_counts += code_counts
+            self.unknown_counts += unknown_counts
+
+            n = self.n + n_b
+            delta = mean_b - self.mean
+            safe_n = np.maximum(n, 1)
+            self.m2 += m2_b + delta ** 2 * self.n * n_b / safe_n
+            self.mean += delta * n_b / safe_n
+            self.n = n
+
+            if unknown_counts.any():
+                for j in np.flatnonzero(unknown_counts):
+                    seen = self.new_codes[CATEGORICAL[j]]
+                    codes, counts = np.unique(cat[unknown[:, j], j], return_counts=True, equal_nan=True)
+                    for code, count in zip(codes, counts):
+                        key = "missing" if np.isnan(code) else f"{code:g}"
+                        if key in seen or len(seen) < MAX_NEW_CODES:
+                            seen[key] = seen.get(key, 0) + int(count)
+
+    def snapshot(self):
+        """One row per feature: PSI, binned KS, running moments against the reference,
+        unseen-code rate (categorical) and a status (ok / warn / drift / unknown codes,
+        too few rows before MIN_ROWS have been seen)."""
+        with self._lock:
+            rows, rows_with_unknown = self.rows, self.rows_with_unknown
+            bin_counts, code_counts = self.bin_counts.copy(), self.code_counts.copy()
+            unknown_counts = self.unknown_counts.copy()
+            n, mean, m2 = self.n.copy(), self.mean.copy(), self.m2.copy()
+            new_codes = {col: dict(codes) for col, codes in self.new_codes.items()}
+
+        records = []
+        for j, col in enumerate(NUMERIC):
+            ref = self.reference["numeric"][col]
+            counts = bin_counts[self._bin_offsets[j]:self._bin_offsets[j + 1]]
+            actual = counts / n[j] if n[j] else np.zeros(len(counts))
+            std = np.sqrt(m2[j] / n[j]) if n[j] else np.nan
+            records.append({
+                "feature": col, "kind": "numeric", "rows": int(n[j]), "missing": int(rows - n[j]),
+                "psi": psi(ref["proportions"], actual) if n[j] else np.nan,
+                "ks": binned_ks(ref["proportions"], actual) if n[j] else np.nan,
+                "mean": mean[j] if n[j] else np.nan, "ref_mean": ref["mean"],
+                "std": std, "ref_std": ref["std"],
+                "mean_shift": (mean[j] - ref["mean"]) / ref["std"] if n[j] and ref["std"] else np.nan,
+            })
+        for j, col in enumerate(CATEGORICAL):
+            ref = self.reference["categorical"][col]
+            counts = code_counts[self._code_offsets[j]:self._code_offsets[j + 1]]
+            # unseen codes are one more bucket, with no reference mass
+            expected = np.append(ref["proportions"], 0.0)
+            actual = np.append(counts, unknown_counts[j]) / rows if rows else np.zeros(len(expected))
+            records.append({
+                "feature": col, "kind": "categorical", "rows": rows, "missing": new_codes[col].get("missing", 0),
+                "psi": psi(expected, actual) if rows else np.nan,
+                "ks": binned_ks(expected, actual) if rows else np.nan,
+                "unknown_rate": unknown_counts[j] / rows if rows else np.nan,
+                "new_codes": ", ".join(f"{code} ({count})" for code, count in new_codes[col].items()),
+            })
+
+        report = pd.DataFrame(records).set_index("feature")
+        enough = report["rows"] >= MIN_ROWS
+        report["status"] = np.select(
+            [enough & (report["psi"] > PSI_DRIFT), report["unknown_rate"].fillna(0) > 0,
+             enough & (report["psi"] > PSI_WARN), ~enough],
+            ["drift", "unknown codes", "warn", "too few rows"], default="ok")
+        report.attrs.update({"rows": rows, "rows_with_unknown": rows_with_unknown,
+                             "unknown_row_rate": rows_with_unknown / rows if rows else 0.0})
+        return report
+
+    def summary(self):
+        report = self.snapshot()
+        return {
+            **report.attrs,
+            "drifted": report.index[report["status"] == "drift"].tolist(),
+            "warnings": report.index[report["status"] == "warn"].tolist(),
+            "unknown_codes": report.index[report["status"] == "unknown codes"].tolist(),
+        }
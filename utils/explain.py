@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from compiled_scorer import model_input
+
+
+# --- TreeExplainer cache: the explainers of the most recently used fitted models ---
+# An explainer holds its model, so entries are evicted by count rather than when the model is
+# collected (e.g. after a registry reload). Each entry also keeps the model itself: its id()
+# cannot be reused by another object while the entry exists.
+EXPLAINER_CACHE_SIZE = 8
+
+_explainers = OrderedDict()    # id(model) -> (model, explainer)
+_explainers_lock = threading.Lock()
+
+def get_explainer(model):
+    import shap
+
+    key = id(model)
+    with _explainers_lock:
+        entry = _explainers.get(key)
+        if entry is not None:
+            _explainers.move_to_end(key)
+            return entry[1]
+    # built outside the lock: a slow explainer does not hold up the others
+    explainer = shap.TreeExplainer(model)
+    with _explainers_lock:
+        _, explainer = _explainers.setdefault(key, (model, explainer))
+        _explainers.move_to_end(key)
+        while len(_explainers) > EXPLAINER_CACHE_SIZE:
+            _explainers.popitem(last=False)
+        return explainer
+
+
+# Transform once and reuse the matrix for predict, predict_proba and (optionally) SHAP.
+# SHAP values come from shap_budget.exact_shap, which raises ValueError for a model it cannot explain;
+# compiled=True transforms through the pipeline's compiled scorer (compiled_scorer.model_input).
+def predict_explain(pipeline, X, with_shap=True, compiled=False):
+    from shap_budget import exact_shap     # shap_budget imports this module
+
+    model = pipeline.steps[-1][1]
+    X_proc = model_input(pipeline, X, compiled=compiled)
+
+    result = {
+        "X_proc": X_proc,
+        "prediction": np.ravel(model.predict(X_proc)),
+        "proba": model.predict_proba(X_proc),
+    }
+    if with_shap:
+        result["shap_values"] = exact_shap(model, X_proc)
+    return result
+
+
+# Top-k features by |SHAP| for each row's predicted class, as [(name, value), ...] per row.
+# With groups (a shap_groups.FeatureGroups), one-hot columns are summed back to their source feature first.
+def top_features(values, feature_names, model, prediction, k=5, groups=None):
+    if groups is not None:
+        values, feature_names = groups.aggregate(values), groups.names
+
+    class_index = {c: i for i, c in enumerate(model.classes_)}
+    cls = np.array([class_index[p] for p in prediction])
+
+    per_class = values[np.arange(len(cls)), :, cls]
+    order = np.argsort(-np.abs(per_class), axis=1, kind="stable")[:, :k]
+
+    names = np.asarray(feature_names)
+    return [list(zip(names[idx], per_class[row, idx])) for row, idx in enumerate(order)]
+
+
+# --- background computation so callers (e.g. the Tkinter main loop) never block on SHAP ---
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shap")
+
+# any SHAP-computing call, e.g. ResultCache.predict(..., with_shap=True), on the same thread
+def run_async(fn, *args, **kwargs):
+    return _background.submit(fn, *args, **kwargs)
@@ -0,0 +1,444 @@
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+
+DEFAULT_FLAT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "flat")
+FORMAT_VERSION = 1
+
+# Layout of a flat model directory (one per model, e.g. models/flat/lightgbm/):
+#   meta.json              classes, layout, link function, base score, sizes
+#   leaf_value.npy         (n_leaves, leaf_width) float32, leaf_width is 1 or n_outputs
+#   tree_output.npy        output column a width-1 tree adds to, int32
+#   preprocessing.joblib   the pipeline steps before the model (flat pipelines only)
+# layout "nodes" (sklearn, LightGBM, XGBoost): all trees in one node table,
+# internal nodes first, then one node per leaf (leaf k is node n_internal + k)
+#   feature.npy            split feature, int32 (0 for leaves)
+#   threshold.npy          meta "dtype" (float32, float64 for LightGBM): a row goes left when
+#                          x <= threshold (+inf for leaves), inputs are cast to the same dtype
+#   children.npy           (n_nodes, 2) int32 left/right child; a leaf points to itself
+#   default_left.npy       side taken by a missing (NaN) value, bool
+#   root.npy               root node of every tree, int32
+# layout "oblivious" (CatBoost): every level of a tree tests the same split
+#   split_feature.npy      (n_trees, depth) int32
+#   split_threshold.npy    (n_trees, depth) float32: level l sets bit l of the leaf when x > threshold
+ARRAYS = {
+    "nodes": ("feature", "threshold", "children", "default_left", "root", "leaf_value", "tree_output"),
+    "oblivious": ("split_feature", "split_threshold", "leaf_value", "tree_output"),
+}
+
+
+# --- thresholds with the original comparison ---
+# The evaluator compares inputs with `x <= threshold`, in the precision the
+# library itself compares in. scikit-learn casts inputs to float32 against
+# float64 thresholds, XGBoost and CatBoost compare float32 with float32:
+# rounding the threshold down to the nearest float32 keeps every float32 input
+# on the same side. LightGBM compares float64 inputs with float64 thresholds,
+# which are kept as they are (a float32 input cast could cross a threshold).
+def _le_threshold(threshold):
+    """float32 t with x32 <= t  <=>  x32 <= threshold (float64 threshold, as in sklearn)."""
+    threshold = np.asarray(threshold, dtype=np.float64)
+    t = threshold.astype(np.float32)
+    too_big = t.astype(np.float64) > threshold
+    t[too_big] = np.nextafter(t[too_big], np.float32(-np.inf))
+    return t
+
+
+def _lt_threshold(threshold):
+    """float32 t with x32 <= t  <=>  x32 < threshold (float32 threshold, as in XGBoost)."""
+    t = np.asarray(threshold, dtype=np.float32)
+    return np.nextafter(t, np.float32(-np.inf))
+
+
+class _Builder:
+    """Collects trees given as per-node arrays into the "nodes" layout."""
+
+    def __init__(self, leaf_width, dtype=np.float32):
+        self.leaf_width = leaf_width
+        self.dtype = dtype
+        self.parts = {name: [] for name in ("feature", "threshold", "children", "default_left", "leaf_value")}
+        self.roots, self.tree_output = [], []
+        self.n_internal = 0
+        self.n_leaves = 0
+
+    def add(self, is_leaf, children_left, children_right, feature, threshold, default_left, leaf_value, output=0):
+        """One tree in the usual node-array form (node 0 is the root).
+
+        threshold must already be in the evaluator's `x <= t` form, in the builder's dtype;
+        leaf_value has one row (of leaf_width values) per node, only the
+        rows of leaves are kept.
+        """
+        is_leaf = np.asarray(is_leaf, dtype=bool)
+        internal = ~is_leaf
+        # renumber: internal nodes get consecutive ids, leaves ~leaf id until arrays() places them last
+        internal_id = np.cumsum(internal) - 1 + self.n_internal
+        leaf_id = np.cumsum(is_leaf) - 1 + self.n_leaves
+        encode = lambda node: np.where(is_leaf[node], ~leaf_id[node], internal_id[node]).astype(np.int32)
+
+        self.parts["feature"].append(np.asarray(feature)[internal].astype(np.int32))
+        self.parts["threshold"].append(np.asarray(threshold, dtype=self.dtype)[internal])
+        self.parts["children"].append(np.column_stack([encode(np.asarray(children_left)[internal]),
+                                                       encode(np.asarray(children_right)[internal])]))
+        self.parts["default_left"].append(np.asarray(default_left, dtype=bool)[internal])
+        values = np.asarray(leaf_value, dtype=np.float32).reshape(len(is_leaf), self.leaf_width)
+        self.parts["leaf_value"].append(values[is_leaf])
+
+        self.roots.append(encode(np.array([0]))[0])
+        self.tree_output.append(output)
+        self.n_internal += int(internal.sum())
+        self.n_leaves += int(is_leaf.sum())
+
+    def arrays(self):
+        n_internal, n_leaves = self.n_internal, self.n_leaves
+        place = lambda node: np.where(node >= 0, node, n_internal + ~node).astype(np.int32)
+        leaves = np.arange(n_internal, n_internal + n_leaves, dtype=np.int32)
+
+        children = place(np.concatenate(self.parts["children"]).reshape(-1, 2))
+        return {
+            # leaves are absorbing nodes: x <= +inf sends every non-NaN value left, to the leaf itself
+            "feature": np.concatenate(self.parts["feature"] + [np.zeros(n_leaves, dtype=np.int32)]),
+            "threshold": np.concatenate(self.parts["threshold"] + [np.full(n_leaves, np.inf, dtype=self.dtype)]),
+            "children": np.concatenate([children, np.column_stack([leaves, leaves])]),
+            "default_left": np.concatenate(self.parts["default_left"] + [np.ones(n_leaves, dtype=bool)]),
+            "root": place(np.array(self.roots, dtype=np.int32)),
+            "leaf_value": np.concatenate(self.parts["leaf_value"]).reshape(-1, self.leaf_width),
+            "tree_output": np.array(self.tree_output, dtype=np.int32),
+            "n_internal": n_internal,
+        }
+
+
+# --- converters: fitted model -> (arrays, meta) ---
+def _sklearn_tree(builder, tree, scale=1.0, output=0, normalize=False):
+    is_leaf = tree.children_left == -1
+    value = tree.value[:, 0, :]
+    if normalize:
+        totals = value.sum(axis=1, keepdims=True)
+        value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+    builder.add(is_leaf, tree.children_left, tree.children_right, tree.feature, _le_threshold(tree.threshold),
+                # sklearn stores missing_go_to_left since 1.3 (only used when fitted with NaNs)
+                getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)),
+                value * scale, output)
+
+
+def _from_decision_tree(model):
+    builder = _Builder(leaf_width=model.n_classes_)
+    _sklearn_tree(builder, model.tree_, normalize=True)
+    return builder.arrays(), {"link": "normalize", "n_outputs": int(model.n_classes_),
+                              "base_score": [0.0] * model.n_classes_}
+
+
+def _from_sklearn_forest(model):
+    builder = _Builder(leaf_width=model.n_classes_)
+    for tree in model.estimators_:
+        _sklearn_tree(builder, tree.tree_, scale=1.0 / len(model.estimators_), normalize=True)
+    return builder.arrays(), {"link": "identity", "n_outputs": int(model.n_classes_),
+                              "base_score": [0.0] * model.n_classes_}
+
+
+def _from_sklearn_gb(model):
+    n_outputs = model.estimators_.shape[1]
+    builder = _Builder(leaf_width=1)
+    for stage in model.estimators_:
+        for k, tree in enumerate(stage):
+            _sklearn_tree(builder, tree.tree_, scale=model.learning_rate, output=k)
+    # the init estimator predicts a constant (class priors), whatever the row
+    base = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+    return builder.arrays(), {"link": "softmax" if n_outputs > 1 else "sigmoid", "n_outputs": int(n_outputs),
+                              "base_score": base.tolist()}
+
+
+def _from_lightgbm(model):
+    dump = model.booster_.dump_model()
+    if not dump["objective"].startswith(("multiclass", "binary")):
+        raise ValueError(f"Unsupported LightGBM objective {dump['objective']!r}")
+    n_outputs = dump["num_tree_per_iteration"]
+    builder = _Builder(leaf_width=1, dtype=np.float64)
+
+    for i, info in enumerate(dump["tree_info"]):
+        # the dump is nested: number the nodes depth first, root = 0
+        nodes = []
+        stack = [info["tree_structure"]]
+        while stack:
+            node = stack.pop()
+            node["_id"] = len(nodes)
+            nodes.append(node)
+            if "leaf_value" not in node:
+                stack += [node["right_child"], node["left_child"]]
+
+        is_leaf = np.array(["leaf_value" in n for n in nodes])
+        internal = lambda key, default: [n[key] if "leaf_value" not in n else default for n in nodes]
+        child = lambda key: [n[key]["_id"] if "leaf_value" not in n else -1 for n in nodes]
+        for node in nodes:
+            if "leaf_value" not in node and node["decision_type"] != "<=":
+                raise ValueError(f"Unsupported LightGBM split {node['decision_type']!r}")
+        default_left = [
+            # missing_type None: NaN is treated as 0.0
+            (n["default_left"] if n["missing_type"] != "None" else 0.0 <= n["threshold"]) if "leaf_value" not in n else False
+            for n in nodes]
+        builder.add(is_leaf,
+                    child("left_child"), child("right_child"),
+                    internal("split_feature", 0), internal("threshold", 0.0), default_left,
+                    [n.get("leaf_value", 0.0) for n in nodes], output=i % n_outputs)
+
+    return builder.arrays(), {"link": "softmax" if n_outputs > 1 else "sigmoid", "n_outputs": int(n_outputs),
+                              "base_score": [0.0] * n_outputs, "dtype": "float64"}
+
+
+def _from_xgboost(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in ("multi:softprob", "multi:softmax", "binary:logistic"):
+        raise ValueError(f"Unsupported XGBoost objective {objective!r}")
+    trees = learner["gradient_booster"]["model"]["trees"]
+    tree_info = learner["gradient_booster"]["model"]["tree_info"]
+    n_outputs = max(int(learner["learner_model_param"]["num_class"]), 1)
+
+    builder = _Builder(leaf_width=1)
+    for tree, output in zip(trees, tree_info):
+        left = np.array(tree["left_children"])
+        # leaves keep their value in split_conditions
+        builder.add(left == -1, left, tree["right_children"], tree["split_indices"],
+                    _lt_threshold(tree["split_conditions"]), tree["default_left"],
+                    tree["split_conditions"], output=output)
+
+    # "[5E-1,5E-1,5E-1]" (one per class) or "5E-1"
+    base = [float(v) for v in learner["learner_model_param"]["base_score"].strip("[]").split(",")]
+    if objective == "binary:logistic":
+        base = [float(np.log(base[0] / (1 - base[0])))]
+    elif len(base) == 1:
+        base = base * n_outputs
+    return builder.arrays(), {"link": "softmax" if n_outputs > 1 else "sigmoid", "n_outputs": n_outputs,
+                              "base_score": base,
+                              # XGBoost treats entries absent from a sparse matrix as missing, not 0
+                              "sparse_absent_missing": True}
+
+
+def _from_catboost(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            dump = json.load(f)
+
+    float_index = {ff["feature_index"]: ff["flat_feature_index"] for ff in dump["features_info"]["float_features"]}
+    scale, bias = dump["scale_and_bias"]
+    bias = np.atleast_1d(bias).astype(np.float64)
+    n_outputs = len(bias)
+    trees = dump["oblivious_trees"]
+    depth = max(len(tree["splits"]) for tree in trees)
+
+    # shallower trees are padded with splits that are never taken (x > +inf is false, also for NaN)
+    split_feature = np.zeros((len(trees), depth), dtype=np.int32)
+    split_threshold = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    leaf_value = np.zeros((len(trees), 2 ** depth, n_outputs), dtype=np.float32)
+    for t, tree in enumerate(trees):
+        if any(s["split_type"] != "FloatFeature" for s in tree["splits"]):
+            raise ValueError("Only float-feature CatBoost splits are supported")
+        # catboost: bit l of the leaf index is (x > border) of splits[l]; NaN ("AsIs") compares false
+        for l, split in enumerate(tree["splits"]):
+            split_feature[t, l] = float_index[split["float_feature_index"]]
+            split_threshold[t, l] = split["border"]
+        values = np.asarray(tree["leaf_values"]).reshape(-1, n_outputs) * scale
+        leaf_value[t, :len(values)] = values
+
+    arrays = {"split_feature": split_feature, "split_threshold": split_threshold,
+              "leaf_value": leaf_value.reshape(-1, n_outputs), "tree_output": np.zeros(len(trees), dtype=np.int32)}
+    return arrays, {"layout": "oblivious", "link": "softmax" if n_outputs > 1 else "sigmoid",
+                    "n_outputs": n_outputs, "base_score": bias.tolist(), "max_depth": depth}
+
+
+CONVERTERS = {
+    "DecisionTreeClassifier": _from_decision_tree,
+    "RandomForestClassifier": _from_sklearn_forest,
+    "ExtraTreesClassifier": _from_sklearn_forest,
+    "GradientBoostingClassifier": _from_sklearn_gb,
+    "LGBMClassifier": _from_lightgbm,
+    "XGBClassifier": _from_xgboost,
+    "CatBoostClassifier": _from_catboost,
+}
+
+
+def can_export(model):
+    return type(model).__name__ in CONVERTERS
+
+
+# --- writing ---
+def export_model(model, path):
+    """Write a fitted tree model as a flat model directory and return it opened."""
+    kind = type(model).__name__
+    if kind not in CONVERTERS:
+        raise ValueError(f"Cannot export {kind}, supported: {', '.join(CONVERTERS)}")
+    arrays, meta = CONVERTERS[kind](model)
+    meta = {"layout": "nodes", "sparse_absent_missing": False, "dtype": "float32", **meta}
+    if meta["layout"] == "nodes":
+        meta.update(n_internal=arrays.pop("n_internal"), max_depth=_max_depth(arrays))
+
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAYS[meta["layout"]]:
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "model_type": kind,
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "n_features": int(model.n_features_in_),
+        "n_trees": len(arrays["tree_output"]),
+        "n_leaves": len(arrays["leaf_value"]),
+        **meta,
+    }
+    # meta.json last: a directory without it is an incomplete write
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return FlatForest(path)
+
+
+def _max_depth(arrays):
+    depth, nodes = 0, arrays["root"]
+    children = arrays["children"]
+    while True:
+        internal = nodes[children[nodes, 0] != nodes]
+        if not len(internal):
+            return depth
+        depth += 1
+        nodes = children[internal].ravel()
+
+
+def export_pipeline(pipeline, path):
+    """Flat model plus the pipeline steps before it (samplers dropped, they only act during fit)."""
+    steps = [(name, step) for name, step in pipeline.steps[:-1]
+             if step is not None and step != "passthrough" and not hasattr(step, "fit_resample")]
+    forest = export_model(pipeline.steps[-1][1], path)
+    joblib.dump(steps, os.path.join(path, "preprocessing.joblib"))
+    return FlatPipeline(forest, steps)
+
+
+# --- evaluation ---
+def _softmax(raw):
+    raw = raw - raw.max(axis=1, keepdims=True)
+    exp = np.exp(raw)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class FlatForest:
+    """Read-only, memory-mapped flat tree model with a vectorized batch evaluator.
+
+    The arrays are opened with mmap_mode="r": loading is a few file opens,
+    and processes scoring with the same model share the page cache instead
+    of holding one unpickled copy each.
+    """
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path}: format version {self.meta['version']}, expected {FORMAT_VERSION}")
+        self.classes_ = np.array(self.meta["classes"])
+        self.n_features_in_ = self.meta["n_features"]
+        self.arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                       for name in ARRAYS[self.meta["layout"]]}
+        # precision the inputs are compared in (exports before it was recorded are float32)
+        self.dtype = np.dtype(self.meta.get("dtype", "float32"))
+
+    def _dense(self, X):
+        if sparse.issparse(X):
+            X = X.tocsr()
+            if self.meta["sparse_absent_missing"]:
+                out = np.full(X.shape, np.nan, dtype=self.dtype)
+                rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+                out[rows, X.indices] = X.data
+                return out
+            return X.toarray().astype(self.dtype, copy=False)
+        return np.asarray(X, dtype=self.dtype)
+
+    def leaves(self, X):
+        """(n_rows, n_trees) leaf id each row ends in, in every tree."""
+        X = self._dense(X)
+        a = self.arrays
+
+        if self.meta["layout"] == "oblivious":
+            n_trees, depth = a["split_feature"].shape
+            bits = X[:, a["split_feature"]] > a["split_threshold"]          # (n_rows, n_trees, depth)
+            index = bits.astype(np.int64) @ (1 << np.arange(depth, dtype=np.int64))
+            return index + np.arange(n_trees) * 2 ** depth
+
+        # every (row, tree) pair moves one level per step; leaves point to themselves,
+        # so max_depth steps land all of them on their leaf
+        feature, threshold, children, default_left = a["feature"], a["threshold"], a["children"], a["default_left"]
+        node = np.broadcast_to(a["root"], (len(X), len(a["root"]))).copy()
+        row_offset = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, np.newaxis]
+        X_flat = X.ravel()
+        for _ in range(self.meta["max_depth"]):
+            x = X_flat[row_offset + feature[node]]
+            go_right = (x > threshold[node]) | (np.isnan(x) & ~default_left[node])
+            node = children[node, go_right.astype(np.intp)]
+        return node - self.meta["n_internal"]
+
+    def raw_predict(self, X, chunk_rows=2048):
+        n_rows = X.shape[0]
+        leaf_value = self.arrays["leaf_value"]
+        n_outputs = self.meta["n_outputs"]
+        if leaf_value.shape[1] == 1:
+            # each tree adds to one output column
+            outputs = np.zeros((len(self.arrays["tree_output"]), n_outputs))
+            outputs[np.arange(len(outputs)), self.arrays["tree_output"]] = 1.0
+
+        raw = np.empty((n_rows, n_outputs))
+        for start in range(0, n_rows, chunk_rows):
+            leaves = self.leaves(X[start:start + chunk_rows])
+            if leaf_value.shape[1] == 1:
+                raw[start:start + chunk_rows] = leaf_value[leaves, 0].astype(np.float64) @ outputs
+            else:
+                raw[start:start + chunk_rows] = leaf_value[leaves].astype(np.float64).sum(axis=1)
+        return raw + np.asarray(self.meta["base_score"])
+
+    def predict_proba(self, X):
+        raw = self.raw_predict(X)
+        link = self.meta["link"]
+        if link == "softmax":
+            return _softmax(raw)
+        if link == "sigmoid":
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1 - p, p])
+        if link == "normalize":
+            return raw / raw.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self.arrays.values())
+
+
+class FlatPipeline:
+    """The fitted preprocessing steps followed by a FlatForest, scored like the original pipeline."""
+
+    def __init__(self, forest, steps):
+        self.forest = forest
+        self.steps = steps
+
+    @property
+    def classes_(self):
+        return self.forest.classes_
+
+    def transform(self, X):
+        for _, step in self.steps:
+            X = step.transform(X)
+        return X
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.forest.predict(self.transform(X))
+
+
+def load_flat_pipeline(path, mmap_mode="r"):
+    return FlatPipeline(FlatForest(path, mmap_mode=mmap_mode),
+                        joblib.load(os.path.join(path, "preprocessing.joblib")))
@@ -0,0 +1,171 @@
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from inference import transform_for_model
+
+
+# Models that can grow from a fitted state, and the parameter that counts their trees/rounds
+BOOSTED = {"LGBMClassifier": "n_estimators", "XGBClassifier": "n_estimators", "CatBoostClassifier": "iterations"}
+WARM_START = {"RandomForestClassifier": "n_estimators", "ExtraTreesClassifier": "n_estimators",
+              "GradientBoostingClassifier": "n_estimators"}
+
+# Drift that makes the frozen preprocessing unusable for the new rows
+MAX_MEAN_SHIFT = 0.5       # |mean of the standardized column| on the new rows
+MAX_UNKNOWN_RATE = 0.05    # share of new rows with a category the OneHotEncoder has not seen
+
+
+def preprocessing_drift(pipeline, X_new, max_mean_shift=MAX_MEAN_SHIFT, max_unknown_rate=MAX_UNKNOWN_RATE):
+    """How far X_new is from what the fitted preprocessing step was fitted on.
+
+    Returns {"mean_shift": {column: value}, "unknown_rate": {column: value}, "refit": bool}.
+    """
+    X_fe = pipeline.named_steps["feature_transformer"].transform(X_new)
+    preprocessor = pipeline.named_steps["preprocessing"]
+
+    mean_shift, unknown_rate = {}, {}
+    for name, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, StandardScaler):
+            z = (X_fe[columns].to_numpy(dtype=np.float64) - transformer.mean_) / transformer.scale_
+            mean_shift.update(zip(columns, np.abs(z.mean(axis=0))))
+        elif isinstance(transformer, OneHotEncoder):
+            for col, categories in zip(columns, transformer.categories_):
+                values = X_fe[col].astype(object).where(X_fe[col].notna(), None)
+                unknown_rate[col] = float((~values.isin(list(categories))).mean())
+
+    refit = (max(mean_shift.values(), default=0.0) > max_mean_shift
+             or max(unknown_rate.values(), default=0.0) > max_unknown_rate)
+    return {"mean_shift": mean_shift, "unknown_rate": unknown_rate, "refit": bool(refit)}
+
+
+def replay_sample(X_old, y_old, size, random_state=42):
+    """Stratified sample of the previous training rows, replayed next to the new cohort."""
+    if size >= len(X_old):
+        return X_old, y_old
+    X_replay, _, y_replay, _ = train_test_split(X_old, y_old, train_size=size, random_state=random_state,
+                                                stratify=y_old)
+    return X_replay, y_replay
+
+
+def _grow(model, X, y, extra):
+    kind = type(model).__name__
+    if kind in BOOSTED:
+        param = BOOSTED[kind]
+        # a model of `extra` rounds starting from the fitted booster: old + new trees
+        grown = clone(model).set_params(**{param: extra})
+        if kind == "LGBMClassifier":
+            grown.fit(X, y, init_model=model.booster_)
+        elif kind == "XGBClassifier":
+            grown.fit(X, y, xgb_model=model.get_booster())
+        else:
+            grown.fit(X, y, init_model=model)
+        # the parameter describes the whole model again, e.g. for a later clone + refit
+        # (CatBoost refuses set_params once fitted; its size is read from tree_count_)
+        if kind != "CatBoostClassifier":
+            grown.set_params(**{param: _size(model) + extra})
+        return grown
+
+    param = WARM_START[kind]
+    grown = copy.deepcopy(model)
+    grown.set_params(warm_start=True, **{param: getattr(model, param) + extra})
+    grown.fit(X, y)
+    grown.set_params(warm_start=False)
+    return grown
+
+
+def _size(model):
+    kind = type(model).__name__
+    if kind == "CatBoostClassifier":
+        return model.tree_count_
+    size = model.get_params().get(BOOSTED.get(kind) or WARM_START[kind])
+    if size is not None:
+        return size
+    # parameter left at the library default: count the fitted rounds
+    if kind == "XGBClassifier":
+        return model.get_booster().num_boosted_rounds()
+    return model.booster_.current_iteration()
+
+
+def can_grow(model):
+    kind = type(model).__name__
+    return kind in BOOSTED or kind in WARM_START
+
+
+def update_pipeline(pipeline, X_new, y_new, X_replay=None, y_replay=None, extra=None,
+                    force_refit=False, X_old=None, y_old=None, random_state=42):
+    """Update a fitted pipeline with a new cohort instead of re-running the grid search.
+
+    The feature_transformer/preprocessing steps stay frozen and the model
+    grows by `extra` trees or boosting rounds (default: a quarter of its
+    current size) fitted on the new rows plus the replay rows, after SMOTE.
+    When the new rows drift too far from what preprocessing was fitted on
+    (or force_refit is set), or the model cannot grow (decision tree, SVM),
+    the pipeline is refitted with the same hyperparameters instead, on the
+    new rows plus all of X_old (the rows it was trained on), or plus the
+    replay rows when X_old is not given.
+
+    Returns (updated pipeline, info dict); the input pipeline is not modified.
+    """
+    X = pd.concat([X_new, X_replay]) if X_replay is not None else X_new
+    y = pd.concat([y_new, y_replay]) if y_replay is not None else y_new
+
+    drift = preprocessing_drift(pipeline, X_new)
+    model = pipeline.steps[-1][1]
+    info = {"drift": drift, "rows": len(X)}
+
+    if force_refit or drift["refit"] or not can_grow(model):
+        if X_old is not None:
+            X, y = pd.concat([X_old, X_new]), pd.concat([y_old, y_new])
+        info.update(mode="refit", rows=len(X))
+        updated = clone(pipeline)
+        updated.fit(X, y)
+        return updated, info
+
+    X_proc = transform_for_model(pipeline, X)
+    X_res, y_res = SMOTE(random_state=random_state).fit_resample(X_proc, y)
+
+    extra = extra or max(10, _size(model) // 4)
+
+    updated = copy.deepcopy(pipeline)
+    updated.steps[-1] = (updated.steps[-1][0], _grow(model, X_res, y_res, extra))
+    info.update(mode="grow", extra=extra)
+    return updated, info
+
+
+def compare_with_full_retrain(pipeline_template, X_old, y_old, X_new, y_new, X_test, y_test,
+                              replay_size=1000, extra=None):
+    """Time and macro F1 of update_pipeline against refitting on all rows.
+
+    pipeline_template supplies the hyperparameters (e.g. a saved best pipeline);
+    the base model is first fitted on the old rows only, as it was before the
+    new cohort arrived.
+    """
+    base = clone(pipeline_template).fit(X_old, y_old)
+
+    start = time.perf_counter()
+    X_replay, y_replay = replay_sample(X_old, y_old, replay_size)
+    updated, info = update_pipeline(base, X_new, y_new, X_replay, y_replay, extra=extra,
+                                    X_old=X_old, y_old=y_old)
+    update_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full = clone(pipeline_template).fit(pd.concat([X_old, X_new]), pd.concat([y_old, y_new]))
+    full_time = time.perf_counter() - start
+
+    f1 = lambda p: f1_score(y_test, p.predict(X_test), average="macro")
+    return {
+        "mode": info["mode"],
+        "base_f1": f1(base),
+        "incremental_f1": f1(updated),
+        "full_f1": f1(full),
+        "incremental_s": update_time,
+        "full_s": full_time,
+        "drift_refit": info["drift"]["refit"],
+    }
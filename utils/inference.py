@@ -0,0 +1,46 @@
+import joblib
+import numpy as np
+
+
+# The steps before the model that transform at predict time (samplers such as SMOTE only act during fit)
+def _transform_steps(pipeline):
+    return [step for _, step in pipeline.steps[:-1]
+            if step is not None and step != "passthrough" and not hasattr(step, "fit_resample")]
+
+
+def transform_for_model(pipeline, X):
+    for step in _transform_steps(pipeline):
+        X = step.transform(X)
+    return X
+
+
+# Hash of the fitted preprocessing: pipelines with the same key give the same model input
+def preprocessing_key(pipeline):
+    return joblib.hash(_transform_steps(pipeline))
+
+
+# predict and predict_proba on a single pass through the transformers
+def predict_with_proba(pipeline, X):
+    model = pipeline.steps[-1][1]
+    X_proc = transform_for_model(pipeline, X)
+    prediction = np.ravel(model.predict(X_proc))
+    proba = model.predict_proba(X_proc)
+    return prediction, proba
+
+
+# Rows densified at a time for consumers that cannot take the sparse preprocessing output
+DENSE_CHUNK_ROWS = 2048
+
+def to_dense(X_proc):
+    return X_proc.toarray() if hasattr(X_proc, "toarray") else X_proc
+
+
+def map_dense(fn, X_proc, chunk_rows=DENSE_CHUNK_ROWS):
+    """fn over dense blocks of at most chunk_rows rows, results stacked along the rows.
+
+    Only one block of a sparse X_proc is dense at a time; dense input is passed through whole.
+    """
+    if not hasattr(X_proc, "toarray") or X_proc.shape[0] <= chunk_rows:
+        return fn(to_dense(X_proc))
+    return np.concatenate([fn(X_proc[start:start + chunk_rows].toarray())
+                           for start in range(0, X_proc.shape[0], chunk_rows)])
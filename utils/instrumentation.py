@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+
+logger = logging.getLogger(__name__)
+
+# Set to 1 to instrument the pipelines used by the app
+ENV_VAR = "PIPELINE_INSTRUMENTATION"
+METHODS = ("fit", "fit_transform", "fit_resample", "transform", "predict", "predict_proba")
+
+
+# --- global switch and collected stats ---
+_enabled = False
+_track_memory = False
+_started_tracemalloc = False
+_stats = {}
+_stats_lock = threading.Lock()
+_active = threading.local()
+
+
+def enable(track_memory=False):
+    """Start recording calls of instrumented steps; track_memory traces allocations (slow)."""
+    global _enabled, _track_memory, _started_tracemalloc
+    _track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    _enabled = True
+
+
+def disable():
+    global _enabled, _started_tracemalloc
+    _enabled = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def enabled_from_env():
+    return os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+def reset():
+    with _stats_lock:
+        _stats.clear()
+
+
+def stats(label=None):
+    """[{label, step, method, calls, rows, total_ms, mean_ms, last_ms, alloc_bytes}, ...]"""
+    with _stats_lock:
+        entries = [dict(entry) for entry in _stats.values() if label is None or entry["label"] == label]
+    for entry in entries:
+        entry["mean_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+    return entries
+
+
+def log_summary(level=logging.INFO, label=None):
+    for entry in stats(label):
+        logger.log(level, json.dumps({"event": "pipeline_step_summary", **entry}))
+
+
+def _num_rows(X):
+    shape = getattr(X, "shape", None)
+    if shape is not None and len(shape):
+        return int(shape[0])
+    try:
+        return len(X)
+    except TypeError:
+        return 0
+
+
+def _record(label, step, method, rows, elapsed_ms, alloc_bytes):
+    key = (label, step, method)
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = {"label": label, "step": step, "method": method, "calls": 0,
+                                   "rows": 0, "total_ms": 0.0, "last_ms": 0.0, "alloc_bytes": 0}
+        entry["calls"] += 1
+        entry["rows"] += rows
+        entry["total_ms"] += elapsed_ms
+        entry["last_ms"] = elapsed_ms
+        entry["alloc_bytes"] += alloc_bytes
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"event": "pipeline_step", "label": label, "step": step, "method": method,
+                                 "rows": rows, "elapsed_ms": round(elapsed_ms, 3), "alloc_bytes": alloc_bytes}))
+
+
+class _TimedMethod:
+    """Stands in for one bound method of a pipeline step, stored on the step instance."""
+
+    def __init__(self, owner, method, label, step):
+        self.owner = owner
+        self.method = method
+        self.label = label
+        self.step = step
+        self.wrapped = getattr(owner, method)
+
+    def __call__(self, X=None, *args, **kwargs):
+        # disabled, or nested in another recorded call of the same step (fit_transform -> transform)
+        active = getattr(_active, "steps", None)
+        if not _enabled or (active and id(self.owner) in active):
+            return self.wrapped(X, *args, **kwargs)
+
+        if active is None:
+            active = _active.steps = set()
+        active.add(id(self.owner))
+        track = _track_memory and tracemalloc.is_tracing()
+        if track:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            return self.wrapped(X, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            alloc = max(tracemalloc.get_traced_memory()[1] - before, 0) if track else 0
+            active.discard(id(self.owner))
+            _record(self.label, self.step, self.method, _num_rows(X), elapsed_ms, alloc)
+
+
+class _PlainState:
+    """The step's own __getstate__ without the instrumentation, stored on the step instance.
+
+    pickle (and copy) look __getstate__ up on the instance, so an instrumented
+    step pickles exactly as the plain one would and loads uninstrumented.
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def __call__(self):
+        state = type(self.owner).__getstate__(self.owner)
+        if isinstance(state, dict):
+            state = {k: v for k, v in state.items()
+                     if not isinstance(v, (_TimedMethod, _PlainState))}
+        return state
+
+
+def instrument(pipeline, label="pipeline"):
+    """Wrap fit/transform/predict methods of every named step in place (idempotent).
+
+    Only instance attributes are added, the step classes are untouched, and
+    they are left out of the step's pickled state: a saved or copied
+    instrumented pipeline is a plain one. uninstrument() removes the wrappers.
+    """
+    for step, estimator in pipeline.steps:
+        if estimator is None or estimator == "passthrough":
+            continue
+        for method in METHODS:
+            current = estimator.__dict__.get(method)
+            if isinstance(current, _TimedMethod) or not callable(getattr(estimator, method, None)):
+                continue
+            estimator.__dict__[method] = _TimedMethod(estimator, method, label, step)
+        if not isinstance(estimator.__dict__.get("__getstate__"), _PlainState):
+            estimator.__dict__["__getstate__"] = _PlainState(estimator)
+    return pipeline
+
+
+def uninstrument(pipeline):
+    for _, estimator in pipeline.steps:
+        if estimator is None or estimator == "passthrough":
+            continue
+        for method in METHODS:
+            if isinstance(estimator.__dict__.get(method), _TimedMethod):
+                del estimator.__dict__[method]
+        if isinstance(estimator.__dict__.get("__getstate__"), _PlainState):
+            del estimator.__dict__["__getstate__"]
+    return pipeline
@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from explain import predict_explain, top_features
+from shap_budget import exact_shap
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into one predict_proba call.
+
+    A background thread takes the first queued request, then keeps collecting
+    requests until max_batch_size rows are queued or max_wait_ms has elapsed,
+    and scores them together. get_pipeline is called once per batch so that
+    model registry reloads are picked up. With a result_cache.ResultCache
+    (and the model_name it knows the pipeline by), only the rows it has not
+    seen are scored. compiled=True scores through the pipeline's compiled
+    scorer (without a cache; the cache has its own switch).
+    """
+
+    def __init__(self, get_pipeline, max_batch_size=64, max_wait_ms=5.0, cache=None, model_name=None,
+                 compiled=False):
+        self.get_pipeline = get_pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.cache = cache
+        self.model_name = model_name
+        self.compiled = compiled
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # df: one row per student; resolves to {"prediction", "proba", "classes", "top_features"}
+    def submit(self, df, explain=False, top_k=5):
+        future = Future()
+        self._queue.put((df, explain, top_k, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_rows": self._rows / self._batches if self._batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            n_rows = len(item[0])
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            stop = False
+            while n_rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch):
+        try:
+            pipeline = self.get_pipeline()
+            model = pipeline.steps[-1][1]
+            X = pd.concat([df for df, _, _, _ in batch], ignore_index=True)
+            if self.cache is not None:
+                result = self.cache.predict(self.model_name, X)
+            else:
+                result = predict_explain(pipeline, X, with_shap=False, compiled=self.compiled)
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._rows += len(X)
+
+        # SHAP only for the rows of requests that asked for it; if it fails, only those requests fail
+        bounds = np.cumsum([0] + [len(df) for df, _, _, _ in batch])
+        explain_rows = np.concatenate(
+            [np.arange(bounds[i], bounds[i + 1]) for i, req in enumerate(batch) if req[1]]
+            or [np.array([], dtype=int)]
+        )
+        top, shap_error = {}, None
+        if len(explain_rows):
+            try:
+                if self.cache is not None:
+                    values = self.cache.predict(self.model_name, X.iloc[explain_rows], with_shap=True)["shap_values"]
+                else:
+                    values = exact_shap(model, result["X_proc"][explain_rows])
+                names = pipeline.named_steps["preprocessing"].get_feature_names_out()
+                k = max(req[2] for req in batch if req[1])
+                for row, feats in zip(explain_rows, top_features(values, names, model, result["prediction"][explain_rows], k=k)):
+                    top[row] = feats
+            except Exception as e:
+                shap_error = e
+
+        for i, (df, explain, top_k, future) in enumerate(batch):
+            if explain and shap_error is not None:
+                future.set_exception(shap_error)
+                continue
+            start, end = bounds[i], bounds[i + 1]
+            future.set_result({
+                "classes": list(model.classes_),
+                "prediction": result["prediction"][start:end],
+                "proba": result["proba"][start:end],
+                "top_features": [top[row][:top_k] for row in range(start, end)] if explain else None,
+            })
@@ -0,0 +1,134 @@
+import glob
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+MODEL_PREFIX = "best_model_"
+
+
+class ModelRegistry:
+    """Lazily loaded, LRU-cached pipelines from a models/ directory.
+
+    A pipeline is unpickled on first use and kept until it is evicted by the
+    count (max_models) or size (max_bytes, measured as artifact file size)
+    budget. If the file on disk changes (mtime or size), the next get()
+    reloads it.
+    """
+
+    def __init__(self, models_dir=DEFAULT_MODELS_DIR, max_models=None, max_bytes=None):
+        self.models_dir = models_dir
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+
+        self._cache = OrderedDict()    # name -> (pipeline, file identity, size in bytes)
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._evictions = 0
+        self._load_times = {}
+
+    def path(self, name):
+        return os.path.join(self.models_dir, f"{MODEL_PREFIX}{name}.joblib")
+
+    def available(self):
+        pattern = os.path.join(self.models_dir, f"{MODEL_PREFIX}*.joblib")
+        return sorted(os.path.basename(p)[len(MODEL_PREFIX):-len(".joblib")] for p in glob.glob(pattern))
+
+    # (mtime, size) of the artifact, used to detect a replaced model file
+    def file_identity(self, name):
+        st = os.stat(self.path(name))
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, name):
+        return self.get_with_identity(name)[0]
+
+    def get_with_identity(self, name):
+        """(pipeline, file identity it was loaded from): callers that cache results per model
+        version take both from here, so a file replaced in between cannot pair them up wrongly."""
+        path = self.path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found: {path}")
+        identity = self.file_identity(name)
+
+        with self._lock:
+            entry = self._cache.get(name)
+            if entry is not None and entry[1] == identity:
+                self._hits += 1
+                self._cache.move_to_end(name)
+                return entry[0], identity
+
+            self._misses += 1
+            if entry is not None:
+                self._reloads += 1
+                del self._cache[name]
+
+            start = time.perf_counter()
+            while True:
+                pipeline = joblib.load(path)
+                # the file may have been replaced while it was read: load it again
+                loaded, identity = identity, self.file_identity(name)
+                if loaded == identity:
+                    break
+            self._load_times.setdefault(name, []).append(time.perf_counter() - start)
+
+            self._cache[name] = (pipeline, identity, identity[1])
+            self._evict(keep=name)
+            return pipeline, identity
+
+    def _evict(self, keep):
+        def over_budget():
+            if self.max_models is not None and len(self._cache) > self.max_models:
+                return True
+            if self.max_bytes is not None and sum(e[2] for e in self._cache.values()) > self.max_bytes:
+                return True
+            return False
+
+        while len(self._cache) > 1 and over_budget():
+            oldest = next(iter(self._cache))
+            if oldest == keep:
+                break
+            del self._cache[oldest]
+            self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            requests = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / requests if requests else 0.0,
+                "reloads": self._reloads,
+                "evictions": self._evictions,
+                "loaded": list(self._cache),
+                "loaded_bytes": sum(e[2] for e in self._cache.values()),
+                "load_time_s": {name: {"count": len(t), "last": t[-1], "total": sum(t)}
+                                for name, t in self._load_times.items()},
+            }
+
+
+# One registry per models directory and process, shared by the GUI and batch scoring
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_registry(models_dir=DEFAULT_MODELS_DIR, max_models=None, max_bytes=None):
+    key = os.path.abspath(models_dir)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(key)
+        registry = _registries[key]
+        if max_models is not None:
+            registry.max_models = max_models
+        if max_bytes is not None:
+            registry.max_bytes = max_bytes
+        return registry
@@ -26,8 +26,11 @@ preprocessor = ColumnTransformer(
     transformers=[
         ('num', StandardScaler(), num_cols),
         ('bin', "passthrough", binary_cols),
-        ('oh', OneHotEncoder(drop="first", handle_unknown="ignore"), cat_cols)
-    ])
+        ('oh', OneHotEncoder(drop="first", handle_unknown="ignore", sparse_output=True), cat_cols)
+    ],
+    # always CSR (the default 0.3 threshold switches to dense output when the fitted data is dense enough);
+    # SMOTE and every model accept it, explainers densify it in blocks (inference.map_dense)
+    sparse_threshold=1.0)
 
 
 
@@ -0,0 +1,222 @@
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from compiled_scorer import model_input
+from model_registry import DEFAULT_MODELS_DIR, get_registry
+from schema import categorical_features, numerical_features
+from shap_budget import exact_shap
+
+
+# Canonical column order of an encoded student, whatever the order of the input frame
+KEY_COLUMNS = list(categorical_features) + list(numerical_features)
+
+
+def row_keys(X):
+    """One hex digest per row of an encoded frame (schema.encode_student fields).
+
+    Values are hashed as float64 in KEY_COLUMNS order, so 3, 3.0 and "3" (the
+    GUI's Application_order) give the same key and extra columns are ignored.
+    """
+    values = X[KEY_COLUMNS].to_numpy(dtype=np.float64) + 0.0     # -0.0 -> 0.0
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest() for row in values]
+
+
+class ResultCache:
+    """LRU cache of predictions, probabilities and SHAP values per (model file, student row).
+
+    Entries are keyed by row_keys() and by the identity (mtime, size) of the
+    model artifact, as the registry sees it: when a model file changes, every
+    entry of that model is dropped, in memory and on disk, on the next call.
+    max_entries bounds the in-memory tier; with disk_dir, entries are also
+    written to disk_dir/<model>/<mtime>-<size>/<key>.npz and read back after
+    an eviction or a restart. With compiled=True, missing rows go through the
+    pipeline's compiled scorer (compiled_scorer.model_input) instead of the
+    pandas preprocessing steps.
+    """
+
+    def __init__(self, registry, max_entries=4096, disk_dir=None, compiled=False):
+        self.registry = registry
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.compiled = compiled
+
+        self._entries = OrderedDict()     # (model, file identity, key) -> (prediction, proba, shap values or None)
+        self._versions = {}               # model -> file identity the entries belong to
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    # --- model versions ---
+    def _version(self, name, identity):
+        """Record identity as the current version of model `name`; a new one drops the older entries."""
+        with self._lock:
+            previous = self._versions.get(name)
+            if previous == identity:
+                return
+            self._versions[name] = identity
+            if previous is not None:
+                self._invalidations += 1
+            for key in [k for k in self._entries if k[0] == name and k[1] != identity]:
+                del self._entries[key]
+        if self.disk_dir is not None:
+            # entries of any other version of this model are stale
+            model_dir = os.path.join(self.disk_dir, name)
+            current = "%d-%d" % identity
+            if os.path.isdir(model_dir):
+                for version in os.listdir(model_dir):
+                    if version != current:
+                        shutil.rmtree(os.path.join(model_dir, version), ignore_errors=True)
+
+    def _disk_path(self, name, identity, key):
+        return os.path.join(self.disk_dir, name, "%d-%d" % identity, f"{key}.npz")
+
+    # --- entries ---
+    def _get(self, name, identity, key):
+        with self._lock:
+            entry = self._entries.get((name, identity, key))
+            if entry is not None:
+                self._entries.move_to_end((name, identity, key))
+                return entry, False
+        if self.disk_dir is None:
+            return None, False
+        try:
+            with np.load(self._disk_path(name, identity, key)) as f:
+                entry = (f["prediction"][()], f["proba"], f["shap_values"] if "shap_values" in f else None)
+        except (OSError, ValueError, KeyError):
+            return None, False
+        self._put(name, identity, key, entry)
+        return entry, True
+
+    def _put(self, name, identity, key, entry):
+        with self._lock:
+            self._entries[(name, identity, key)] = entry
+            self._entries.move_to_end((name, identity, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _write(self, name, identity, key, entry):
+        path = self._disk_path(name, identity, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {"prediction": np.asarray(entry[0]), "proba": entry[1]}
+        if entry[2] is not None:
+            arrays["shap_values"] = entry[2]
+        # write then rename, so a concurrent reader never sees half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    def _store(self, name, identity, key, entry):
+        self._put(name, identity, key, entry)
+        if self.disk_dir is not None:
+            self._write(name, identity, key, entry)
+
+    # --- scoring ---
+    def predict(self, name, X, with_shap=False):
+        """Predictions, probabilities and (with_shap) SHAP values of model `name` for the rows of X.
+
+        Cached rows are served from the cache; the others go through the
+        pipeline in one transform/predict/predict_proba (and one SHAP) call.
+        Returns {"prediction", "proba", "shap_values" (None without with_shap),
+        "classes", "cached"}, "cached" being the number of rows served from the cache.
+        """
+        # the pipeline and the file identity its results are cached under, from one registry call
+        pipeline, identity = self.registry.get_with_identity(name)
+        self._version(name, identity)
+        model = pipeline.steps[-1][1]
+        keys = row_keys(X)
+
+        entries = [None] * len(keys)
+        missing, no_shap = [], []
+        disk_hits = 0
+        for i, key in enumerate(keys):
+            entries[i], from_disk = self._get(name, identity, key)
+            if entries[i] is None:
+                missing.append(i)
+            elif with_shap and entries[i][2] is None:
+                no_shap.append(i)
+            else:
+                disk_hits += from_disk
+        with self._lock:
+            self._misses += len(missing) + len(no_shap)
+            self._hits += len(keys) - len(missing) - len(no_shap)
+            self._disk_hits += disk_hits
+
+        todo = sorted(missing + no_shap)
+        if todo:
+            X_proc = model_input(pipeline, X.iloc[todo], compiled=self.compiled)
+            position = {row: j for j, row in enumerate(todo)}
+            if missing:
+                rows = [position[i] for i in missing]
+                prediction = np.ravel(model.predict(X_proc[rows]))
+                proba = model.predict_proba(X_proc[rows])
+                for j, i in enumerate(missing):
+                    # copies: a row view would keep the whole batch's array alive past max_entries
+                    entries[i] = (prediction[j], proba[j].copy(), None)
+                    if with_shap:
+                        # kept in memory before SHAP runs, so a model without an explainer keeps its predictions
+                        self._put(name, identity, keys[i], entries[i])
+                    else:
+                        self._store(name, identity, keys[i], entries[i])
+            if with_shap:
+                values = exact_shap(model, X_proc)
+                for j, i in enumerate(todo):
+                    entries[i] = (entries[i][0], entries[i][1], values[j].copy())
+                    self._store(name, identity, keys[i], entries[i])
+
+        return {
+            "prediction": np.array([e[0] for e in entries]),
+            "proba": np.stack([e[1] for e in entries]) if entries else np.zeros((0, len(model.classes_))),
+            "shap_values": np.stack([e[2] for e in entries]) if with_shap and entries else None,
+            "classes": list(model.classes_),
+            "cached": len(keys) - len(todo),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+        if self.disk_dir is not None:
+            shutil.rmtree(self.disk_dir, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# One cache per models directory and process, next to the registry it follows
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_result_cache(models_dir=DEFAULT_MODELS_DIR, max_entries=None, disk_dir=None, compiled=None):
+    key = os.path.abspath(models_dir)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ResultCache(get_registry(key))
+        cache = _caches[key]
+        if max_entries is not None:
+            cache.max_entries = max_entries
+        if disk_dir is not None:
+            cache.disk_dir = disk_dir
+        if compiled is not None:
+            cache.compiled = compiled
+        return cache
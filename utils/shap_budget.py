@@ -0,0 +1,303 @@
+import threading
+import time
+import weakref
+
+import numpy as np
+from sklearn.cluster import kmeans_plusplus
+from sklearn.metrics import pairwise_distances_argmin
+
+from explain import get_explainer
+from inference import map_dense
+
+
+# Rows timed once per model to estimate the cost of each mode
+PROBE_ROWS = 16
+# Share of budget_ms the exact values must end within; the rest covers the nearest-representative
+# assignment and the corrections after them
+BUDGET_SHARE = 0.85
+
+
+# --- exact and approximate attributions, (n_rows, n_features, n_classes) ---
+def _catboost_shap(model, X, calc_type):
+    from catboost import Pool
+
+    # shap_mode "Auto" switches to precalculated leaf values (a ~45 s fixed cost on the saved
+    # model, then cheap rows) only for large inputs
+    values = model.get_feature_importance(Pool(X), type="ShapValues", shap_calc_type=calc_type)
+    if values.ndim == 2:
+        values = values[:, np.newaxis, :]
+    # (n_rows, n_classes, n_features + 1), the last column is the expected value
+    return np.ascontiguousarray(values[:, :, :-1].transpose(0, 2, 1))
+
+
+def _stack(values):
+    values = np.stack(values, axis=-1) if isinstance(values, list) else np.asarray(values)
+    return values[:, :, np.newaxis] if values.ndim == 2 else values
+
+
+def _lightgbm_shap(model, X):
+    # (n_rows, n_classes * (n_features + 1)), one block per class ending with the expected value
+    values = model.predict(X, pred_contrib=True)
+    n_outputs = len(model.classes_) if len(model.classes_) > 2 else 1
+    values = values.reshape(len(X), n_outputs, -1)[:, :, :-1]
+    return np.ascontiguousarray(values.transpose(0, 2, 1))
+
+
+# Models explained by their library's own TreeSHAP rather than shap.TreeExplainer
+NATIVE_SHAP = ("CatBoostClassifier", "LGBMClassifier")
+
+
+def can_explain(model):
+    """Whether exact_shap supports the model: native TreeSHAP (CatBoost, LightGBM) or shap.TreeExplainer,
+    which handles scikit-learn gradient boosting for binary targets only and no SVM."""
+    kind = type(model).__name__
+    if kind in NATIVE_SHAP + ("XGBClassifier", "DecisionTreeClassifier", "RandomForestClassifier",
+                              "ExtraTreesClassifier"):
+        return True
+    return kind.startswith("GradientBoosting") and len(model.classes_) == 2
+
+
+def exact_shap(model, X_proc):
+    kind = type(model).__name__
+    if not can_explain(model):
+        raise ValueError(f"No SHAP explainer for {kind}")
+    if kind == "CatBoostClassifier":
+        # CatBoost's own TreeSHAP: shap.TreeExplainer on the saved model crashes the interpreter
+        return map_dense(lambda X: _catboost_shap(model, X, "Regular"), X_proc)
+    if kind == "LGBMClassifier":
+        # LightGBM's own TreeSHAP, without building a shap explainer
+        return map_dense(lambda X: _lightgbm_shap(model, X), X_proc)
+    return map_dense(lambda X: _stack(get_explainer(model).shap_values(X)), X_proc)
+
+
+def can_approximate(model):
+    return type(model).__name__ in ("CatBoostClassifier", "XGBClassifier", "DecisionTreeClassifier",
+                                    "RandomForestClassifier", "ExtraTreesClassifier")
+
+
+def approximate_shap(model, X_proc):
+    """Path attribution (Saabas): each split credits its feature with the change of the node value."""
+    if type(model).__name__ == "CatBoostClassifier":
+        return map_dense(lambda X: _catboost_shap(model, X, "Approximate"), X_proc)
+    if not can_approximate(model):
+        raise ValueError(f"No approximate attribution for {type(model).__name__}")
+    return map_dense(lambda X: _stack(get_explainer(model).shap_values(X, approximate=True)), X_proc)
+
+
+def raw_margin(model, X_proc):
+    """Model output in the space the SHAP values add up to, (n_rows, n_classes)."""
+    kind = type(model).__name__
+    if kind == "CatBoostClassifier":
+        margin = model.predict(X_proc, prediction_type="RawFormulaVal")
+    elif kind == "LGBMClassifier":
+        margin = model.predict(X_proc, raw_score=True)
+    elif kind == "XGBClassifier":
+        margin = model.predict(X_proc, output_margin=True)
+    elif hasattr(model, "decision_function") and kind.startswith("GradientBoosting"):
+        margin = model.decision_function(X_proc)
+    else:
+        margin = model.predict_proba(X_proc)
+    margin = np.asarray(margin, dtype=np.float64)
+    return margin[:, np.newaxis] if margin.ndim == 1 else margin
+
+
+# --- per-model cost estimates, probed once and dropped with the model ---
+_costs = {}
+_costs_lock = threading.Lock()
+
+def costs_ms(model, X_proc):
+    """{"exact": (fixed ms, ms per row), "approximate": (fixed, per row) or None}, timed on PROBE_ROWS rows."""
+    key = id(model)
+    with _costs_lock:
+        if key in _costs:
+            return _costs[key]
+
+    probe = X_proc[:PROBE_ROWS]
+    exact_shap(model, probe[:1])        # explainer construction is not part of the cost
+    costs = {"exact": _fit_cost(exact_shap, model, probe), "approximate": None}
+    if can_approximate(model):
+        costs["approximate"] = _fit_cost(approximate_shap, model, probe)
+
+    with _costs_lock:
+        _costs[key] = costs
+        weakref.finalize(model, _costs.pop, key, None)
+    return costs
+
+
+def _time_ms(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def _fit_cost(fn, model, probe):
+    # a per-call overhead plus a per-row cost, from one row and the whole probe
+    one = _time_ms(fn, model, probe[:1])
+    many = _time_ms(fn, model, probe)
+    per_row = max(many - one, 0.0) / max(probe.shape[0] - 1, 1)
+    return max(one - per_row, 0.0), per_row
+
+
+def _cost(cost, n_rows):
+    return cost[0] + n_rows * cost[1] if n_rows else 0.0
+
+
+def representatives(X_proc, k, random_state=0):
+    """Positions of k spread-out rows (k-means++ seeding, sparse input kept sparse), in the
+    order they were picked: any prefix is itself a k-means++ seeding."""
+    k = min(k, X_proc.shape[0])
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    _, idx = kmeans_plusplus(X_proc.astype(np.float64), k, random_state=random_state)
+    _, first = np.unique(idx, return_index=True)
+    return idx[np.sort(first)]
+
+
+def _exact_until(model, X_proc, reps, cost, deadline, at_least=0):
+    """Exact values of a prefix of reps, computed in chunks that are expected to end before
+    deadline (perf_counter seconds, None for no deadline); the last chunk is cut to what fits.
+    The per-row cost is re-measured on every chunk. Returns (the reps done, their values)."""
+    chunk = max(1, len(reps) // 4)
+    fixed, per_row = cost
+    done, n_done = [], 0
+    while n_done < len(reps):
+        n = min(chunk, len(reps) - n_done)
+        if deadline is not None and n_done >= at_least:
+            fit = int(((deadline - time.perf_counter()) * 1000 - fixed) / max(per_row, 1e-6))
+            if fit < 1:
+                break
+            n = min(n, fit)
+        start = time.perf_counter()
+        done.append(exact_shap(model, X_proc[reps[n_done:n_done + n]]))
+        per_row = max((time.perf_counter() - start) * 1000 - fixed, 0.0) / n
+        n_done += n
+    return reps[:n_done], np.concatenate(done) if done else None
+
+
+def _differs(X_proc, rows):
+    """(row, column) positions where row i differs from row rows[i]; sparse input is compared as CSR."""
+    if hasattr(X_proc, "tocsr"):
+        diff = (X_proc.tocsr() - X_proc[rows]).tocsr()
+        diff.eliminate_zeros()
+        return diff.nonzero()
+    return np.nonzero(X_proc != X_proc[rows])
+
+
+# --- budgeted explanation ---
+def budgeted_shap(model, X_proc, budget_ms=None, max_rows=None, mode="auto", random_state=0):
+    """SHAP values for every row within a latency (budget_ms) and/or exact-row (max_rows) budget.
+
+    Modes, from most to least faithful:
+      "exact"        TreeSHAP on every row
+      "hybrid"       approximate attribution on every row, calibrated with exact values of k
+                     representative rows: a least-squares scale per (feature, class), bounded to
+                     [0, 1], shrinks approximate towards exact values, then the nearest
+                     representative's remaining error is added on the features where the row has
+                     the representative's value
+      "sampled"      models without an approximate method: exact values of k representatives copied
+                     to their nearest rows, the missing output (margin_i - margin_r) spread over the
+                     features where the row differs, so the values still add up to the model output
+      "approximate"  the approximate attribution alone (hybrid with k = 0)
+    "auto" picks exact when it fits the budget, otherwise hybrid (or sampled) with as many
+    representatives as fit. The exact values of representatives stop at BUDGET_SHARE of budget_ms,
+    whatever the cost estimates said. Returns (values of shape (n_rows, n_features, n_classes), info).
+    """
+    n_rows = X_proc.shape[0]
+    start = time.perf_counter()
+    costs = costs_ms(model, X_proc)
+    probe_ms = (time.perf_counter() - start) * 1000
+    approximate = costs["approximate"] is not None
+
+    if mode == "auto":
+        fits = ((budget_ms is None or _cost(costs["exact"], n_rows) <= budget_ms * BUDGET_SHARE)
+                and (max_rows is None or n_rows <= max_rows))
+        mode = "exact" if fits else ("hybrid" if approximate else "sampled")
+    if mode in ("hybrid", "approximate") and not approximate:
+        raise ValueError(f"No approximate attribution for {type(model).__name__}, use mode='sampled'")
+
+    # probe_ms: the one-time cost probe (and explainer construction) on the first call for a model
+    info = {"mode": mode, "rows": n_rows, "probe_ms": probe_ms, "estimated_ms": {name: _cost(cost, n_rows) if cost else None
+                                                            for name, cost in costs.items()}}
+    if mode == "exact":
+        values = exact_shap(model, X_proc)
+        info["exact_rows"] = n_rows
+        info["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        return values, info
+
+    # the pass over every row runs first, so the plan below sees its measured time, not an estimate
+    if approximate:
+        values = approximate_shap(model, X_proc)
+    elif mode == "sampled":
+        margin = raw_margin(model, X_proc)
+
+    # representatives: whatever budget is left, k-means++ seeding included; the exact values
+    # then stop at the deadline whatever the estimate said
+    reps = np.zeros(0, dtype=np.intp)
+    if mode != "approximate":
+        deadline = start + budget_ms * BUDGET_SHARE / 1000 if budget_ms is not None else None
+        fixed, per_row = costs["exact"]
+        k = n_rows
+        if deadline is not None:
+            left = (deadline - time.perf_counter()) * 1000 - fixed
+            k = int(max(left, 0) / max(per_row, 1e-6))
+        if max_rows is not None:
+            k = min(k, max_rows)
+        k = max(min(k, n_rows), 1 if mode == "sampled" else 0)
+        reps = representatives(X_proc, k, random_state=random_state)
+        reps, exact = _exact_until(model, X_proc, reps, costs["exact"], deadline,
+                                   at_least=1 if mode == "sampled" else 0)
+
+    if approximate:
+        if len(reps):
+            approx_reps = values[reps]
+            # Path attribution over-credits more often than not. Fitted on a few representatives, an
+            # unbounded scale also inflates rows with larger values than any representative (max error
+            # 0.43 -> 0.76 on CatBoost with 7 representatives); shrinking only never does.
+            scale = (exact * approx_reps).sum(axis=0) / np.maximum((approx_reps ** 2).sum(axis=0), 1e-12)
+            scale = np.clip(scale, 0.0, 1.0)
+            values *= scale
+
+            nearest_i = pairwise_distances_argmin(X_proc, X_proc[reps])
+            correction = (exact - approx_reps * scale)[nearest_i]
+            rows, cols = _differs(X_proc, reps[nearest_i])
+            correction[rows, cols] = 0.0
+            values += correction
+    else:
+        nearest_i = pairwise_distances_argmin(X_proc, X_proc[reps])
+        nearest = reps[nearest_i]
+        values = exact[nearest_i].copy()
+        rows, cols = _differs(X_proc, nearest)
+        n_differ = np.bincount(rows, minlength=n_rows)
+        values[rows, cols] += (margin - margin[nearest])[rows] / n_differ[rows, np.newaxis]
+
+    info["mode"] = "approximate" if mode == "hybrid" and not len(reps) else mode
+    info["exact_rows"] = len(reps)
+    info["elapsed_ms"] = (time.perf_counter() - start) * 1000
+    return values, info
+
+
+# --- fidelity against exact values (e.g. the shap_output/ artifacts) ---
+def fidelity(values, exact, k=5):
+    """How close values are to exact, both (n_rows, n_features, n_classes)."""
+    values, exact = _stack(values), _stack(exact)
+    if values.shape != exact.shape:
+        raise ValueError(f"Shape mismatch: {values.shape} vs {exact.shape}")
+    error = np.abs(values - exact)
+
+    # per (row, class): share of the exact top-k features (by |SHAP|) also in the approximate top-k
+    top_exact = np.argsort(-np.abs(exact), axis=1, kind="stable")[:, :k, :]
+    top_values = np.argsort(-np.abs(values), axis=1, kind="stable")[:, :k, :]
+    hits = (top_exact[:, :, np.newaxis, :] == top_values[:, np.newaxis, :, :]).any(axis=2)
+
+    # global ranking of mean |SHAP| per feature, summed over classes
+    importance = lambda v: np.abs(v).mean(axis=0).sum(axis=1)
+    rank = lambda v: np.argsort(np.argsort(v))
+    rank_corr = np.corrcoef(rank(importance(values)), rank(importance(exact)))[0, 1]
+
+    return {
+        "relative_l1": float(error.sum() / np.abs(exact).sum()),
+        "mean_abs_error": float(error.mean()),
+        "max_abs_error": float(error.max()),
+        f"top{k}_recall": float(hits.mean()),
+        "importance_rank_corr": float(rank_corr),
+    }
@@ -0,0 +1,92 @@
+import re
+import threading
+import weakref
+
+import numpy as np
+from scipy import sparse
+
+
+# Same grouping as the notebook: one-hot columns back to their source feature,
+# transformer prefixes dropped ("oh__Course_9500" -> "Course", "num__Age" -> "Age")
+def get_group_name(col):
+    if col.startswith("oh__"):
+        match = re.match(r"oh__([A-Za-z0-9_]+?)_\d+$", col)
+        if match:
+            return match.group(1)
+        else:
+            return col.replace("oh__", "")
+    elif "__" in col:
+        return col.split("__")[1]
+    else:
+        return col
+
+
+class FeatureGroups:
+    """Sparse (n_features x n_groups) 0/1 membership matrix of output features in groups.
+
+    Summing SHAP values (or input values) by group is then one matrix product
+    over all rows and classes instead of a loop over groups and columns.
+    """
+
+    def __init__(self, feature_names, group_fn=get_group_name):
+        self.feature_names = np.asarray(feature_names, dtype=object)
+
+        # groups in first-seen order, as the notebook's defaultdict
+        group_of = [group_fn(str(name)) for name in self.feature_names]
+        index = {}
+        codes = np.array([index.setdefault(g, len(index)) for g in group_of], dtype=np.intp)
+        self.names = np.array(list(index), dtype=object)
+
+        n_features = len(codes)
+        self.membership = sparse.csr_matrix(
+            (np.ones(n_features), (np.arange(n_features), codes)),
+            shape=(n_features, len(self.names)))
+        self.sizes = np.bincount(codes, minlength=len(self.names))
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.names)
+
+    def indices(self):
+        """{group: [feature positions]}"""
+        return {name: np.flatnonzero(self.codes == g).tolist() for g, name in enumerate(self.names)}
+
+    def aggregate(self, values, reduce="sum"):
+        """Sum (or mean) of `values` by group along the feature axis.
+
+        values: (n_features,), (n_rows, n_features) or (n_rows, n_features, n_classes),
+        dense or (2-D) sparse; the result has n_groups in place of n_features.
+        A single row with classes must keep its row axis: (1, n_features, n_classes).
+        """
+        if sparse.issparse(values):
+            values = values.toarray()
+        values = np.asarray(values, dtype=np.float64)
+        axis = 1 if values.ndim > 1 else 0
+        if values.shape[axis] != len(self.codes):
+            raise ValueError(f"Expected {len(self.codes)} features, got array of shape {values.shape}")
+
+        # move features first and flatten the rest: one sparse product for all rows and classes
+        moved = np.moveaxis(values, axis, 0)
+        flat = moved.reshape(len(self.codes), -1)
+        grouped = (self.membership.T @ flat).reshape((len(self.names),) + moved.shape[1:])
+        if reduce == "mean":
+            grouped /= self.sizes.reshape((-1,) + (1,) * (grouped.ndim - 1))
+        elif reduce != "sum":
+            raise ValueError(f"Unknown reduce {reduce!r}, expected 'sum' or 'mean'")
+        return np.moveaxis(grouped, 0, axis)
+
+
+# --- one FeatureGroups per fitted preprocessor ---
+_groups = {}
+_groups_lock = threading.Lock()
+
+def groups_for(preprocessor, group_fn=get_group_name):
+    key = (id(preprocessor), group_fn)
+    with _groups_lock:
+        groups = _groups.get(key)
+        if groups is None:
+            groups = FeatureGroups(preprocessor.get_feature_names_out(), group_fn)
+            _groups[key] = groups
+            # drop the entry together with the preprocessor (e.g. after a registry reload)
+            weakref.finalize(preprocessor, _groups.pop, key, None)
+        return groups
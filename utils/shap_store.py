@@ -0,0 +1,241 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from shap_groups import FeatureGroups, get_group_name
+
+
+DEFAULT_SHAP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shap_output")
+FORMAT_VERSION = 1
+# Rows of the model input written to data.npy at a time
+DATA_CHUNK_ROWS = 4096
+
+# Layout of a store directory (one per model, e.g. shap_output/rf/):
+#   meta.json              feature names, classes, shapes, expected values
+#   row_ids.npy            original row id of every stored row
+#   rows_<k>.npy           SHAP values of class k, (n_rows, n_features): one student is contiguous
+#   cols_<k>.npy           same values transposed, (n_features, n_rows): one feature is contiguous
+#   data.npy               model input matrix the values explain, (n_rows, n_features)
+
+
+def write_store(path, values, feature_names, data=None, row_ids=None, classes=None, expected_value=None):
+    """Write SHAP values of shape (n_rows, n_features, n_classes) as a store directory."""
+    # older shap versions return one (n_rows, n_features) array per class
+    values = np.stack(values, axis=-1) if isinstance(values, list) else np.asarray(values)
+    if values.ndim == 2:
+        values = values[:, :, np.newaxis]
+    n_rows, n_features, n_classes = values.shape
+    feature_names = [str(f) for f in feature_names]
+    if len(feature_names) != n_features:
+        raise ValueError(f"Got {len(feature_names)} feature names for {n_features} SHAP columns")
+
+    row_ids = np.arange(n_rows) if row_ids is None else np.asarray(row_ids)
+    if len(row_ids) != n_rows:
+        raise ValueError(f"Got {len(row_ids)} row ids for {n_rows} SHAP rows")
+    if len(np.unique(row_ids)) != n_rows:
+        raise ValueError("Row ids must be unique")
+    classes = list(range(n_classes)) if classes is None else list(classes)
+
+    os.makedirs(path, exist_ok=True)
+    for k in range(n_classes):
+        np.save(os.path.join(path, f"rows_{k}.npy"), np.ascontiguousarray(values[:, :, k]))
+        np.save(os.path.join(path, f"cols_{k}.npy"), np.ascontiguousarray(values[:, :, k].T))
+    np.save(os.path.join(path, "row_ids.npy"), row_ids)
+    if data is not None:
+        # sparse preprocessing output is written block by block, never densified whole
+        if not hasattr(data, "toarray"):
+            data = np.asarray(data, dtype=np.float64)
+        if data.shape != (n_rows, n_features):
+            raise ValueError(f"Data shape {data.shape} does not match SHAP values {(n_rows, n_features)}")
+        out = np.lib.format.open_memmap(os.path.join(path, "data.npy"), mode="w+", dtype=np.float64,
+                                        shape=(n_rows, n_features))
+        for start in range(0, n_rows, DATA_CHUNK_ROWS):
+            block = data[start:start + DATA_CHUNK_ROWS]
+            out[start:start + DATA_CHUNK_ROWS] = block.toarray() if hasattr(block, "toarray") else block
+        out.flush()
+        del out
+
+    meta = {
+        "version": FORMAT_VERSION,
+        "n_rows": n_rows,
+        "n_features": n_features,
+        "classes": [c.item() if hasattr(c, "item") else c for c in classes],
+        "feature_names": feature_names,
+        "expected_value": None if expected_value is None else np.ravel(expected_value).tolist(),
+        "has_data": data is not None,
+    }
+    # meta.json last: a directory without it is an incomplete write
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return ShapStore(path)
+
+
+class ShapStore:
+    """Read-only view of a SHAP store directory.
+
+    Arrays are opened with mmap_mode="r" on first use, so looking up one
+    student reads one row of each class file and looking up one feature reads
+    one row of the transposed files; the rest of the values are never paged in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.n_rows = self.meta["n_rows"]
+        self.n_features = self.meta["n_features"]
+        self.classes = self.meta["classes"]
+        self.feature_names = np.array(self.meta["feature_names"], dtype=object)
+        self.expected_value = self.meta["expected_value"]
+        self._feature_index = {name: i for i, name in enumerate(self.meta["feature_names"])}
+        self._arrays = {}
+
+    def _open(self, name):
+        array = self._arrays.get(name)
+        if array is None:
+            array = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+            self._arrays[name] = array
+        return array
+
+    def _class_index(self, cls):
+        if cls not in self.classes:
+            raise KeyError(f"Unknown class {cls!r}, store has {self.classes}")
+        return self.classes.index(cls)
+
+    # --- row-id index ---
+    @property
+    def row_ids(self):
+        return self._open("row_ids")
+
+    def positions(self, row_ids):
+        """Positions of the given original row ids (KeyError for unknown ids)."""
+        if "_order" not in self._arrays:
+            self._arrays["_order"] = np.argsort(self.row_ids, kind="stable")
+        order = self._arrays["_order"]
+        sorted_ids = self.row_ids[order]
+
+        wanted = np.atleast_1d(np.asarray(row_ids))
+        idx = np.searchsorted(sorted_ids, wanted)
+        found = idx < len(sorted_ids)
+        found[found] = sorted_ids[idx[found]] == wanted[found]
+        if not found.all():
+            raise KeyError(f"Unknown row ids: {wanted[~found].tolist()}")
+        return order[idx]
+
+    # --- per-class arrays ---
+    def values(self, cls):
+        """(n_rows, n_features) memmap of the SHAP values of one class."""
+        return self._open(f"rows_{self._class_index(cls)}")
+
+    def feature_values(self, cls):
+        """(n_features, n_rows) memmap of the SHAP values of one class, feature-major."""
+        return self._open(f"cols_{self._class_index(cls)}")
+
+    @property
+    def data(self):
+        if not self.meta["has_data"]:
+            raise FileNotFoundError(f"No model input data stored in {self.path}")
+        return self._open("data")
+
+    # --- lookups ---
+    def student(self, row_id):
+        """SHAP values of one student as a (feature x class) DataFrame."""
+        pos = self.positions(row_id)[0]
+        return pd.DataFrame({cls: np.asarray(self.values(cls)[pos]) for cls in self.classes},
+                            index=self.feature_names)
+
+    def feature(self, name, cls=None):
+        """SHAP values of one feature for every row: a Series for one class, a DataFrame for all."""
+        j = self._feature_index[name]
+        if cls is not None:
+            return pd.Series(np.asarray(self.feature_values(cls)[j]), index=self.row_ids, name=name)
+        return pd.DataFrame({c: np.asarray(self.feature_values(c)[j]) for c in self.classes},
+                            index=self.row_ids)
+
+    # --- out-of-core aggregation ---
+    def _chunks(self, chunk_rows):
+        for start in range(0, self.n_rows, chunk_rows):
+            yield slice(start, min(start + chunk_rows, self.n_rows))
+
+    def mean_abs(self, chunk_rows=4096):
+        """Mean |SHAP| per feature and class, read chunk by chunk."""
+        result = {}
+        for cls in self.classes:
+            values = self.values(cls)
+            total = np.zeros(self.n_features)
+            for rows in self._chunks(chunk_rows):
+                total += np.abs(values[rows]).sum(axis=0)
+            result[cls] = total / max(self.n_rows, 1)
+        return pd.DataFrame(result, index=self.feature_names)
+
+    def groups(self, group_fn=get_group_name):
+        return FeatureGroups(self.feature_names, group_fn)
+
+    def grouped_mean_abs(self, group_fn=get_group_name, chunk_rows=4096):
+        """Mean |SHAP| per feature group and class, as plot_shap_aggregated in the notebook."""
+        groups = self.groups(group_fn)
+        per_feature = self.mean_abs(chunk_rows=chunk_rows)
+        # the notebook averages |SHAP| over a group's columns, then over rows: same as this
+        grouped = groups.aggregate(per_feature.to_numpy().T, reduce="mean").T
+        return pd.DataFrame(grouped, index=groups.names, columns=per_feature.columns)
+
+    def aggregate(self, cls, group_fn=get_group_name, rows=None, chunk_rows=4096):
+        """Per-row SHAP values (and input data) summed by feature group, as aggregate_shap in the notebook.
+
+        Returns (agg_shap, agg_feat) DataFrames; agg_feat is None when the store
+        holds no input data. `rows` restricts the result to some original row ids.
+        """
+        groups = self.groups(group_fn)
+        positions = np.arange(self.n_rows) if rows is None else self.positions(rows)
+        sources = [self.values(cls)] + ([self.data] if self.meta["has_data"] else [])
+
+        outputs = []
+        for source in sources:
+            out = np.empty((len(positions), len(groups)))
+            for start in range(0, len(positions), chunk_rows):
+                out[start:start + chunk_rows] = groups.aggregate(source[positions[start:start + chunk_rows]])
+            outputs.append(pd.DataFrame(out, index=self.row_ids[positions], columns=groups.names))
+        return outputs[0], (outputs[1] if len(outputs) > 1 else None)
+
+
+# --- existing shap_output/ artifacts (shap_values_<tag>.joblib, X_shap_<tag>.csv, feature_names_<tag>.npy) ---
+
+def legacy_paths(tag, shap_dir=DEFAULT_SHAP_DIR):
+    return {
+        "values": os.path.join(shap_dir, f"shap_values_{tag}.joblib"),
+        "data": os.path.join(shap_dir, f"X_shap_{tag}.csv"),
+        "feature_names": os.path.join(shap_dir, f"feature_names_{tag}.npy"),
+        "explainer": os.path.join(shap_dir, f"shap_explainer_{tag}.joblib"),
+    }
+
+
+def convert_legacy(tag, shap_dir=DEFAULT_SHAP_DIR, out_dir=None, classes=None, row_ids=None):
+    """Convert the joblib/CSV artifacts of one model (e.g. "rf", "cb") to a store directory."""
+    paths = legacy_paths(tag, shap_dir)
+    values = joblib.load(paths["values"])
+    if isinstance(values, list):
+        values = np.stack(values, axis=-1)
+    feature_names = np.load(paths["feature_names"], allow_pickle=True)
+    data = pd.read_csv(paths["data"]).to_numpy(dtype=np.float64) if os.path.exists(paths["data"]) else None
+
+    expected_value = None
+    if os.path.exists(paths["explainer"]):
+        expected_value = getattr(joblib.load(paths["explainer"]), "expected_value", None)
+
+    return write_store(out_dir or os.path.join(shap_dir, tag), values, feature_names, data=data,
+                       row_ids=row_ids, classes=classes, expected_value=expected_value)
+
+
+def open_store(tag, shap_dir=DEFAULT_SHAP_DIR):
+    """Open shap_output/<tag>/, converting the legacy artifacts first if needed."""
+    path = os.path.join(shap_dir, tag)
+    meta = os.path.join(path, "meta.json")
+    legacy = legacy_paths(tag, shap_dir)["values"]
+    stale = os.path.exists(legacy) and (
+        not os.path.exists(meta) or os.path.getmtime(legacy) > os.path.getmtime(meta))
+    if stale:
+        return convert_legacy(tag, shap_dir)
+    return ShapStore(path)
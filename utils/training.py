@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import pandas as pd
+from catboost import CatBoostClassifier
+from imblearn.over_sampling import SMOTE
+from imblearn.pipeline import Pipeline as ImbPipeline
+from joblib import Memory
+from lightgbm import LGBMClassifier
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa
+from sklearn.metrics import balanced_accuracy_score, classification_report, f1_score, roc_auc_score
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold, train_test_split
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+from xgboost import XGBClassifier
+
+from FeatTransformer import FeatTransformer
+from data_loader import DATA_CLEANED_PATH, DEFAULT_CACHE_DIR, load_dataset
+from preprocessing import preprocessor
+from schema import label_mapping
+from sparse_neighbors import DenseIndexNeighbors
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Same data preparation as notebook/main.ipynb, on the typed (and cached) dataset
+def load_training_data(path=DATA_CLEANED_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    X, y = prepare_features(load_dataset(path, cache_dir=cache_dir))
+    return train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+
+# Features and encoded target of a typed dataset (load_dataset layout, with Target)
+def prepare_features(df):
+    df = df.copy()
+
+    # encode target variable: 0: dropout, 1: enrolled, 2: graduated
+    # (fixed codes, same as LabelEncoder on the full dataset, so a cohort missing a class encodes the same way)
+    codes = {label: code for code, label in label_mapping.items()}
+    target = df['Target'].astype(str).map(codes)
+    if target.isna().any():
+        unknown = sorted({str(label) for label in df['Target'][target.isna()]})
+        raise ValueError(f"Unknown Target labels {unknown}, expected {sorted(codes)}")
+    df['Target_encoded'] = target.astype(int)
+    df.drop('Target', axis=1, inplace=True)
+
+    col = ['Marital_status', 'Application_mode', 'Course', 'Previous_qualification',
+           'Mother_qualification', 'Father_qualification', 'Mother_occupation',
+           'Father_occupation', 'Target_encoded']
+    df[col] = df[col].astype('category')
+
+    stud_selected = df.drop(['Nationality', 'International', 'Educational_special_needs', 'Marital_status', 'Inflation_rate'], axis=1)
+
+    X = stud_selected.drop('Target_encoded', axis=1)
+    y = stud_selected['Target_encoded']
+    return X, y
+
+
+# Models and refined hyperparameter grids
+def get_estimators_and_grids():
+    estimators = {
+        'decision_tree': DecisionTreeClassifier(random_state=42, class_weight='balanced'),
+        'random_forest': RandomForestClassifier(random_state=42, class_weight='balanced'),
+        'svm': SVC(probability=True, random_state=42),
+        'gradient_boosting': GradientBoostingClassifier(random_state=42),
+        'xgboost': XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42),
+        'lightgbm': LGBMClassifier(random_state=42),
+        'catboost': CatBoostClassifier(verbose=0, random_state=42, allow_writing_files=False)
+    }
+
+    param_grids = {
+        'decision_tree': {
+            'model__max_depth': [None, 5, 10, 15],
+            'model__min_samples_split': [2, 5, 10],
+            'model__min_samples_leaf': [1, 2, 4]
+        },
+        'random_forest': {
+            'model__n_estimators': [100, 200, 300],
+            'model__max_depth': [None, 10, 20],
+            'model__max_features': ['sqrt', 'log2']
+        },
+        'svm': {
+            'model__C': [0.1, 1, 10],
+            'model__kernel': ['linear', 'rbf'],
+            'model__gamma': ['scale', 'auto']
+        },
+        'gradient_boosting': {
+            'model__n_estimators': [100, 200],
+            'model__learning_rate': [0.01, 0.1],
+            'model__max_depth': [3, 5]
+        },
+        'xgboost': {
+            'model__n_estimators': [100, 200],
+            'model__learning_rate': [0.01, 0.1],
+            'model__max_depth': [3, 5],
+            'model__subsample': [0.8, 1]
+        },
+        'lightgbm': {
+            'model__n_estimators': [100, 200],
+            'model__learning_rate': [0.01, 0.1],
+            'model__num_leaves': [31, 50],
+            'model__max_depth': [-1, 5]
+        },
+        'catboost': {
+            'model__iterations': [100, 200],
+            'model__learning_rate': [0.01, 0.1],
+            'model__depth': [6, 10]
+        }
+    }
+    return estimators, param_grids
+
+
+# --- per-fold cache of the fitted feature_transformer / preprocessing / smote steps ---
+
+def _fingerprint(value):
+    # pandas objects are hashed row-wise in C; joblib.hash would pickle them object by object
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        rows = pd.util.hash_pandas_object(frame, index=True).to_numpy()
+        return ("frame", tuple(frame.columns), tuple(map(str, frame.dtypes)), joblib.hash(rows))
+    return joblib.hash(value)
+
+
+def _keyed_call(key, func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+# In-memory tier of every FoldCache, per cache location and process. It cannot live on the
+# instance: the search clone()s the pipeline, and with it the FoldCache, for every candidate.
+_recent = {}     # location -> OrderedDict(key -> result)
+_recent_lock = threading.Lock()
+
+
+class FoldCache:
+    """Pipeline(memory=...) store keyed by step parameters and training fold content.
+
+    Drop-in for joblib.Memory: the fitted transformer/SMOTE output of a fold is
+    computed once and shared by every candidate and every model fitted on the
+    same rows. Results live on disk (shared across processes and runs) and the
+    most recent ones also in memory, per location and process, so a worker does
+    not unpickle them again for every candidate. The key uses a fast row hash
+    instead of joblib's pickle-based hashing of whole DataFrames.
+    """
+
+    def __init__(self, location, max_in_memory=32):
+        self.location = location
+        self.max_in_memory = max_in_memory
+        self._memory = Memory(location, verbose=0)
+        self._cached_call = self._memory.cache(_keyed_call, ignore=["func", "args", "kwargs"])
+
+    def cache(self, func):
+        def cached(*args, **kwargs):
+            params = {k: v for k, v in kwargs.items() if k not in ("message_clsname", "message")}
+            key = joblib.hash((func.__module__, func.__qualname__,
+                               tuple(_fingerprint(a) for a in args),
+                               tuple((k, _fingerprint(v)) for k, v in sorted(params.items()))))
+            with _recent_lock:
+                recent = _recent.setdefault(os.path.abspath(self.location), OrderedDict())
+                if key in recent:
+                    recent.move_to_end(key)
+                    return recent[key]
+
+            result = self._cached_call(key, func, args, kwargs)
+            with _recent_lock:
+                recent[key] = result
+                while len(recent) > self.max_in_memory:
+                    recent.popitem(last=False)
+            return result
+        return cached
+
+
+# Build the imbalanced-learn pipeline (memory: a FoldCache, a joblib.Memory or None)
+def build_pipeline(model, memory=None):
+    steps = [
+        ('feature_transformer', FeatTransformer(drop_originals=True)),
+        ('preprocessing', preprocessor),
+        # SMOTE's default 5 neighbours (+1, the row itself), searched without densifying the whole CSR input
+        ('smote', SMOTE(random_state=42, k_neighbors=DenseIndexNeighbors(n_neighbors=6))),
+        ('model', model)
+    ]
+    return ImbPipeline(steps, memory=memory)
+
+
+# Tuning, evaluation, and saving function
+def tune_and_evaluate(name, estimator, param_grid, data, n_jobs=-1, cache_dir=None,
+                      models_dir=os.path.join(ROOT_DIR, "models")):
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    X_train, X_test, y_train, y_test = data
+
+    start = time.perf_counter()
+    memory = FoldCache(cache_dir) if cache_dir else None
+    pipeline = build_pipeline(estimator, memory=memory)
+
+    # Cross-validation strategy
+    cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
+    search = HalvingGridSearchCV(
+        estimator=pipeline,
+        param_grid=param_grid,
+        cv=cv,
+        scoring='f1_macro',
+        factor=2,
+        random_state=42,
+        verbose=0,
+        n_jobs=n_jobs
+    )
+    search.fit(X_train, y_train)
+    best = search.best_estimator_
+    # the cache location is not part of the model
+    best.set_params(memory=None)
+
+    # Evaluate on test set
+    y_pred = best.predict(X_test)
+    y_prob = best.predict_proba(X_test)
+
+    metrics = {
+        'balanced_accuracy': balanced_accuracy_score(y_test, y_pred),
+        'f1_macro': f1_score(y_test, y_pred, average='macro'),
+        'roc_auc_macro': roc_auc_score(pd.get_dummies(y_test), y_prob, average='macro')
+    }
+    report = classification_report(y_test, y_pred, output_dict=True)
+    per_class_f1 = {cls: report[cls]['f1-score'] for cls in report if cls not in ['accuracy', 'macro avg', 'weighted avg']}
+    metrics['per_class_f1'] = per_class_f1
+
+    # Save best model
+    if models_dir:
+        joblib.dump(best, os.path.join(models_dir, f"best_model_{name}.joblib"))
+
+    wall_time = time.perf_counter() - start
+    return name, metrics, search.best_params_, wall_time
+
+
+def train_models(names=None, cores=None, parallel_models=None, cache_dir=None,
+                 models_dir=os.path.join(ROOT_DIR, "models"), data=None):
+    """Tune every model in `names` and return (results DataFrame, wall times per model).
+
+    `cores` is the global core budget: up to `parallel_models` searches run in
+    separate processes, each with n_jobs = cores // parallel_models.
+    """
+    estimators, grids = get_estimators_and_grids()
+    names = names or list(estimators)
+    data = data if data is not None else load_training_data()
+
+    cores = cores or os.cpu_count() or 1
+    parallel_models = max(1, min(parallel_models or cores, len(names), cores))
+    n_jobs = max(1, cores // parallel_models)
+
+    results, wall_times = {}, {}
+
+    def collect(name, metrics, best_params, wall_time):
+        print(f"{name}: {wall_time:.1f}s, best params: {best_params}")
+        results[name] = metrics
+        wall_times[name] = wall_time
+
+    if parallel_models == 1:
+        for name in names:
+            collect(*tune_and_evaluate(name, estimators[name], grids[name], data,
+                                       n_jobs=n_jobs, cache_dir=cache_dir, models_dir=models_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=parallel_models) as pool:
+            futures = [pool.submit(tune_and_evaluate, name, estimators[name], grids[name], data,
+                                   n_jobs=n_jobs, cache_dir=cache_dir, models_dir=models_dir)
+                       for name in names]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    # keep the requested model order in the report
+    results_df = pd.DataFrame({name: results[name] for name in names}).T
+    return results_df, {name: wall_times[name] for name in names}
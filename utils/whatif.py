@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from explain import top_features
+from inference import transform_for_model
+from schema import categorical_features, encode_student, label_mapping, numerical_features
+from shap_budget import exact_shap
+from shap_groups import groups_for
+
+
+# Largest grid sweep() expands without being asked for more
+MAX_SCENARIOS = 100_000
+
+# Codes accepted for every categorical feature, from the form options ("17 - 2nd phase ..." -> 17)
+CATEGORY_CODES = {feature: {int(option.split(" - ")[0]) for option in options}
+                  for feature, options in categorical_features.items()}
+
+# Semester grades are on the 0-20 scale
+MAX_GRADE = 20.0
+
+
+def feasible(X):
+    """Rows a real student could have: non-negative unit counts, approved <= enrolled, grades in 0-20."""
+    ok = np.ones(len(X), dtype=bool)
+    for sem in ("1st", "2nd"):
+        prefix = f"Curricular_units_{sem}_sem_"
+        for count in ("credited", "enrolled", "evaluations", "approved", "without_evaluations"):
+            ok &= X[prefix + count].to_numpy() >= 0
+        ok &= X[prefix + "approved"].to_numpy() <= X[prefix + "enrolled"].to_numpy()
+        grade = X[prefix + "grade"].to_numpy()
+        ok &= (grade >= 0) & (grade <= MAX_GRADE)
+    return ok
+
+
+def _axes(student, changes, deltas):
+    """[(feature, values, labels)] per changed feature; values[0] is the student's own value."""
+    changes, deltas = changes or {}, deltas or {}
+    both = set(changes) & set(deltas)
+    if both:
+        raise ValueError(f"Features given both as changes and deltas: {sorted(both)}")
+
+    axes = []
+    for feature, options in changes.items():
+        if feature in categorical_features:
+            try:
+                values = [int(str(v).split(" - ")[0]) for v in options]
+            except ValueError:
+                raise ValueError(f"Invalid input for {feature}")
+            unknown = sorted(set(values) - CATEGORY_CODES[feature])
+            if unknown:
+                raise ValueError(f"Unknown codes for {feature}: {unknown}")
+        elif feature in numerical_features:
+            try:
+                values = [float(v) for v in options]
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid numeric value for {feature}")
+        else:
+            raise ValueError(f"Unknown feature {feature!r}")
+        values = [v for v in dict.fromkeys(values) if v != student[feature]]
+        axes.append((feature, [student[feature]] + values,
+                     [""] + [f"{feature} {student[feature]:g}->{v:g}" for v in values]))
+
+    for feature, steps in deltas.items():
+        if feature not in numerical_features:
+            raise ValueError(f"Deltas only apply to numerical features, got {feature!r}")
+        try:
+            steps = [float(d) for d in steps]
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid numeric delta for {feature}")
+        steps = [d for d in dict.fromkeys(steps) if d != 0]
+        axes.append((feature, [student[feature]] + [student[feature] + d for d in steps],
+                     [""] + [f"{feature} {d:+g}" for d in steps]))
+    return axes
+
+
+def scenario_grid(record, changes=None, deltas=None, max_scenarios=MAX_SCENARIOS, feasible_only=True):
+    """Every combination of the given changes applied to one student, as one model input frame.
+
+    record uses the GUI/JSON fields (schema.encode_student). changes maps a
+    feature to absolute values (categorical codes or form options, numbers);
+    deltas maps a numerical feature to increments, applied as given (no
+    clipping). Each feature also keeps its current value, so row 0 is the
+    unchanged student. With feasible_only, scenarios failing feasible() are
+    dropped (row 0 is always kept).
+
+    Returns (X, choice, axes): choice[i, j] is the option of axes[j] used in row i.
+    """
+    student = encode_student(record)
+    axes = _axes(student, changes, deltas)
+
+    sizes = [len(values) for _, values, _ in axes]
+    n_scenarios = int(np.prod(sizes)) if sizes else 1
+    if n_scenarios > max_scenarios:
+        raise ValueError(f"{n_scenarios} scenarios, more than max_scenarios={max_scenarios}")
+
+    # row-major over the option indices: row 0 takes option 0 (no change) everywhere
+    choice = np.indices(sizes).reshape(len(sizes), -1).T if sizes else np.zeros((1, 0), dtype=np.intp)
+
+    columns = {feature: np.full(n_scenarios, value) for feature, value in student.items()}
+    for j, (feature, values, _) in enumerate(axes):
+        columns[feature] = np.asarray(values)[choice[:, j]]
+    X = pd.DataFrame(columns)
+
+    if feasible_only:
+        keep = feasible(X)
+        keep[0] = True
+        X, choice = X[keep].reset_index(drop=True), choice[keep]
+    return X, choice, axes
+
+
+def sweep(pipeline, record, changes=None, deltas=None, target="Dropout", top_k=20, explain=0,
+          max_scenarios=MAX_SCENARIOS, feasible_only=True):
+    """Score every what-if scenario of one student in a single predict_proba call.
+
+    Returns the scenarios ranked by how much they lower the probability of
+    `target` (fewer changes first on ties), best top_k rows (all with
+    top_k=None). Each row lists the changes, the new value of every swept
+    feature, the class probabilities and `<target>_change` against the
+    unchanged student. explain=n adds the top grouped SHAP features of the
+    first n rows, from one batched SHAP call. The unchanged student's
+    probability and the number of scored scenarios are in `table.attrs`.
+    """
+    codes = {label: code for code, label in label_mapping.items()}
+    if target not in codes:
+        raise ValueError(f"Unknown target {target!r}, expected one of {list(codes)}")
+
+    X, choice, axes = scenario_grid(record, changes, deltas, max_scenarios=max_scenarios,
+                                    feasible_only=feasible_only)
+
+    model = pipeline.steps[-1][1]
+    X_proc = transform_for_model(pipeline, X)
+    proba = model.predict_proba(X_proc)
+    classes = list(model.classes_)
+    p_target = proba[:, classes.index(codes[target])]
+
+    n_changes = (choice > 0).sum(axis=1)
+    order = np.lexsort((n_changes, p_target))
+    order = order[order != 0]           # row 0 is the unchanged student
+    if top_k is not None:
+        order = order[:top_k]
+
+    labels = [np.asarray(text, dtype=object) for _, _, text in axes]
+    table = pd.DataFrame({
+        "changes": [", ".join(labels[j][k] for j, k in enumerate(row) if k) for row in choice[order]],
+        "n_changes": n_changes[order],
+    })
+    for feature, _, _ in axes:
+        table[feature] = X[feature].to_numpy()[order]
+    for i, c in enumerate(classes):
+        table[f"proba_{label_mapping.get(c, c)}"] = proba[order, i]
+    table[f"{target}_change"] = p_target[order] - p_target[0]
+    table["prediction"] = [label_mapping.get(c, str(c)) for c in np.asarray(classes)[np.argmax(proba[order], axis=1)]]
+
+    if explain and len(order):
+        rows = order[:explain]
+        values = exact_shap(model, X_proc[rows])
+        preprocessor = pipeline.named_steps["preprocessing"]
+        top = top_features(values, preprocessor.get_feature_names_out(), model, [codes[target]] * len(rows),
+                           k=3, groups=groups_for(preprocessor))
+        table["top_features"] = [", ".join(f"{name} ({val:+.3f})" for name, val in row) for row in top] \
+            + [""] * (len(order) - len(rows))
+
+    table.attrs.update({"baseline": float(p_target[0]), "target": target, "n_scenarios": len(X)})
+    return table